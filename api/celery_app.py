@@ -11,6 +11,8 @@ import sys
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from api.config import settings
+
 # Create Celery app
 celery_app = Celery(
     "trendforge",
@@ -18,6 +20,29 @@ celery_app = Celery(
     backend="redis://localhost:6379/1"
 )
 
+# Queues: interactive (single generations), bulk (variations, campaigns) and maintenance
+# (extraction, curation). Run a worker pool per queue with `python -m api.worker <queue>`,
+# so bulk work never occupies the workers that serve interactive requests.
+INTERACTIVE_QUEUE = "interactive"
+BULK_QUEUE = "bulk"
+MAINTENANCE_QUEUE = "maintenance"
+
+# Redis transport: 0 is the highest priority
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+TASK_ROUTES = {
+    'generate_content': {'queue': INTERACTIVE_QUEUE, 'priority': PRIORITY_HIGH},
+    'generate_multiple_variations': {'queue': BULK_QUEUE, 'priority': PRIORITY_NORMAL},
+    'generate_campaign': {'queue': BULK_QUEUE, 'priority': PRIORITY_LOW},
+    'generate_campaign_item': {'queue': BULK_QUEUE, 'priority': PRIORITY_LOW},
+    'finish_campaign': {'queue': BULK_QUEUE, 'priority': PRIORITY_HIGH},
+    'campaign_failed': {'queue': BULK_QUEUE, 'priority': PRIORITY_HIGH},
+    'run_extractor': {'queue': MAINTENANCE_QUEUE, 'priority': PRIORITY_NORMAL},
+    'run_curator': {'queue': MAINTENANCE_QUEUE, 'priority': PRIORITY_NORMAL},
+}
+
 # Celery configuration
 celery_app.conf.update(
     task_serializer='json',
@@ -28,10 +53,27 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=300,  # 5 minutes max per task
     task_soft_time_limit=240,  # 4 minutes soft limit
+    result_expires=settings.RESULT_EXPIRES_SECONDS,  # Results are compact references
+    task_default_queue=INTERACTIVE_QUEUE,
+    task_routes=TASK_ROUTES,
+    task_default_priority=PRIORITY_NORMAL,
+    broker_transport_options={
+        'priority_steps': list(range(10)),
+        'queue_order_strategy': 'priority',
+    },
+    # LLM tasks run for a minute or more: reserve one task at a time, so a busy child does not
+    # hold queued work that an idle one could start, and acknowledge only after completion,
+    # so a task on a crashed worker is redelivered
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
 )
 
 # Import tasks
-from api.tasks import content_tasks
+from api.tasks import content_tasks, extraction_tasks, worker_lifecycle
+
+# Periodic extraction and curation (run `celery -A api.celery_app beat`)
+celery_app.conf.beat_schedule = extraction_tasks.build_beat_schedule()
 
 # Auto-discover tasks
 celery_app.autodiscover_tasks(['api.tasks'])
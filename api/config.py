@@ -28,8 +28,50 @@ class Settings(BaseSettings):
     # Gemini API
     GEMINI_API_KEY: str = ""
     
+    # Seconds a resolved user ID is cached in-process
+    USER_CACHE_TTL_SECONDS: int = 300
+    
+    # Seconds a /content/history total is cached
+    HISTORY_COUNT_TTL_SECONDS: int = 30
+    
+    # Identical generation requests within this window attach to the first job
+    IDEMPOTENCY_WINDOW_SECONDS: int = 300
+    
+    # Celery results hold only content IDs, so they can be kept for days
+    RESULT_EXPIRES_SECONDS: int = 7 * 24 * 3600
+    # Seconds a finished job's status is served from memory
+    JOB_STATUS_CACHE_SECONDS: int = 30
+    
+    # Upper bound on topics x platforms x variations per campaign request
+    MAX_CAMPAIGN_ITEMS: int = 100
+    
+    # Content engine calls from the API run on a bounded thread pool
+    ENGINE_MAX_WORKERS: int = 4
+    
     # Slack Integration
     SLACK_WEBHOOK_URL: str = ""
+    SLACK_DIGEST_WINDOW_SECONDS: int = 10  # Notifications within a window are sent as one message
+    SLACK_MAX_RETRIES: int = 3
+    
+    # Worker processes per Celery queue (python -m api.worker <queue>)
+    WORKER_CONCURRENCY_INTERACTIVE: int = 4
+    WORKER_CONCURRENCY_BULK: int = 8
+    WORKER_CONCURRENCY_MAINTENANCE: int = 2
+    
+    # Scheduled extraction (Celery beat): minutes between runs, 0 disables a source
+    SCHEDULE_GOOGLE_TRENDS_MINUTES: int = 360
+    SCHEDULE_TWITTER_MINUTES: int = 60
+    SCHEDULE_YOUTUBE_MINUTES: int = 180
+    SCHEDULE_LINKEDIN_MINUTES: int = 720
+    SCHEDULE_CURATOR_MINUTES: int = 60
+    EXTRACTION_MAX_CONCURRENCY: int = 1  # Runs per source at once; 1 = skip while the previous run is going
+    EXTRACTION_TIME_LIMIT_SECONDS: int = 3600
+    
+    # Sampling profiler for slow requests (writes data/profiles/*.folded)
+    PROFILER_ENABLED: bool = False
+    PROFILER_SAMPLE_RATE: float = 0.1  # Fraction of requests sampled
+    PROFILER_INTERVAL_MS: int = 5
+    PROFILER_SLOW_REQUEST_MS: int = 1000
     
     class Config:
         env_file = ".env"
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
@@ -14,6 +16,28 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def to_async_url(url: str):
+    """Maps the sync Postgres URL onto the asyncpg driver (asyncpg spells sslmode as ssl)."""
+    async_url = make_url(url)
+    if async_url.drivername.startswith("postgresql"):
+        async_url = async_url.set(drivername="postgresql+asyncpg")
+        query = dict(async_url.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        async_url = async_url.set(query=query)
+    return async_url
+
+# Async engine for the API routes (Celery tasks and scripts keep the sync engine)
+async_engine = create_async_engine(
+    to_async_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20
+)
+
+# expire_on_commit=False: objects stay readable after commit without another round trip
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -24,3 +48,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
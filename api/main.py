@@ -1,6 +1,9 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from .config import settings
+from .utils.monitoring import MetricsMiddleware
 
 # Create FastAPI app
 app = FastAPI(
@@ -18,6 +21,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, status and in-flight metrics (served at /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Health check endpoint
 @app.get("/")
 async def root():
@@ -31,6 +37,21 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    # Collectors read Redis and the DB pools: render off the event loop
+    body = await run_in_threadpool(generate_latest)
+    return Response(body, media_type=CONTENT_TYPE_LATEST)
+
+@app.on_event("shutdown")
+async def shutdown():
+    from .database import async_engine
+    from .utils.engine_pool import engine_executor
+    from .utils.slack import slack_dispatcher
+    await slack_dispatcher.stop()
+    engine_executor.shutdown(wait=False, cancel_futures=True)
+    await async_engine.dispose()
+
 # Import and include routers
 from .routers import content, sentiment, metrics, ab_testing
 app.include_router(content.router, prefix=f"{settings.API_V1_PREFIX}/content", tags=["content"])
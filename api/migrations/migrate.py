@@ -9,6 +9,8 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy import text
+
 from api.database import engine, Base
 from api.models import (
     User,
@@ -17,7 +19,8 @@ from api.models import (
     ABVariant,
     Metrics,
     SentimentAnalysis,
-    CuratedExample
+    CuratedExample,
+    ExtractionRun
 )
 
 def create_tables():
@@ -27,6 +30,13 @@ def create_tables():
     try:
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        # create_all skips indexes of tables that already exist
+        for index in Content.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+        # ... and server defaults of existing columns
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE content ALTER COLUMN id SET DEFAULT gen_random_uuid()"))
+            conn.execute(text("ALTER TABLE content ALTER COLUMN created_at SET DEFAULT timezone('utc', now())"))
         print("✅ Successfully created all tables:")
         print("  - users")
         print("  - content")
@@ -35,6 +45,7 @@ def create_tables():
         print("  - metrics")
         print("  - sentiment_analysis")
         print("  - curated_examples")
+        print("  - extraction_runs")
         print("\nDatabase migration completed!")
         
     except Exception as e:
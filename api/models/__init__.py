@@ -5,7 +5,8 @@ from .models import (
     ABVariant,
     Metrics,
     SentimentAnalysis,
-    CuratedExample
+    CuratedExample,
+    ExtractionRun
 )
 
 __all__ = [
@@ -15,5 +16,6 @@ __all__ = [
     "ABVariant",
     "Metrics",
     "SentimentAnalysis",
-    "CuratedExample"
+    "CuratedExample",
+    "ExtractionRun"
 ]
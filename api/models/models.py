@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Integer, Text, DateTime, ForeignKey, ARRAY
+from sqlalchemy import Column, String, Float, Integer, Text, DateTime, ForeignKey, ARRAY, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -22,7 +22,8 @@ class User(Base):
 class Content(Base):
     __tablename__ = "content"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Server-side defaults, so batched inserts (api/utils/content_store.py) need no client values
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     topic = Column(String, nullable=False)
     platform = Column(String, nullable=False)
@@ -32,7 +33,7 @@ class Content(Base):
     quality_score = Column(Float)
     critique_notes = Column(Text)
     status = Column(String, default="draft")  # draft, published, archived
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=text("timezone('utc', now())"))
     published_at = Column(DateTime, nullable=True)
     
     # Relationships
@@ -40,6 +41,13 @@ class Content(Base):
     metrics = relationship("Metrics", back_populates="content")
     sentiment = relationship("SentimentAnalysis", back_populates="content")
     ab_variants = relationship("ABVariant", back_populates="content")
+    
+    # Keyset pagination of /content/history: (created_at, id) descending per user,
+    # with and without a platform filter
+    __table_args__ = (
+        Index("ix_content_user_platform_created", user_id, platform, created_at.desc(), id.desc()),
+        Index("ix_content_user_created", user_id, created_at.desc(), id.desc()),
+    )
 
 
 class ABTest(Base):
@@ -116,3 +124,18 @@ class CuratedExample(Base):
     performance_score = Column(Float, default=0.0)
     source_url = Column(String, nullable=True)
     curated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ExtractionRun(Base):
+    __tablename__ = "extraction_runs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    source = Column(String, nullable=False, index=True)  # twitter, youtube, linkedin, google_trends, curator
+    status = Column(String, default="running")  # running, success, failed, skipped
+    task_id = Column(String, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    row_count = Column(Integer, default=0)
+    rows = Column(JSONB, default={})  # rows written per output
+    error = Column(Text, nullable=True)
@@ -10,6 +10,12 @@ class ContentGenerateRequest(BaseModel):
     product_info: str = Field(..., description="Product information")
     num_variations: int = Field(default=1, ge=1, le=5, description="Number of variations to generate")
 
+class CampaignGenerateRequest(BaseModel):
+    topics: list[str] = Field(..., min_length=1, description="Content topics or angles")
+    platforms: list[str] = Field(..., min_length=1, description="Platforms (LinkedIn, YouTube, Twitter)")
+    product_info: str = Field(..., description="Product information")
+    num_variations: int = Field(default=1, ge=1, le=5, description="Variations per topic and platform")
+
 class ContentUpdateRequest(BaseModel):
     status: Optional[str] = None
     published_at: Optional[datetime] = None
@@ -38,13 +44,27 @@ class JobStatusResponse(BaseModel):
     progress: int = 0
     result: Optional[ContentResponse] = None
     error: Optional[str] = None
+    deduplicated: bool = False  # True when an identical request's job was returned
+    estimated_time: Optional[int] = None
+
+class CampaignStatusResponse(BaseModel):
+    job_id: str
+    status: str  # queued, processing, completed, partial, failed
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    progress: int = 0
+    content_ids: list[UUID] = []
+    errors: list[str] = []
+    deduplicated: bool = False
     estimated_time: Optional[int] = None
 
 class ContentListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # Cached for a few seconds; None when include_total=false
     items: list[ContentResponse]
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page; None on the last page
 
 # Sentiment & Trend Schemas
 class SentimentTopic(BaseModel):
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
+import asyncio
+import json
+from contextlib import aclosing
 import uuid
-from datetime import datetime
 from celery.result import AsyncResult
 
-from ..database import get_db
-from ..models.models import Content, User
+from ..database import get_async_db
+from ..models.models import Content
 from ..models.schemas import (
+    CampaignGenerateRequest,
+    CampaignStatusResponse,
     ContentGenerateRequest,
     ContentResponse,
     ContentListResponse,
@@ -17,117 +24,103 @@ from ..models.schemas import (
 )
 
 # Import Celery tasks
-from ..tasks.content_tasks import generate_content_task, generate_multiple_variations_task
+from ..tasks.content_tasks import (
+    generate_campaign_task,
+    generate_content_task,
+    generate_multiple_variations_task,
+    get_campaign_progress
+)
 from ..celery_app import celery_app
+from ..config import settings
+from ..utils.content_store import content_row, insert_contents_async
+from ..utils.engine_pool import run_pipeline
+from ..utils.idempotency import dispatch_once, request_fingerprint
+from ..utils.progress import progress_events
+from ..utils.slack import slack_dispatcher
+from ..utils.ttl_cache import TTLCache
+from ..utils.users import resolve_user_id
+from ..utils.pagination import InvalidCursor, cache_count, cached_count, decode_cursor, encode_cursor, invalidate_counts
 
 router = APIRouter()
 
-def get_default_user(db: Session) -> UUID:
-    """Get or create default user for testing"""
-    # Use a consistent UUID for the default user
-    DEFAULT_EMAIL = "default@trendforgeai.com"
-    
-    user = db.query(User).filter(User.email == DEFAULT_EMAIL).first()
-    
-    if not user:
-        # Create default user
-        user = User(
-            id=uuid.uuid4(),
-            email=DEFAULT_EMAIL,
-            name="Default User",
-            hashed_password="not-used-yet"  # TODO: Hash properly when auth is implemented
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    
-    return user.id
-
+# Finished jobs do not change: their status is served from here for JOB_STATUS_CACHE_SECONDS
+job_status_cache = TTLCache(settings.JOB_STATUS_CACHE_SECONDS)
 
 @router.post("/generate", response_model=JobStatusResponse)
 async def generate_content(
     request: ContentGenerateRequest,
-    db: Session = Depends(get_db),
-    use_async: bool = Query(True, description="Use async processing (Celery)")
+    db: AsyncSession = Depends(get_async_db),
+    use_async: bool = Query(True, description="Use async processing (Celery)"),
+    idempotency_key: str = Header(None, alias="Idempotency-Key")
 ):
     """
     Generate marketing content based on topic and platform
     
+    Identical async requests within IDEMPOTENCY_WINDOW_SECONDS (or requests with the same
+    Idempotency-Key header) return the job ID of the first one instead of enqueuing again.
+    
     Args:
         request: Content generation request
         use_async: If True, use Celery for async processing. If False, run synchronously.
     """
     try:
         if use_async:
-            # Use Celery for async processing
+            # Use Celery for async processing (publishing to the broker is blocking I/O)
+            fields = dict(
+                topic=request.topic,
+                platform=request.platform,
+                product_info=request.product_info
+            )
             if request.num_variations > 1:
                 # Generate multiple variations
-                task = generate_multiple_variations_task.delay(
-                    topic=request.topic,
-                    platform=request.platform,
-                    product_info=request.product_info,
-                    num_variations=request.num_variations
-                )
+                task = generate_multiple_variations_task
+                fields["num_variations"] = request.num_variations
             else:
                 # Generate single content
-                task = generate_content_task.delay(
-                    topic=request.topic,
-                    platform=request.platform,
-                    product_info=request.product_info
-                )
+                task = generate_content_task
+            
+            fingerprint = request_fingerprint(task.name, idempotency_key, **fields)
+            job_id, deduplicated = await dispatch_once(
+                fingerprint, lambda task_id: task.apply_async(kwargs=fields, task_id=task_id)
+            )
             
             return JobStatusResponse(
-                job_id=task.id,
+                job_id=job_id,
+                deduplicated=deduplicated,
                 status="queued",
                 progress=0,
                 estimated_time=60 * request.num_variations  # Estimate 60s per variation
             )
         
         else:
-            # Synchronous processing (for testing or when Celery is not available)
-            from src.engine.content_engine import ContentEngine
-            engine = ContentEngine()
-            
-            results = []
+            # In-process processing (for testing or when Celery is not available).
+            # Variations run concurrently on the bounded engine pool, so the event loop
+            # stays free, and are saved together in one insert.
+            user_id = await resolve_user_id(db)
             
-            for i in range(request.num_variations):
-                result = engine.run_pipeline(
+            generated = await asyncio.gather(*[
+                run_pipeline(
                     topic=request.topic,
                     platform=request.platform,
                     product_info=request.product_info
                 )
-                
-                if result:
-                    # Save to database
-                    content = Content(
-                        id=uuid.uuid4(),
-                        user_id=get_default_user(db),
-                        topic=result['topic'],
-                        platform=result['platform'],
-                        product_info=request.product_info,
-                        final_content=result['final_content'],
-                        original_draft=result['original_draft'],
-                        quality_score=result['quality_score'],
-                        critique_notes=result['critique_notes'],
-                        status="draft",
-                        created_at=datetime.utcnow()
-                    )
-                    
-                    db.add(content)
-                    db.commit()
-                    db.refresh(content)
-                    
-                    # Track and Alert via Slack
-                    try:
-                        from ..utils.slack import send_slack_notification
-                        send_slack_notification(
-                            f"✅ *New Content Generated*\n*Topic:* {result['topic']}\n*Platform:* {result['platform']}\n*Quality Score:* {result['quality_score']}/10",
-                            username="TrendForgeAI Tracker"
-                        )
-                    except Exception as e:
-                        print(f"Slack alert failed: {e}")
-                    
-                    results.append(content)
+                for _ in range(request.num_variations)
+            ])
+            generated = [result for result in generated if result]
+            
+            # Save to database
+            results = await insert_contents_async(
+                db, [content_row(result, request.product_info, user_id) for result in generated]
+            )
+            if results:
+                invalidate_counts(user_id)
+            
+            # Track and Alert via Slack (queued and coalesced, never waits for Slack)
+            for result in generated:
+                slack_dispatcher.notify(
+                    f"✅ *New Content Generated*\n*Topic:* {result['topic']}\n*Platform:* {result['platform']}\n*Quality Score:* {result['quality_score']}/10",
+                    username="TrendForgeAI Tracker"
+                )
             
             # Return the first result
             if results:
@@ -140,6 +133,8 @@ async def generate_content(
             else:
                 raise HTTPException(status_code=500, detail="Content generation failed")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -147,7 +142,7 @@ async def generate_content(
 @router.get("/jobs/{job_id}", response_model=JobStatusResponse)
 async def get_job_status(
     job_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Check the status of an async content generation job
@@ -158,55 +153,76 @@ async def get_job_status(
     Returns:
         Job status with progress and result if completed
     """
+    cached = job_status_cache.get(job_id)
+    if cached:
+        return cached
+    
     try:
-        # Get task result
-        task = AsyncResult(job_id, app=celery_app)
+        # One backend read for state and result (a blocking call)
+        meta = await run_in_threadpool(celery_app.backend.get_task_meta, job_id)
+        state, info = meta['status'], meta.get('result')
         
-        if task.state == 'PENDING':
+        if state == 'PENDING':
             return JobStatusResponse(
                 job_id=job_id,
                 status="queued",
                 progress=0
             )
-        elif task.state == 'PROCESSING':
-            # Get progress from task meta
-            meta = task.info if task.info else {}
+        elif state == 'PROCESSING':
+            # Fanned-out jobs (variations) count finished items; others report task meta
+            counts = await run_in_threadpool(get_campaign_progress, job_id)
+            if counts and counts.get('total'):
+                progress = int((counts['completed'] + counts['failed']) / counts['total'] * 100)
+            else:
+                progress = (info or {}).get('progress', 0)
             return JobStatusResponse(
                 job_id=job_id,
                 status="processing",
-                progress=meta.get('progress', 0)
+                progress=progress
             )
-        elif task.state == 'SUCCESS':
-            result = task.result
+        elif state == 'SUCCESS':
+            # Tasks store only references (see content_tasks); content comes from the database
+            result = info
             
-            # If result contains a content_id, fetch from database
-            if isinstance(result, dict) and 'id' in result:
-                content = db.query(Content).filter(Content.id == uuid.UUID(result['id'])).first()
-                if content:
-                    return JobStatusResponse(
-                        job_id=job_id,
-                        status="completed",
-                        progress=100,
-                        result=ContentResponse.from_orm(content)
-                    )
+            # Every variation failed
+            if isinstance(result, dict) and result.get('status') == 'failed':
+                response = JobStatusResponse(
+                    job_id=job_id,
+                    status="failed",
+                    progress=100,
+                    error="; ".join(result.get('errors', [])) or "Unknown error"
+                )
+                job_status_cache.set(job_id, response)
+                return response
             
-            return JobStatusResponse(
+            response = JobStatusResponse(
                 job_id=job_id,
                 status="completed",
                 progress=100
             )
-        elif task.state == 'FAILURE':
-            error = str(task.info) if task.info else "Unknown error"
-            return JobStatusResponse(
+            
+            # If result contains a content_id, fetch from database
+            if isinstance(result, dict) and 'id' in result:
+                content = await db.get(Content, uuid.UUID(result['id']))
+                if content:
+                    response.result = ContentResponse.from_orm(content)
+            
+            job_status_cache.set(job_id, response)
+            return response
+        elif state == 'FAILURE':
+            error = str(info) if info else "Unknown error"
+            response = JobStatusResponse(
                 job_id=job_id,
                 status="failed",
                 progress=0,
                 error=error
             )
+            job_status_cache.set(job_id, response)
+            return response
         else:
             return JobStatusResponse(
                 job_id=job_id,
-                status=task.state.lower(),
+                status=state.lower(),
                 progress=0
             )
             
@@ -215,47 +231,223 @@ async def get_job_status(
 
 
 
+async def backend_snapshot(job_id: str) -> dict:
+    """
+    Progress event built from the result backend, for jobs without a published snapshot and
+    for the heartbeat check of progress_events
+    """
+    task = AsyncResult(job_id, app=celery_app)
+    state = await run_in_threadpool(lambda: task.state)
+    statuses = {'PENDING': 'queued', 'SUCCESS': 'completed', 'FAILURE': 'failed', 'REVOKED': 'failed'}
+    status = statuses.get(state, 'processing')
+    progress = 100 if status == 'completed' else 0
+    if state == 'PROCESSING':
+        meta = await run_in_threadpool(lambda: task.info) or {}
+        progress = meta.get('progress', 0)
+    return {"job_id": job_id, "status": status, "progress": progress, "message": None}
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-sent events with the progress of a job (content, variations or campaign)
+    
+    The first event is the current state; the stream ends after the completed/failed event.
+    """
+    async def stream():
+        async with aclosing(progress_events(job_id, lambda: backend_snapshot(job_id))) as events:
+            async for event in events:
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/jobs/{job_id}/ws")
+async def job_events_socket(websocket: WebSocket, job_id: str):
+    """
+    Same events as /jobs/{job_id}/events, as JSON messages over a WebSocket
+    
+    Heartbeats are sent as {"type": "ping"}, so a disconnected client is noticed and the
+    subscription is closed.
+    """
+    await websocket.accept()
+    try:
+        # aclosing: a failed send unsubscribes right away, not when the generator is collected
+        async with aclosing(progress_events(job_id, lambda: backend_snapshot(job_id))) as events:
+            async for event in events:
+                await websocket.send_json({"type": "ping"} if event is None else event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.post("/campaigns", response_model=CampaignStatusResponse)
+async def generate_campaign(
+    request: CampaignGenerateRequest,
+    idempotency_key: str = Header(None, alias="Idempotency-Key")
+):
+    """
+    Generate a whole campaign in one job: every topic x platform pair, num_variations times
+    
+    Poll /campaigns/{job_id} for aggregated progress. A repeated request returns the job ID
+    of the first one (see /generate).
+    """
+    total = len(request.topics) * len(request.platforms) * request.num_variations
+    if total > settings.MAX_CAMPAIGN_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campaign has {total} items, the limit is {settings.MAX_CAMPAIGN_ITEMS}"
+        )
+    
+    fields = dict(
+        topics=request.topics,
+        platforms=request.platforms,
+        product_info=request.product_info,
+        num_variations=request.num_variations
+    )
+    try:
+        job_id, deduplicated = await dispatch_once(
+            request_fingerprint(generate_campaign_task.name, idempotency_key, **fields),
+            lambda task_id: generate_campaign_task.apply_async(kwargs=fields, task_id=task_id)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    
+    return CampaignStatusResponse(
+        job_id=job_id,
+        deduplicated=deduplicated,
+        status="queued",
+        total=total,
+        estimated_time=60 * total  # Upper bound: items run in parallel across workers
+    )
+
+
+@router.get("/campaigns/{job_id}", response_model=CampaignStatusResponse)
+async def get_campaign_status(job_id: str):
+    """
+    Get aggregated progress of a campaign job
+    """
+    task = AsyncResult(job_id, app=celery_app)
+    state = await run_in_threadpool(lambda: task.state)
+    counts = await run_in_threadpool(get_campaign_progress, job_id) or {}
+    
+    total = counts.get('total', 0)
+    completed = counts.get('completed', 0)
+    failed = counts.get('failed', 0)
+    
+    if state == 'SUCCESS':
+        result = await run_in_threadpool(lambda: task.result)
+        return CampaignStatusResponse(
+            job_id=job_id,
+            status=result['status'],
+            total=result['total'],
+            completed=result['completed'],
+            failed=result['failed'],
+            progress=100,
+            content_ids=result['content_ids'],
+            errors=result['errors']
+        )
+    
+    if state == 'FAILURE':
+        info = await run_in_threadpool(lambda: task.info)
+        return CampaignStatusResponse(
+            job_id=job_id,
+            status="failed",
+            total=total,
+            completed=completed,
+            failed=failed,
+            errors=[str(info) if info else "Unknown error"]
+        )
+    
+    if not counts:
+        return CampaignStatusResponse(job_id=job_id, status="queued")
+    
+    return CampaignStatusResponse(
+        job_id=job_id,
+        status="processing",
+        total=total,
+        completed=completed,
+        failed=failed,
+        progress=int((completed + failed) / total * 100) if total else 0
+    )
+
+
 @router.get("/history", response_model=ContentListResponse)
 async def get_content_history(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     platform: str = Query(None),
-    db: Session = Depends(get_db)
+    cursor: str = Query(None, description="next_cursor of the previous page"),
+    include_total: bool = Query(True),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get content generation history with pagination
+    Get content generation history, newest first
+    
+    Pass the returned next_cursor to get the following page: keyset pagination on
+    (created_at, id) reads only page_size rows however deep the page is. `page` without a
+    cursor still works (OFFSET) for existing clients.
     """
     # Build query
-    user_id = get_default_user(db)
-    query = db.query(Content).filter(Content.user_id == user_id)
+    user_id = await resolve_user_id(db)
+    query = select(Content).where(Content.user_id == user_id)
     
     if platform:
-        query = query.filter(Content.platform == platform)
+        query = query.where(Content.platform == platform)
     
-    # Get total count
-    total = query.count()
+    # Total, cached for HISTORY_COUNT_TTL_SECONDS
+    total = None
+    if include_total:
+        count_key = (user_id, platform)
+        total = cached_count(count_key)
+        if total is None:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+            cache_count(count_key, total)
     
     # Apply pagination
-    offset = (page - 1) * page_size
-    items = query.order_by(Content.created_at.desc()).offset(offset).limit(page_size).all()
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(tuple_(Content.created_at, Content.id) < tuple_(created_at, last_id))
+    elif page > 1:
+        query = query.offset((page - 1) * page_size)
+    
+    # One extra row tells whether there is a next page
+    query = query.order_by(Content.created_at.desc(), Content.id.desc()).limit(page_size + 1)
+    items = (await db.scalars(query)).all()
+    
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
     
     return ContentListResponse(
         total=total,
         items=[ContentResponse.from_orm(item) for item in items],
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
 @router.get("/{content_id}", response_model=ContentResponse)
 async def get_content(
     content_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get specific content by ID
     """
-    content = db.query(Content).filter(Content.id == content_id).first()
+    content = await db.get(Content, content_id)
     
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
@@ -267,12 +459,12 @@ async def get_content(
 async def update_content(
     content_id: UUID,
     request: ContentUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update content status or publish date
     """
-    content = db.query(Content).filter(Content.id == content_id).first()
+    content = await db.get(Content, content_id)
     
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
@@ -283,8 +475,7 @@ async def update_content(
     if request.published_at:
         content.published_at = request.published_at
     
-    db.commit()
-    db.refresh(content)
+    await db.commit()
     
     return ContentResponse.from_orm(content)
 
@@ -292,18 +483,19 @@ async def update_content(
 @router.delete("/{content_id}")
 async def delete_content(
     content_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete content by ID
     """
-    content = db.query(Content).filter(Content.id == content_id).first()
+    content = await db.get(Content, content_id)
     
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     
-    db.delete(content)
-    db.commit()
+    await db.delete(content)
+    await db.commit()
+    invalidate_counts(content.user_id)
     
     return {"message": "Content deleted successfully"}
 
@@ -311,20 +503,20 @@ async def delete_content(
 @router.post("/regenerate/{content_id}", response_model=JobStatusResponse)
 async def regenerate_content(
     content_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Regenerate content based on existing content's parameters
     """
     # Get original content
-    original = db.query(Content).filter(Content.id == content_id).first()
+    original = await db.get(Content, content_id)
     
     if not original:
         raise HTTPException(status_code=404, detail="Content not found")
     
     try:
-        # Regenerate using original parameters
-        result = engine.run_pipeline(
+        # Regenerate using original parameters, on the engine pool
+        result = await run_pipeline(
             topic=original.topic,
             platform=original.platform,
             product_info=original.product_info
@@ -332,23 +524,10 @@ async def regenerate_content(
         
         if result:
             # Create new content entry
-            content = Content(
-                id=uuid.uuid4(),
-                user_id=original.user_id,
-                topic=result['topic'],
-                platform=result['platform'],
-                product_info=original.product_info,
-                final_content=result['final_content'],
-                original_draft=result['original_draft'],
-                quality_score=result['quality_score'],
-                critique_notes=result['critique_notes'],
-                status="draft",
-                created_at=datetime.utcnow()
-            )
-            
-            db.add(content)
-            db.commit()
-            db.refresh(content)
+            content = (await insert_contents_async(
+                db, [content_row(result, original.product_info, original.user_id)]
+            ))[0]
+            invalidate_counts(content.user_id)
             
             return JobStatusResponse(
                 job_id=str(content.id),
@@ -359,5 +538,7 @@ async def regenerate_content(
         else:
             raise HTTPException(status_code=500, detail="Content regeneration failed")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from ..models.schemas import MetricsResponse, MetricItem, CampaignDataPoint, SlackAlert, SlackTestRequest, SlackTestResponse
 from ..database import get_db
@@ -87,7 +88,7 @@ async def trigger_slack_report(db: Session = Depends(get_db)):
         "content": history_data
     }
     
-    success = send_slack_report("TrendForgeAI - Comprehensive Performance Intelligence", report_data)
+    success = await run_in_threadpool(send_slack_report, "TrendForgeAI - Comprehensive Performance Intelligence", report_data)
     
     if success:
         return SlackTestResponse(success=True, message="Comprehensive report sent to Slack!")
@@ -102,7 +103,7 @@ async def test_slack(request: SlackTestRequest):
     if not settings.SLACK_WEBHOOK_URL:
         raise HTTPException(status_code=400, detail="Slack Webhook URL is not configured in credentials.py")
     
-    success = send_slack_notification(request.message)
+    success = await run_in_threadpool(send_slack_notification, request.message)
     if success:
         return SlackTestResponse(success=True, message="Test notification sent successfully!")
     else:
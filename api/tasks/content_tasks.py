@@ -2,25 +2,53 @@
 Celery tasks for content generation
 """
 
-from celery import current_task
+from celery import chord, current_task, group
+from sqlalchemy.exc import OperationalError
 import sys
 import os
-from datetime import datetime
+import json
 import uuid
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from api.celery_app import celery_app
+from api.celery_app import PRIORITY_LOW, PRIORITY_NORMAL, celery_app
 from src.engine.content_engine import ContentEngine
 from api.database import SessionLocal
-from api.models.models import Content, User
+from api.utils.content_store import content_row, insert_contents
+from api.utils.progress import publish_progress
+from api.utils.redis_client import get_redis
+from api.utils.users import DEFAULT_USER_EMAIL, resolve_user_id_sync
 
-# Initialize content engine
-engine = ContentEngine()
+# Content engine of this process, created on first use (or by worker_lifecycle after fork)
+_engine = None
+
+def get_engine() -> ContentEngine:
+    global _engine
+    if _engine is None:
+        _engine = ContentEngine()
+    return _engine
+
+CAMPAIGN_KEY = "trendforge:campaign:{}"
+CAMPAIGN_ROWS_KEY = "trendforge:campaign:{}:rows"  # Generated rows, written in one batch at the end
+CAMPAIGN_TTL_SECONDS = 24 * 3600
+
+class ProgressTask(celery_app.Task):
+    """
+    Publishes a failed event when the task fails, so progress streams of the job end.
+    Used by the tasks that do not publish their own failure (fan-out and chord callback).
+    """
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        publish_progress(task_id, 'failed', 0, f'Error: {str(exc)}')
+
+def report_progress(task, message: str, progress: int):
+    """Updates the task meta (for polling) and publishes the step to subscribed clients"""
+    task.update_state(state='PROCESSING', meta={'status': message, 'progress': progress})
+    publish_progress(task.request.id, 'processing', progress, message)
 
 @celery_app.task(bind=True, name='generate_content')
-def generate_content_task(self, topic: str, platform: str, product_info: str, user_email: str = "default@trendforgeai.com"):
+def generate_content_task(self, topic: str, platform: str, product_info: str, user_email: str = DEFAULT_USER_EMAIL):
     """
     Async task to generate marketing content
     
@@ -31,83 +59,48 @@ def generate_content_task(self, topic: str, platform: str, product_info: str, us
         user_email: User email (defaults to demo user)
         
     Returns:
-        dict: Generated content data
+        dict: Content ID, platform, quality score and status
     """
     try:
         # Update task state to PROCESSING
-        self.update_state(
-            state='PROCESSING',
-            meta={'status': 'Starting content generation...', 'progress': 10}
-        )
+        report_progress(self, 'Starting content generation...', 10)
         
         # Get database session
         db = SessionLocal()
         
         try:
-            # Get or create user
-            user = db.query(User).filter(User.email == user_email).first()
-            if not user:
-                user = User(
-                    id=uuid.uuid4(),
-                    email=user_email,
-                    name="Default User",
-                    hashed_password="not-used-yet"
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
+            # Get or create user (cached per worker process)
+            user_id = resolve_user_id_sync(db, user_email)
             
             # Update progress
-            self.update_state(
-                state='PROCESSING',
-                meta={'status': 'Retrieving style examples...', 'progress': 30}
-            )
+            report_progress(self, 'Retrieving style examples...', 20)
             
-            # Run content generation pipeline
-            result = engine.run_pipeline(
+            # Run content generation pipeline (reports each stage)
+            result = get_engine().run_pipeline(
                 topic=topic,
                 platform=platform,
-                product_info=product_info
+                product_info=product_info,
+                on_stage=lambda message, progress: report_progress(self, message, progress)
             )
             
             if not result:
                 raise Exception("Content generation failed - no result returned")
             
             # Update progress
-            self.update_state(
-                state='PROCESSING',
-                meta={'status': 'Saving to database...', 'progress': 80}
-            )
+            report_progress(self, 'Saving to database...', 90)
             
-            # Save to database
-            content = Content(
-                id=uuid.uuid4(),
-                user_id=user.id,
-                topic=result['topic'],
-                platform=result['platform'],
-                product_info=product_info,
-                final_content=result['final_content'],
-                original_draft=result['original_draft'],
-                quality_score=result['quality_score'],
-                critique_notes=result['critique_notes'],
-                status="draft",
-                created_at=datetime.utcnow()
-            )
+            # Save to database (one INSERT ... RETURNING and one commit)
+            content_id = insert_contents(db, [content_row(result, product_info, user_id)])[0]
             
-            db.add(content)
-            db.commit()
-            db.refresh(content)
+            publish_progress(self.request.id, 'completed', 100, content_id=str(content_id))
             
-            # Return success
+            # Return a reference only: the result backend keeps it for RESULT_EXPIRES_SECONDS,
+            # and the content itself is read from the database
             return {
-                'id': str(content.id),
-                'topic': content.topic,
-                'platform': content.platform,
-                'final_content': content.final_content,
-                'quality_score': content.quality_score,
-                'critique_notes': content.critique_notes,
-                'status': 'completed',
-                'progress': 100
+                'id': str(content_id),
+                'platform': result['platform'],
+                'quality_score': result['quality_score'],
+                'status': 'completed'
             }
             
         finally:
@@ -119,14 +112,18 @@ def generate_content_task(self, topic: str, platform: str, product_info: str, us
             state='FAILURE',
             meta={'status': f'Error: {str(e)}', 'progress': 0}
         )
+        publish_progress(self.request.id, 'failed', 0, f'Error: {str(e)}')
         raise
 
 
-@celery_app.task(bind=True, name='generate_multiple_variations')
-def generate_multiple_variations_task(self, topic: str, platform: str, product_info: str, num_variations: int = 3, user_email: str = "default@trendforgeai.com"):
+@celery_app.task(bind=True, base=ProgressTask, name='generate_multiple_variations')
+def generate_multiple_variations_task(self, topic: str, platform: str, product_info: str, num_variations: int = 3, user_email: str = DEFAULT_USER_EMAIL):
     """
     Generate multiple content variations
     
+    The variations run in parallel across the worker pool (a one-topic, one-platform
+    campaign), so this task only retrieves the style examples and dispatches the chord.
+    
     Args:
         topic: Content topic
         platform: Platform
@@ -135,25 +132,162 @@ def generate_multiple_variations_task(self, topic: str, platform: str, product_i
         user_email: User email
         
     Returns:
-        list: List of generated content IDs
+        dict: content_ids of the generated variations, with completed/failed counts and errors
+    """
+    return fan_out(self, [topic], [platform], product_info, num_variations, user_email, PRIORITY_NORMAL)
+
+
+# --- Fan-out: variations and campaigns run as a chord of item tasks ---
+
+def start_campaign(campaign_id: str, total: int):
+    key = CAMPAIGN_KEY.format(campaign_id)
+    client = get_redis()
+    client.hset(key, mapping={'total': total, 'completed': 0, 'failed': 0})
+    client.expire(key, CAMPAIGN_TTL_SECONDS)
+
+def record_campaign_item(campaign_id: str, succeeded: bool):
+    """Counts a finished item and publishes the campaign's aggregated progress"""
+    key = CAMPAIGN_KEY.format(campaign_id)
+    pipe = get_redis().pipeline()
+    pipe.hincrby(key, 'completed' if succeeded else 'failed', 1)
+    pipe.hgetall(key)
+    counts = {field: int(value) for field, value in pipe.execute()[1].items()}
+    done = counts['completed'] + counts['failed']
+    publish_progress(
+        campaign_id, 'processing', int(done / counts['total'] * 100) if counts.get('total') else 0,
+        f"{done}/{counts.get('total', 0)} item(s) done", **counts
+    )
+
+def stage_campaign_row(campaign_id: str, row: dict):
+    """Stages a row with its content ID, so a retried finish_campaign_task writes it only once"""
+    key = CAMPAIGN_ROWS_KEY.format(campaign_id)
+    pipe = get_redis().pipeline()
+    pipe.rpush(key, json.dumps(dict(row, id=str(uuid.uuid4()))))
+    pipe.expire(key, CAMPAIGN_TTL_SECONDS)
+    pipe.execute()
+
+def get_campaign_progress(campaign_id: str):
+    """
+    Returns:
+        dict: total, completed and failed item counts, or None for an unknown campaign
+    """
+    progress = get_redis().hgetall(CAMPAIGN_KEY.format(campaign_id))
+    return {field: int(value) for field, value in progress.items()} if progress else None
+
+def fan_out(task, topics: list, platforms: list, product_info: str, num_variations: int, user_email: str, priority: int):
     """
-    content_ids = []
+    Replaces `task` with a chord of one generate_campaign_item_task per topic x platform x
+    variation, after retrieving the style examples once for all of them. The chord callback
+    inherits the task's ID, so the job ID resolves to the aggregated result. If the chord
+    fails (e.g. an item killed at the hard time limit), campaign_failed_task publishes it.
     
-    for i in range(num_variations):
-        # Update progress
-        progress = int((i / num_variations) * 100)
-        self.update_state(
-            state='PROCESSING',
-            meta={'status': f'Generating variation {i+1}/{num_variations}...', 'progress': progress}
+    Items are queued at `priority`, so variations for a waiting user overtake campaign items.
+    """
+    items = [(topic, platform) for topic in topics for platform in platforms for _ in range(num_variations)]
+    start_campaign(task.request.id, len(items))
+    report_progress(task, f'Retrieving style examples for {len(items)} item(s)...', 0)
+    
+    style_examples = get_engine().campaign_style_examples(topics, platforms, product_info)
+    
+    header = group(
+        generate_campaign_item_task.s(
+            task.request.id, topic, platform, product_info, style_examples[platform][topic], user_email
+        ).set(priority=priority)
+        for topic, platform in items
+    )
+    callback = finish_campaign_task.s(task.request.id, user_email).on_error(campaign_failed_task.s(task.request.id))
+    return task.replace(chord(header, callback))
+
+@celery_app.task(bind=True, base=ProgressTask, name='generate_campaign')
+def generate_campaign_task(self, topics: list, platforms: list, product_info: str, num_variations: int = 1, user_email: str = DEFAULT_USER_EMAIL):
+    """
+    Generates a whole campaign: every topic x platform pair, num_variations times
+    
+    Style examples are retrieved once for the campaign (one batched embedding request, one
+    scan of each platform's examples), then the items fan out as a chord.
+    
+    Returns:
+        dict: Result of finish_campaign_task
+    """
+    return fan_out(self, topics, platforms, product_info, num_variations, user_email, PRIORITY_LOW)
+
+@celery_app.task(bind=True, name='generate_campaign_item')
+def generate_campaign_item_task(self, campaign_id: str, topic: str, platform: str, product_info: str, style_examples: str, user_email: str = DEFAULT_USER_EMAIL):
+    """
+    One campaign item. The generated row is staged in Redis and written with the rest of the
+    campaign by finish_campaign_task. Errors are returned rather than raised, so one failed
+    item does not cancel the chord callback for the rest of the campaign.
+    """
+    try:
+        result = get_engine().run_pipeline(
+            topic=topic,
+            platform=platform,
+            product_info=product_info,
+            style_examples=style_examples
         )
+        if not result:
+            raise Exception("Content generation failed - no result returned")
         
-        # Generate content
-        result = generate_content_task(topic, platform, product_info, user_email)
-        content_ids.append(result['id'])
+        stage_campaign_row(campaign_id, content_row(result, product_info))
+    except Exception as e:
+        record_campaign_item(campaign_id, succeeded=False)
+        return {'topic': topic, 'platform': platform, 'status': 'failed', 'error': str(e)}
     
+    record_campaign_item(campaign_id, succeeded=True)
     return {
-        'content_ids': content_ids,
-        'total': num_variations,
-        'status': 'completed',
+        'topic': topic,
+        'platform': platform,
+        'quality_score': result['quality_score'],
+        'status': 'completed'
+    }
+
+@celery_app.task(name='campaign_failed')
+def campaign_failed_task(request, exc, traceback, campaign_id: str):
+    """Error callback of the campaign chord: the callback never runs, so the failure is published here"""
+    publish_progress(campaign_id, 'failed', 0, f'Error: {str(exc)}')
+
+@celery_app.task(bind=True, base=ProgressTask, name='finish_campaign', autoretry_for=(OperationalError,), retry_backoff=True, max_retries=5)
+def finish_campaign_task(self, results: list, campaign_id: str, user_email: str = DEFAULT_USER_EMAIL):
+    """
+    Chord callback: writes the staged rows of all campaign items in one transaction and
+    collects the content IDs and errors. Retried if the database is unreachable; the staged
+    rows are only dropped after the commit, and carry their IDs, so a retry after a commit
+    that did go through (e.g. the connection dropped on the acknowledgement) skips them.
+    """
+    rows_key = CAMPAIGN_ROWS_KEY.format(campaign_id)
+    rows = [json.loads(row) for row in get_redis().lrange(rows_key, 0, -1)]
+    
+    db = SessionLocal()
+    try:
+        user_id = resolve_user_id_sync(db, user_email)
+        for row in rows:
+            row['id'] = uuid.UUID(row['id']) if 'id' in row else uuid.uuid4()  # Staged before IDs were
+            row['user_id'] = user_id
+        content_ids = insert_contents(db, rows, idempotent=True)
+    finally:
+        db.close()
+    get_redis().delete(rows_key)
+    
+    completed = [r for r in results if r.get('status') == 'completed']
+    failed = [r for r in results if r.get('status') != 'completed']
+    if not failed:
+        status = 'completed'
+    else:
+        status = 'partial' if completed else 'failed'
+    
+    summary = {
+        'campaign_id': campaign_id,
+        'status': status,
+        'total': len(results),
+        'completed': len(completed),
+        'failed': len(failed),
+        'content_ids': [str(content_id) for content_id in content_ids],
+        'errors': [f"{r['platform']} / {r['topic']}: {r.get('error')}" for r in failed],
         'progress': 100
     }
+    publish_progress(
+        campaign_id, status, 100,
+        total=summary['total'], completed=summary['completed'], failed=summary['failed'],
+        content_ids=summary['content_ids'], errors=summary['errors']
+    )
+    return summary
@@ -0,0 +1,176 @@
+"""
+Scheduled extraction tasks
+
+Celery beat runs every extractor and the data curator on the intervals from settings
+(SCHEDULE_*_MINUTES). Each run takes a per-source slot in Redis, so at most
+EXTRACTION_MAX_CONCURRENCY runs of a source overlap (by default a run is skipped while the
+previous one is still going), and every run is recorded in the extraction_runs table.
+
+Start the scheduler next to a worker for the maintenance queue:
+    python -m api.worker maintenance
+    celery -A api.celery_app beat --loglevel=info
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import sys
+import os
+import time
+import uuid
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from api.celery_app import celery_app
+from api.config import settings
+from api.database import SessionLocal
+from api.models.models import ExtractionRun
+from api.utils.redis_client import get_redis
+
+CURATOR = "curator"
+
+# Source -> minutes between runs
+SCHEDULE_MINUTES = {
+    "google_trends": settings.SCHEDULE_GOOGLE_TRENDS_MINUTES,
+    "twitter": settings.SCHEDULE_TWITTER_MINUTES,
+    "youtube": settings.SCHEDULE_YOUTUBE_MINUTES,
+    "linkedin": settings.SCHEDULE_LINKEDIN_MINUTES,
+    CURATOR: settings.SCHEDULE_CURATOR_MINUTES,
+}
+
+@contextmanager
+def source_slot(source: str, limit: int = settings.EXTRACTION_MAX_CONCURRENCY):
+    """
+    Counting semaphore in Redis shared by all workers.
+
+    Each run holds its own token in a sorted set, scored with the time the token expires
+    (the task time limit). A run hard-killed at time_limit skips the release, but its token
+    still expires on its own; later runs never extend it.
+
+    Yields:
+        bool: True if a slot was free, False if `limit` runs of the source are already going
+    """
+    key = f"trendforge:slots:{source}"
+    token = uuid.uuid4().hex
+    ttl = settings.EXTRACTION_TIME_LIMIT_SECONDS + 60
+    client = get_redis()
+    now = time.time()
+    pipe = client.pipeline()
+    pipe.zremrangebyscore(key, "-inf", now)
+    pipe.zadd(key, {token: now + ttl})
+    pipe.zcard(key)
+    pipe.expire(key, ttl)
+    _, _, count, _ = pipe.execute()
+    acquired = count <= limit
+    if not acquired:
+        client.zrem(key, token)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            client.zrem(key, token)
+
+def start_run(source: str, task_id: str, status: str = "running") -> uuid.UUID:
+    db = SessionLocal()
+    try:
+        run = ExtractionRun(id=uuid.uuid4(), source=source, status=status, task_id=task_id, started_at=datetime.utcnow())
+        if status != "running":
+            run.finished_at = run.started_at
+            run.duration_seconds = 0.0
+        db.add(run)
+        db.commit()
+        return run.id
+    finally:
+        db.close()
+
+def finish_run(run_id: uuid.UUID, status: str, duration: float, rows: dict = None, error: str = None):
+    db = SessionLocal()
+    try:
+        run = db.query(ExtractionRun).filter(ExtractionRun.id == run_id).first()
+        if run:
+            run.status = status
+            run.finished_at = datetime.utcnow()
+            run.duration_seconds = round(duration, 2)
+            run.rows = rows or {}
+            run.row_count = sum((rows or {}).values())
+            run.error = error
+            db.commit()
+    finally:
+        db.close()
+
+def run_tracked(task, source: str, func):
+    """Runs func() in a source slot and records the run. func returns {output: rows written}."""
+    with source_slot(source) as acquired:
+        if not acquired:
+            print(f"[scheduler] {source}: previous run still in progress, skipping")
+            start_run(source, task.request.id, status="skipped")
+            return {"source": source, "status": "skipped"}
+
+        run_id = start_run(source, task.request.id)
+        started = time.perf_counter()
+        try:
+            rows = func()
+        except BaseException as e:
+            # Extractors may still call exit() on fatal errors
+            finish_run(run_id, "failed", time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+            if isinstance(e, Exception):
+                raise
+            return {"source": source, "status": "failed"}
+
+        duration = time.perf_counter() - started
+        finish_run(run_id, "success", duration, rows)
+        return {"source": source, "status": "success", "rows": rows, "duration_seconds": round(duration, 2)}
+
+# ignore_result: every run is recorded in extraction_runs, nothing reads the result backend
+@celery_app.task(bind=True, name='run_extractor', time_limit=settings.EXTRACTION_TIME_LIMIT_SECONDS,
+                 soft_time_limit=settings.EXTRACTION_TIME_LIMIT_SECONDS - 60, ignore_result=True)
+def run_extractor_task(self, source: str):
+    """
+    Runs one registered extractor (see src.extractors.base.EXTRACTOR_MODULES)
+
+    Args:
+        source: Extractor name, e.g. "twitter"
+
+    Returns:
+        dict: Status, rows written per output and duration
+    """
+    from src.extractors.base import get_extractor
+
+    def extract():
+        return get_extractor(source)().run()["rows"]
+
+    return run_tracked(self, source, extract)
+
+@celery_app.task(bind=True, name='run_curator', time_limit=settings.EXTRACTION_TIME_LIMIT_SECONDS,
+                 soft_time_limit=settings.EXTRACTION_TIME_LIMIT_SECONDS - 60, ignore_result=True)
+def run_curator_task(self):
+    """Rebuilds top_performing_examples.json from the latest extractor outputs"""
+    from src.engine.data_curator import run_curation
+
+    def curate():
+        data = run_curation(stream=True)
+        return {key: len(values) for key, values in data.items()}
+
+    return run_tracked(self, CURATOR, curate)
+
+def build_beat_schedule() -> dict:
+    """Celery beat entries for every source with a non-zero interval"""
+    schedule = {}
+    for source, minutes in SCHEDULE_MINUTES.items():
+        if minutes <= 0:
+            continue
+        if source == CURATOR:
+            schedule["curate-examples"] = {
+                "task": "run_curator",
+                "schedule": timedelta(minutes=minutes),
+                "options": {"expires": minutes * 60},
+            }
+        else:
+            schedule[f"extract-{source}"] = {
+                "task": "run_extractor",
+                "schedule": timedelta(minutes=minutes),
+                "args": (source,),
+                # A backlog of missed runs is pointless: drop runs that waited longer than an interval
+                "options": {"expires": minutes * 60},
+            }
+    return schedule
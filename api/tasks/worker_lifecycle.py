@@ -0,0 +1,40 @@
+"""
+Celery worker lifecycle hooks
+
+worker_init runs once in the parent process before the prefork pool starts: it builds the
+style example index there, so every child shares the same matrices copy-on-write instead of
+parsing its own copy of the dataset.
+
+worker_process_init runs in each child right after the fork: network clients (the Gemini
+client, the SQLAlchemy pool, Redis) must not be shared across processes, so they are reset
+and recreated per child, and the content engine is warmed up before the first task arrives.
+"""
+
+import gc
+import time
+
+from celery.signals import worker_init, worker_process_init
+
+@worker_init.connect
+def load_shared_index(**kwargs):
+    from src.engine.content_engine import build_example_indexes
+
+    started = time.perf_counter()
+    indexes = build_example_indexes()
+    rows = sum(len(index[0]) for index in indexes.values() if index)
+    # Move everything loaded so far out of the GC's reach: collections in the children would
+    # otherwise write to these objects' headers and copy the shared pages
+    gc.collect()
+    gc.freeze()
+    print(f"[worker] Style example index ready: {rows} examples in {time.perf_counter() - started:.2f}s")
+
+@worker_process_init.connect
+def init_child_process(**kwargs):
+    from api.database import engine as db_engine
+    from api.tasks.content_tasks import get_engine
+    from api.utils.redis_client import reset_redis
+
+    # Keep the parent's pooled connections open for the parent, open new ones in this child
+    db_engine.dispose(close=False)
+    reset_redis()
+    get_engine()
@@ -0,0 +1,63 @@
+"""
+Batched writes of generated content
+
+Generated items are collected as plain row dicts and written with a single
+INSERT ... RETURNING per batch (SQLAlchemy sends all rows in one statement) and one commit,
+instead of add/commit/refresh per item. IDs and created_at come from the database defaults.
+"""
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.models import Content
+
+def content_row(result: dict, product_info: str, user_id=None) -> dict:
+    """Row for one run_pipeline() result, saved as a draft (user_id may be filled in later)"""
+    return {
+        'user_id': user_id,
+        'topic': result['topic'],
+        'platform': result['platform'],
+        'product_info': product_info,
+        'final_content': result['final_content'],
+        'original_draft': result['original_draft'],
+        'quality_score': result['quality_score'],
+        'critique_notes': result['critique_notes'],
+        'status': "draft",
+    }
+
+def insert_contents(db: Session, rows: list, idempotent: bool = False) -> list:
+    """
+    Writes the rows in one statement and one transaction (sync session)
+
+    Args:
+        idempotent: The rows carry their own 'id'; rows whose ID already exists (written by an
+            earlier attempt of a retried task) are skipped with ON CONFLICT DO NOTHING
+
+    Returns:
+        list: The new content IDs, in row order
+    """
+    if not rows:
+        return []
+    if idempotent:
+        db.execute(pg_insert(Content).on_conflict_do_nothing(index_elements=[Content.id]), rows)
+        db.commit()
+        return [row['id'] for row in rows]
+    ids = db.scalars(insert(Content).returning(Content.id, sort_by_parameter_order=True), rows).all()
+    db.commit()
+    return ids
+
+async def insert_contents_async(db: AsyncSession, rows: list) -> list:
+    """
+    Writes the rows in one statement and one transaction (async session)
+
+    Returns:
+        list: The new Content objects, in row order
+    """
+    if not rows:
+        return []
+    result = await db.scalars(insert(Content).returning(Content, sort_by_parameter_order=True), rows)
+    contents = result.all()
+    await db.commit()
+    return contents
@@ -0,0 +1,43 @@
+"""
+Bounded thread pool for blocking content engine work
+
+ContentEngine.run_pipeline makes several blocking LLM/HTTP calls. Running it directly in an
+async route would stall the event loop for every client, so routes await run_pipeline()
+instead, which executes on at most ENGINE_MAX_WORKERS threads.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from ..config import settings
+from .monitoring import StageTimer
+
+engine_executor = ThreadPoolExecutor(max_workers=settings.ENGINE_MAX_WORKERS, thread_name_prefix="content-engine")
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """One ContentEngine per process, created on first use (it loads the curated examples)"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from src.engine.content_engine import ContentEngine
+            _engine = ContentEngine()
+        return _engine
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs func(*args, **kwargs) on the engine pool and awaits the result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(engine_executor, partial(func, *args, **kwargs))
+
+async def run_pipeline(topic: str, platform: str, product_info: str):
+    """Awaitable ContentEngine.run_pipeline (stage durations go to the /metrics histograms)"""
+    engine = await run_blocking(get_engine)
+    timer = StageTimer()
+    try:
+        return await run_blocking(engine.run_pipeline, topic=topic, platform=platform, product_info=product_info, on_stage=timer)
+    finally:
+        timer.finish()
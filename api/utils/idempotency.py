@@ -0,0 +1,141 @@
+"""
+Idempotent job dispatch
+
+A generation request is identified by a fingerprint: the client's Idempotency-Key header
+if sent, otherwise a hash of the normalized request fields. The first request registers its
+job ID under the fingerprint for IDEMPOTENCY_WINDOW_SECONDS; identical requests in that
+window (double-clicks, client retries, refreshes) get the same job ID instead of enqueuing
+another LLM pipeline. A registered job that failed does not block a retry.
+
+The registry lives in Redis so every API process sees it. If Redis is unreachable, an
+in-process registry stands in, which still catches duplicates sent to the same process.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+import redis
+from celery.result import AsyncResult
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import settings
+from .progress import get_async_redis
+
+INFLIGHT_KEY = "trendforge:inflight:{}"
+
+def request_fingerprint(kind: str, idempotency_key: str = None, **fields) -> str:
+    """
+    Args:
+        kind: Request type, e.g. "generate" (the same fields mean different jobs per kind)
+        idempotency_key: Client-supplied key; used instead of the fields when present
+        fields: Request fields; strings are compared case- and whitespace-insensitively
+    """
+    if idempotency_key:
+        payload = {"kind": kind, "key": idempotency_key}
+    else:
+        normalized = {
+            name: " ".join(value.split()).lower() if isinstance(value, str) else value
+            for name, value in fields.items()
+        }
+        payload = {"kind": kind, **normalized}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+class LocalRegistry:
+    """In-process stand-in for the Redis registry"""
+
+    def __init__(self):
+        self._jobs = {}  # fingerprint -> (job_id, expires_at)
+        self._lock = threading.Lock()
+
+    def claim(self, fingerprint: str, job_id: str, window: int):
+        with self._lock:
+            entry = self._jobs.get(fingerprint)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            self._jobs[fingerprint] = (job_id, time.monotonic() + window)
+            return None
+
+    def replace(self, fingerprint: str, job_id: str, window: int):
+        with self._lock:
+            self._jobs[fingerprint] = (job_id, time.monotonic() + window)
+
+    def release(self, fingerprint: str, job_id: str):
+        with self._lock:
+            if self._jobs.get(fingerprint, (None,))[0] == job_id:
+                del self._jobs[fingerprint]
+
+local_registry = LocalRegistry()
+
+async def claim_job(fingerprint: str, job_id: str, window: int = None):
+    """
+    Registers job_id for the fingerprint unless another job holds it.
+
+    Returns:
+        str: The job already registered, or None if job_id was registered
+    """
+    window = window or settings.IDEMPOTENCY_WINDOW_SECONDS
+    try:
+        client = get_async_redis()
+        key = INFLIGHT_KEY.format(fingerprint)
+        if await client.set(key, job_id, nx=True, ex=window):
+            return None
+        existing = await client.get(key)
+        if existing is None:
+            # Expired between SET and GET
+            return await claim_job(fingerprint, job_id, window)
+        return existing
+    except redis.RedisError as e:
+        print(f"Idempotency registry unavailable, using the local registry: {e}")
+        return local_registry.claim(fingerprint, job_id, window)
+
+async def replace_job(fingerprint: str, job_id: str, window: int = None):
+    window = window or settings.IDEMPOTENCY_WINDOW_SECONDS
+    try:
+        await get_async_redis().set(INFLIGHT_KEY.format(fingerprint), job_id, ex=window)
+    except redis.RedisError:
+        local_registry.replace(fingerprint, job_id, window)
+
+async def release_job(fingerprint: str, job_id: str):
+    """Forgets the fingerprint if job_id still holds it (e.g. the job could not be enqueued)"""
+    try:
+        client = get_async_redis()
+        key = INFLIGHT_KEY.format(fingerprint)
+        if await client.get(key) == job_id:
+            await client.delete(key)
+    except redis.RedisError:
+        pass
+    local_registry.release(fingerprint, job_id)
+
+async def dispatch_once(fingerprint: str, send):
+    """
+    Enqueues a job unless an identical one is registered.
+
+    Args:
+        fingerprint: See request_fingerprint()
+        send: Callable(task_id) that enqueues the job with that task ID (run in a thread)
+
+    Returns:
+        tuple: (job_id, deduplicated)
+    """
+    from ..celery_app import celery_app
+
+    job_id = str(uuid.uuid4())
+    existing = await claim_job(fingerprint, job_id)
+    if existing:
+        try:
+            state = await run_in_threadpool(lambda: AsyncResult(existing, app=celery_app).state)
+        except Exception:
+            state = None  # Backend unreachable: assume the registered job is still valid
+        if state != 'FAILURE':
+            return existing, True
+        await replace_job(fingerprint, job_id)
+
+    try:
+        await run_in_threadpool(send, job_id)
+    except Exception:
+        await release_job(fingerprint, job_id)
+        raise
+    return job_id, False
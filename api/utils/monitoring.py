@@ -0,0 +1,158 @@
+"""
+Prometheus metrics for the API
+
+MetricsMiddleware records, per route template: request counts by status, a latency histogram
+and in-flight requests (and runs the opt-in profiler, see profiler.py). Collectors read the
+SQLAlchemy pool usage and the Celery queue lengths in Redis at scrape time, and content engine
+stages run from the API are timed. Everything is served in Prometheus text format at /metrics.
+"""
+
+import random
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from starlette.routing import Match
+
+from ..config import settings
+from .profiler import PROFILE_DIR, start_sampler, write_profile
+
+REQUESTS = Counter(
+    "trendforge_http_requests_total", "HTTP requests by route and status",
+    ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "trendforge_http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "trendforge_http_requests_in_progress", "HTTP requests being served",
+    ["method", "route"]
+)
+PROFILES_WRITTEN = Counter(
+    "trendforge_profiles_written_total", "Slow-request profiles written to data/profiles/"
+)
+ENGINE_STAGE_SECONDS = Histogram(
+    "trendforge_content_engine_stage_seconds", "Duration of content engine stages run by the API",
+    ["stage"],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+)
+
+def route_label(scope) -> str:
+    """Route template (e.g. /api/v1/content/{content_id}), so labels stay bounded"""
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed responses (SSE) pass through untouched"""
+
+    def __init__(self, app):
+        self.app = app
+        if settings.PROFILER_ENABLED:
+            print(f"[metrics] Profiling {settings.PROFILER_SAMPLE_RATE:.0%} of requests, "
+                  f"those over {settings.PROFILER_SLOW_REQUEST_MS}ms are written to {PROFILE_DIR}")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        route = route_label(scope)
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        sampler = None
+        if settings.PROFILER_ENABLED and route != "/metrics" and random.random() < settings.PROFILER_SAMPLE_RATE:
+            sampler = start_sampler(settings.PROFILER_INTERVAL_MS)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - started
+            in_progress.dec()
+            REQUEST_LATENCY.labels(method, route).observe(seconds)
+            REQUESTS.labels(method, route, str(status["code"])).inc()
+            if sampler is not None:
+                stacks = sampler.stop()
+                if seconds * 1000 >= settings.PROFILER_SLOW_REQUEST_MS:
+                    await run_in_threadpool(write_profile, stacks, method, scope["path"], seconds)
+                    PROFILES_WRITTEN.inc()
+
+class StageTimer:
+    """on_stage callback for ContentEngine.run_pipeline that times each stage"""
+
+    def __init__(self):
+        self.stage = None
+        self.started = None
+
+    def __call__(self, message, progress=None):
+        now = time.perf_counter()
+        if self.stage is not None:
+            ENGINE_STAGE_SECONDS.labels(self.stage).observe(now - self.started)
+        self.stage = message.rstrip(".") if message else None
+        self.started = now
+
+    def finish(self):
+        self(None)
+
+class DatabasePoolCollector:
+    def describe(self):
+        # Without describe(), registering would call collect() at import time
+        return []
+
+    def collect(self):
+        from ..database import async_engine, engine
+
+        family = GaugeMetricFamily(
+            "trendforge_db_pool_connections", "SQLAlchemy connection pool usage",
+            labels=["engine", "state"]
+        )
+        for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+            family.add_metric([name, "size"], pool.size())
+            family.add_metric([name, "checked_out"], pool.checkedout())
+            family.add_metric([name, "checked_in"], pool.checkedin())
+            family.add_metric([name, "overflow"], pool.overflow())
+        yield family
+
+class CeleryQueueCollector:
+    # Kombu's Redis transport keeps one list per priority step: "<queue>" and "<queue>\x06\x16<step>"
+    PRIORITY_SEPARATOR = "\x06\x16"
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from ..celery_app import BULK_QUEUE, INTERACTIVE_QUEUE, MAINTENANCE_QUEUE, celery_app
+        from .redis_client import get_redis
+
+        family = GaugeMetricFamily("trendforge_celery_queue_length", "Tasks waiting per Celery queue", labels=["queue"])
+        steps = celery_app.conf.broker_transport_options.get("priority_steps", [0])
+        try:
+            pipe = get_redis().pipeline()
+            queues = (INTERACTIVE_QUEUE, BULK_QUEUE, MAINTENANCE_QUEUE)
+            for queue in queues:
+                for step in steps:
+                    pipe.llen(queue if not step else f"{queue}{self.PRIORITY_SEPARATOR}{step}")
+            lengths = pipe.execute()
+        except Exception as e:
+            print(f"[metrics] Could not read Celery queue lengths: {e}")
+            return
+        for i, queue in enumerate(queues):
+            family.add_metric([queue], sum(lengths[i * len(steps):(i + 1) * len(steps)]))
+        yield family
+
+REGISTRY.register(DatabasePoolCollector())
+REGISTRY.register(CeleryQueueCollector())
@@ -0,0 +1,56 @@
+"""
+Keyset pagination helpers
+
+History pages are addressed by an opaque cursor that encodes the (created_at, id) of the last
+row of the previous page, so the next page is a range scan on the content index instead of an
+OFFSET that reads and discards every earlier row. Totals are cached for a few seconds, because
+an exact COUNT(*) still has to visit every matching row.
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from uuid import UUID
+
+from ..config import settings
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    payload = json.dumps({"t": created_at.isoformat(), "id": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """
+    Returns:
+        tuple: (created_at, id) of the last row already returned
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), UUID(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+_counts = {}  # key -> (total, expires_at)
+_counts_lock = threading.Lock()
+
+def cached_count(key):
+    with _counts_lock:
+        entry = _counts.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+def cache_count(key, total: int):
+    with _counts_lock:
+        _counts[key] = (total, time.monotonic() + settings.HISTORY_COUNT_TTL_SECONDS)
+
+def invalidate_counts(user_id: UUID):
+    """Drops the cached totals of a user after content is added or removed"""
+    with _counts_lock:
+        for key in [key for key in _counts if key[0] == user_id]:
+            del _counts[key]
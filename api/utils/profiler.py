@@ -0,0 +1,74 @@
+"""
+Opt-in sampling profiler for slow requests
+
+When PROFILER_ENABLED is set, a PROFILER_SAMPLE_RATE fraction of requests is sampled: a
+background thread records the stacks of every thread in the process every
+PROFILER_INTERVAL_MS, each rooted at its thread name. The slow work of a request mostly runs
+off the event loop (run_pipeline in engine_executor, blocking calls in the threadpool), so
+sampling only the loop thread would show it waiting in select. Requests slower than
+PROFILER_SLOW_REQUEST_MS are written to data/profiles/ as collapsed stacks
+("thread;frame;frame count" lines), the input format of flamegraph.pl and speedscope.
+Threads are shared, so a profile can include frames of requests that ran concurrently.
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+# api/utils/ -> ../../data/profiles
+PROFILE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "profiles"))
+
+SAMPLER_THREAD_NAME = "request-profiler"
+
+class StackSampler:
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=SAMPLER_THREAD_NAME, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                thread_name = thread_names.get(thread_id, str(thread_id))
+                # Skip the samplers of this and of concurrently profiled requests
+                if thread_name == SAMPLER_THREAD_NAME:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                names.append(thread_name)
+                self.stacks[";".join(reversed(names))] += 1
+
+def write_profile(stacks: Counter, method: str, path: str, seconds: float, profile_dir: str = PROFILE_DIR) -> str:
+    """
+    Returns:
+        str: Path of the collapsed-stack file
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    safe_path = re.sub(r"[^A-Za-z0-9_.-]+", "_", path).strip("_") or "root"
+    filename = f"{datetime.now():%Y%m%d-%H%M%S}_{method}_{safe_path}_{int(seconds * 1000)}ms.folded"
+    out_path = os.path.join(profile_dir, filename)
+    with open(out_path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return out_path
+
+def start_sampler(interval_ms: int) -> StackSampler:
+    """Samples every thread of the process until stop()"""
+    return StackSampler(interval_ms / 1000).start()
@@ -0,0 +1,93 @@
+"""
+Job progress events over Redis pub/sub
+
+Tasks publish each progress step to trendforge:progress:<job_id> and keep the latest event
+as a snapshot. The API subscribes once per connected client (SSE or WebSocket), sends the
+snapshot as catch-up, then forwards events as they arrive, instead of clients polling
+/content/jobs/{job_id} against the result backend.
+"""
+
+import json
+
+import redis
+import redis.asyncio as aioredis
+
+from .redis_client import get_redis
+
+PROGRESS_CHANNEL = "trendforge:progress:{}"
+PROGRESS_SNAPSHOT_KEY = "trendforge:progress:{}:last"
+PROGRESS_TTL_SECONDS = 24 * 3600
+HEARTBEAT_SECONDS = 15
+
+TERMINAL_STATUSES = {"completed", "partial", "failed"}
+
+def publish_progress(job_id: str, status: str, progress: int, message: str = None, **extra) -> dict:
+    """
+    Publishes a progress event and stores it as the job's snapshot (called from tasks)
+
+    Returns:
+        dict: The event
+    """
+    event = {"job_id": job_id, "status": status, "progress": progress, "message": message, **extra}
+    if not job_id:
+        return event
+    payload = json.dumps(event, default=str)
+    try:
+        pipe = get_redis().pipeline()
+        pipe.set(PROGRESS_SNAPSHOT_KEY.format(job_id), payload, ex=PROGRESS_TTL_SECONDS)
+        pipe.publish(PROGRESS_CHANNEL.format(job_id), payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        # Progress is best effort: never fail a generation because of it
+        print(f"Progress publish failed for {job_id}: {e}")
+    return event
+
+_async_redis = None
+
+def get_async_redis():
+    global _async_redis
+    if _async_redis is None:
+        from ..celery_app import celery_app
+        _async_redis = aioredis.Redis.from_url(celery_app.conf.broker_url, decode_responses=True)
+    return _async_redis
+
+async def progress_events(job_id: str, backend_event=None):
+    """
+    Yields the job's latest event, then each published event until the job finishes.
+
+    Yields None every HEARTBEAT_SECONDS without events, so callers can keep the connection alive.
+
+    Args:
+        backend_event: Async callable returning the job's event from the result backend. Used
+            when no snapshot is stored (e.g. a job queued before it published anything, or an
+            expired snapshot), and on each heartbeat, so a job that failed without publishing
+            (killed at the time limit, revoked) still ends the stream
+    """
+    client = get_async_redis()
+    pubsub = client.pubsub()
+    # Subscribe before reading the snapshot, so no event is lost in between
+    await pubsub.subscribe(PROGRESS_CHANNEL.format(job_id))
+    try:
+        raw = await client.get(PROGRESS_SNAPSHOT_KEY.format(job_id))
+        event = json.loads(raw) if raw else (await backend_event() if backend_event else None)
+        if event:
+            yield event
+            if event["status"] in TERMINAL_STATUSES:
+                return
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=HEARTBEAT_SECONDS)
+            if message is None:
+                event = await backend_event() if backend_event else None
+                if event and event["status"] in TERMINAL_STATUSES:
+                    yield event
+                    return
+                yield None
+                continue
+            event = json.loads(message["data"])
+            yield event
+            if event["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
@@ -0,0 +1,22 @@
+"""
+Shared Redis client for coordination state (run slots, campaign progress)
+
+Uses the Celery broker's Redis. The client is created lazily, so importing a task module
+does not open a connection, and redis-py pools connections per process.
+"""
+
+import redis
+
+_redis = None
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        from ..celery_app import celery_app
+        _redis = redis.Redis.from_url(celery_app.conf.broker_url, decode_responses=True)
+    return _redis
+
+def reset_redis():
+    """Drops the client; a forked child must not reuse the parent's connections"""
+    global _redis
+    _redis = None
@@ -1,7 +1,32 @@
-import requests
+"""
+Slack webhook notifications
+
+send_slack_notification / send_slack_report post synchronously (for endpoints that report
+the outcome; call them from a thread). Per-item notifications from request handlers go
+through slack_dispatcher instead: notify() only enqueues, and a background asyncio task
+coalesces everything queued within SLACK_DIGEST_WINDOW_SECONDS into one digest message,
+posted with a pooled HTTP client, a timeout and retries that honour Slack's rate limits.
+"""
+
+import asyncio
 import json
+import time
+from collections import defaultdict
+
+import httpx
+import requests
+
 from ..config import settings
 
+SLACK_TIMEOUT_SECONDS = 5
+SLACK_MIN_INTERVAL_SECONDS = 1.0  # Incoming webhooks allow about one message per second
+SLACK_QUEUE_SIZE = 1000
+DIGEST_MAX_LINES = 20
+_STOP = object()  # Queued by SlackDispatcher.stop() behind the pending messages
+
+# Pooled connections for the synchronous helpers
+_session = requests.Session()
+
 def send_slack_notification(message: str, username: str = "TrendForgeAI Bot", icon_emoji: str = ":robot_face:"):
     """
     Sends a simple message to Slack.
@@ -17,7 +42,7 @@ def send_slack_notification(message: str, username: str = "TrendForgeAI Bot", ic
     }
 
     try:
-        response = requests.post(settings.SLACK_WEBHOOK_URL, data=json.dumps(payload), headers=headers)
+        response = _session.post(settings.SLACK_WEBHOOK_URL, data=json.dumps(payload), headers=headers, timeout=SLACK_TIMEOUT_SECONDS)
         response.raise_for_status()
         return True
     except Exception as e:
@@ -87,9 +112,121 @@ def send_slack_report(title: str, report_data: dict):
     payload = {"blocks": blocks, "username": "TrendForgeAI Intelligence"}
 
     try:
-        response = requests.post(settings.SLACK_WEBHOOK_URL, json=payload)
+        response = _session.post(settings.SLACK_WEBHOOK_URL, json=payload, timeout=SLACK_TIMEOUT_SECONDS)
         response.raise_for_status()
         return True
     except Exception as e:
         print(f"Failed to send Slack report: {e}")
         return False
+
+class SlackDispatcher:
+    """Background, coalescing Slack sender for the API's event loop"""
+
+    def __init__(self, window_seconds: float = None, max_retries: int = None):
+        self.window_seconds = settings.SLACK_DIGEST_WINDOW_SECONDS if window_seconds is None else window_seconds
+        self.max_retries = settings.SLACK_MAX_RETRIES if max_retries is None else max_retries
+        self.sent = 0
+        self.dropped = 0
+        self._queue = None
+        self._task = None
+        self._client = None
+        self._last_post = 0.0
+
+    def notify(self, message: str, username: str = "TrendForgeAI Bot", icon_emoji: str = ":robot_face:"):
+        """Queues a message without waiting; must be called from the event loop"""
+        if not settings.SLACK_WEBHOOK_URL:
+            return False
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue(maxsize=SLACK_QUEUE_SIZE)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        try:
+            self._queue.put_nowait((username, icon_emoji, message))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def stop(self):
+        """Sends what is still queued and closes the HTTP client (app shutdown)"""
+        if self._task is not None and not self._task.done():
+            # The sentinel is queued behind every pending message: _run flushes the batch it
+            # is building, then those messages, and returns
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + self.window_seconds
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                # Never let one bad batch stop the dispatcher
+                print(f"Slack digest failed: {e}")
+            if stopping:
+                return
+
+    async def _send_batch(self, batch: list):
+        by_sender = defaultdict(list)
+        for username, icon_emoji, message in batch:
+            by_sender[(username, icon_emoji)].append(message)
+        for (username, icon_emoji), messages in by_sender.items():
+            await self._post({"text": digest_text(messages), "username": username, "icon_emoji": icon_emoji})
+
+    async def _post(self, payload: dict):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=SLACK_TIMEOUT_SECONDS)
+        for attempt in range(self.max_retries + 1):
+            wait = SLACK_MIN_INTERVAL_SECONDS - (time.monotonic() - self._last_post)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_post = time.monotonic()
+            try:
+                response = await self._client.post(settings.SLACK_WEBHOOK_URL, json=payload)
+                if response.status_code == 429:
+                    retry_after = float(response.headers.get("Retry-After", 2 ** attempt))
+                    print(f"Slack rate limited, retrying in {retry_after:.0f}s")
+                    await asyncio.sleep(retry_after)
+                    continue
+                response.raise_for_status()
+                self.sent += 1
+                return True
+            except httpx.HTTPError as e:
+                if attempt == self.max_retries:
+                    print(f"Failed to send Slack notification: {e}")
+                    return False
+                await asyncio.sleep(2 ** attempt)
+        return False
+
+def digest_text(messages: list) -> str:
+    """One message as is; several as a numbered digest (at most DIGEST_MAX_LINES shown)"""
+    if len(messages) == 1:
+        return messages[0]
+    lines = [f"*{len(messages)} notifications*"]
+    lines += [f"{i + 1}. {message}" for i, message in enumerate(messages[:DIGEST_MAX_LINES])]
+    if len(messages) > DIGEST_MAX_LINES:
+        lines.append(f"_...and {len(messages) - DIGEST_MAX_LINES} more_")
+    return "\n\n".join(lines)
+
+slack_dispatcher = SlackDispatcher()
@@ -0,0 +1,35 @@
+"""
+Small thread-safe in-process cache with a fixed time to live
+"""
+
+import threading
+import time
+
+class TTLCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            self._entries.pop(key, None)
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop expired entries, then the oldest ones
+                now = time.monotonic()
+                self._entries = {k: e for k, e in self._entries.items() if e[1] > now}
+                while len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
@@ -0,0 +1,89 @@
+"""
+User resolution shared by the routers and the Celery tasks
+
+Every generation and history read needs the owning user's ID. Resolved IDs are kept in an
+in-process TTL cache (USER_CACHE_TTL_SECONDS), so the hot path does not query Postgres at
+all. On a miss the user is created with INSERT ... ON CONFLICT (email) DO NOTHING RETURNING id,
+which is atomic: concurrent first requests cannot create duplicates or fail on the unique email.
+"""
+
+import threading
+import time
+import uuid
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.models import User
+
+DEFAULT_USER_EMAIL = "default@trendforgeai.com"
+DEFAULT_USER_NAME = "Default User"
+
+_user_ids = {}  # email -> (user_id, expires_at)
+_user_ids_lock = threading.Lock()
+
+def cached_user_id(email: str):
+    with _user_ids_lock:
+        entry = _user_ids.get(email)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        _user_ids.pop(email, None)
+        return None
+
+def cache_user_id(email: str, user_id: UUID):
+    with _user_ids_lock:
+        _user_ids[email] = (user_id, time.monotonic() + settings.USER_CACHE_TTL_SECONDS)
+
+def invalidate_user(email: str = None):
+    """Drops one cached user ID (or all of them)"""
+    with _user_ids_lock:
+        if email is None:
+            _user_ids.clear()
+        else:
+            _user_ids.pop(email, None)
+
+def upsert_statement(email: str, name: str):
+    return (
+        insert(User)
+        .values(id=uuid.uuid4(), email=email, name=name, hashed_password="not-used-yet")
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id)
+    )
+
+async def resolve_user_id(db: AsyncSession, email: str = DEFAULT_USER_EMAIL, name: str = DEFAULT_USER_NAME) -> UUID:
+    """
+    Get or create a user by email (async session)
+
+    Returns:
+        UUID: The user's ID, from the cache when possible
+    """
+    user_id = cached_user_id(email)
+    if user_id:
+        return user_id
+
+    user_id = await db.scalar(upsert_statement(email, name))
+    if user_id:
+        await db.commit()
+    else:
+        # Conflict: the user already exists
+        user_id = await db.scalar(select(User.id).where(User.email == email))
+    cache_user_id(email, user_id)
+    return user_id
+
+def resolve_user_id_sync(db: Session, email: str = DEFAULT_USER_EMAIL, name: str = DEFAULT_USER_NAME) -> UUID:
+    """Same as resolve_user_id, for the sync sessions of Celery tasks and scripts"""
+    user_id = cached_user_id(email)
+    if user_id:
+        return user_id
+
+    user_id = db.scalar(upsert_statement(email, name))
+    if user_id:
+        db.commit()
+    else:
+        user_id = db.scalar(select(User.id).where(User.email == email))
+    cache_user_id(email, user_id)
+    return user_id
@@ -0,0 +1,40 @@
+"""
+Starts a Celery worker for one or more queues, sized from settings
+
+    python -m api.worker interactive
+    python -m api.worker bulk
+    python -m api.worker maintenance
+    python -m api.worker interactive bulk --concurrency 2   # Development: one worker for both
+
+Beat still runs separately: celery -A api.celery_app beat --loglevel=info
+"""
+
+import argparse
+
+from api.celery_app import BULK_QUEUE, INTERACTIVE_QUEUE, MAINTENANCE_QUEUE, celery_app
+from api.config import settings
+
+QUEUE_CONCURRENCY = {
+    INTERACTIVE_QUEUE: settings.WORKER_CONCURRENCY_INTERACTIVE,
+    BULK_QUEUE: settings.WORKER_CONCURRENCY_BULK,
+    MAINTENANCE_QUEUE: settings.WORKER_CONCURRENCY_MAINTENANCE,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Start a TrendForgeAI Celery worker")
+    parser.add_argument("queues", nargs="+", choices=list(QUEUE_CONCURRENCY), help="Queues to consume")
+    parser.add_argument("--concurrency", type=int, help="Worker processes (default: sum of the queues' settings)")
+    parser.add_argument("--loglevel", default="info")
+    args = parser.parse_args()
+
+    concurrency = args.concurrency or sum(QUEUE_CONCURRENCY[queue] for queue in args.queues)
+    celery_app.worker_main([
+        "worker",
+        f"--loglevel={args.loglevel}",
+        f"--queues={','.join(args.queues)}",
+        f"--concurrency={concurrency}",
+        f"--hostname={'+'.join(args.queues)}@%h",
+    ])
+
+if __name__ == "__main__":
+    main()
@@ -25,11 +25,12 @@ def main():
         print("-" * 40)
         print("5. [Engine]    Run Data Curator (Prepare Dataset)")
         print("6. [Engine]    Run Content Engine (Generate Content)")
+        print("7. [Pipeline]  Run All Extractors in Parallel + Curator")
         print("-" * 40)
         print("0. Exit")
         print("="*40)
         
-        choice = input("\nSelect an option (0-6): ").strip()
+        choice = input("\nSelect an option (0-7): ").strip()
         
         if choice == '1':
             run_module("src.extractors.linkedin_data_extractor")
@@ -43,6 +44,8 @@ def main():
             run_module("src.engine.data_curator")
         elif choice == '6':
             run_module("src.engine.content_engine")
+        elif choice == '7':
+            run_all([])
         elif choice == '0':
             print("Exiting...")
             break
@@ -51,9 +54,44 @@ def main():
             
         input("\nPress Enter to continue...")
 
+def run_all(argv):
+    """Non-interactive mode: runs the selected extractors concurrently, then the curator."""
+    import argparse
+    from src.extractors.base import EXTRACTOR_MODULES
+    from src.extractors.orchestrator import run_pipeline
+    from src.utils.checkpoint import FULL_REFRESH
+
+    parser = argparse.ArgumentParser(description="Run the TrendForgeAI extractors in parallel, then the data curator")
+    parser.add_argument("extractors", nargs="*", metavar="EXTRACTOR",
+                        help=f"Extractors to run (default: all of {', '.join(EXTRACTOR_MODULES)})")
+    parser.add_argument("--no-curate", action="store_true", help="Skip the data curator")
+    parser.add_argument("--workers", type=int, default=None, help="Maximum number of steps running at once")
+    parser.add_argument("--full-refresh", action="store_true", help="Ignore checkpoints and rewrite the outputs")
+    parser.add_argument("--no-upload", action="store_true", help="Skip the Google Sheets uploads")
+    parser.add_argument("--no-notify", action="store_true", help="Skip the Slack notifications")
+    parser.add_argument("--stream", action="store_true", help="Curator: stream CSVs in chunks with bounded memory")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.extractors if name not in EXTRACTOR_MODULES]
+    if unknown:
+        parser.error(f"unknown extractor(s): {', '.join(unknown)}")
+
+    steps = run_pipeline(
+        args.extractors or None,
+        curate=not args.no_curate,
+        max_workers=args.workers,
+        upload=not args.no_upload,
+        notify=not args.no_notify,
+        curate_options={"stream": args.stream},
+        full_refresh=args.full_refresh or FULL_REFRESH,
+    )
+    return 1 if any(step.status == "failed" for step in steps.values()) else 0
+
 if __name__ == "__main__":
     # Ensure we are running from the project root
     if not os.path.exists("src"):
         print("Error: Please run this script from the project root directory (TrendForgeAI).")
+    elif len(sys.argv) > 1 and sys.argv[1] == "all":
+        # e.g. python run.py all youtube twitter --no-upload
+        sys.exit(run_all(sys.argv[2:]))
     else:
         main()
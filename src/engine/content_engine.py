@@ -33,6 +33,34 @@ def load_dataset():
 
 DATASET = load_dataset()
 
+# "<platform>_best" -> (example texts, unit-normalized embeddings) or None without embeddings.
+# Shared by all ContentEngine instances; Celery builds it once in the parent process so
+# prefork children share the matrices copy-on-write (see api/tasks/worker_lifecycle.py).
+EXAMPLE_INDEXES = {}
+
+def build_example_index(key):
+    examples = DATASET.get(key, [])
+    if not (examples and isinstance(examples[0], dict) and "embedding" in examples[0]):
+        return None
+    matrix = np.asarray([ex['embedding'] for ex in examples], dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return [ex['text'] for ex in examples], matrix
+
+def build_example_indexes(drop_embeddings=True):
+    """
+    Builds the index of every platform in DATASET.
+
+    With drop_embeddings, the per-example embedding lists (millions of Python floats) are
+    replaced by the texts once they are in the matrices, which keeps the process small and
+    avoids refcount writes that would un-share memory after a fork.
+    """
+    for key in [key for key in DATASET if key.endswith("_best")]:
+        if key not in EXAMPLE_INDEXES:
+            EXAMPLE_INDEXES[key] = build_example_index(key)
+        if drop_embeddings and EXAMPLE_INDEXES[key]:
+            DATASET[key] = list(EXAMPLE_INDEXES[key][0])
+    return EXAMPLE_INDEXES
+
 class ContentEngine:
     def __init__(self):
         self.model = genai.GenerativeModel("models/gemini-2.5-flash")
@@ -49,43 +77,104 @@ class ContentEngine:
             print(f"Embedding error: {e}")
             return None
 
-    def get_style_examples(self, platform, topic, product_info, n=3):
+    def get_embeddings(self, texts):
+        """Embeds several queries in one request (one vector per text, in order)."""
+        try:
+            result = genai.embed_content(
+                model="models/text-embedding-004",
+                content=list(texts),
+                task_type="retrieval_query"
+            )
+            return result['embedding']
+        except Exception as e:
+            print(f"Embedding error: {e}")
+            return None
+
+    def example_index(self, platform):
+        """
+        Curated examples of a platform with their unit-normalized embeddings.
+
+        Returns:
+            tuple: (list of example texts, 2D array with one row per example), or None
+            if the dataset has no embeddings for the platform
+        """
         key = f"{platform.lower()}_best"
-        examples = DATASET.get(key, [])
-        if not examples:
+        if key not in EXAMPLE_INDEXES:
+            EXAMPLE_INDEXES[key] = build_example_index(key)
+        return EXAMPLE_INDEXES[key]
+
+    def rank_examples(self, platform, query_embeddings, n=3):
+        """Top-n example texts for each query embedding: one matrix product for all queries."""
+        texts, matrix = self.example_index(platform)
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = queries @ matrix.T
+        ranked = []
+        for row in scores:
+            top = np.argsort(row)[::-1][:n]
+            print(f"   Selected top {n} examples with similarity scores: {[f'{row[i]:.2f}' for i in top]}")
+            ranked.append([texts[i] for i in top])
+        return ranked
+
+    def format_examples(self, platform, selected):
+        if not selected:
             return ""
-        
-        # Check if examples have embeddings (new format)
-        if isinstance(examples[0], dict) and "embedding" in examples[0]:
-            print(f"   Using Semantic RAG to find best {platform} examples for '{topic}'...")
-            query = f"{topic} {product_info}"
-            query_embedding = self.get_embedding(query)
-            
-            if query_embedding:
-                # Calculate Cosine Similarity
-                scored_examples = []
-                for ex in examples:
-                    emb = ex['embedding']
-                    score = np.dot(query_embedding, emb) / (np.linalg.norm(query_embedding) * np.linalg.norm(emb))
-                    scored_examples.append((score, ex['text']))
-                
-                # Sort by score descending
-                scored_examples.sort(key=lambda x: x[0], reverse=True)
-                selected = [ex[1] for ex in scored_examples[:n]]
-                print(f"   Selected top {n} examples with similarity scores: {[f'{s:.2f}' for s, _ in scored_examples[:n]]}")
-            else:
-                print("   Warning: Could not generate query embedding. Falling back to random.")
-                selected = [ex['text'] for ex in random.sample(examples, min(n, len(examples)))]
+        formatted = "\n\n".join([f"Example {i+1}:\n{ex}" for i, ex in enumerate(selected)])
+        return f"\n\nHere are {len(selected)} examples of highly successful {platform} content to mimic:\n{formatted}\n"
+
+    def random_examples(self, platform, n=3):
+        examples = DATASET.get(f"{platform.lower()}_best", [])
+        texts = [ex['text'] if isinstance(ex, dict) else ex for ex in examples]
+        return random.sample(texts, min(n, len(texts)))
+
+    def get_style_examples(self, platform, topic, product_info, n=3):
+        return self.get_style_examples_many(platform, [topic], product_info, n)[0]
+
+    def get_style_examples_many(self, platform, topics, product_info, n=3, query_embeddings=None):
+        """
+        Style example blocks for several topics of one platform.
+
+        Args:
+            query_embeddings: Embeddings of f"{topic} {product_info}" per topic, if already computed
+
+        Returns:
+            list: One formatted block per topic ("" when the platform has no examples)
+        """
+        if not DATASET.get(f"{platform.lower()}_best"):
+            return ["" for _ in topics]
+
+        if self.example_index(platform):
+            print(f"   Using Semantic RAG to find best {platform} examples for {len(topics)} topic(s)...")
+            if query_embeddings is None:
+                query_embeddings = self.get_embeddings([f"{topic} {product_info}" for topic in topics])
+            if query_embeddings:
+                return [self.format_examples(platform, selected)
+                        for selected in self.rank_examples(platform, query_embeddings, n)]
+            print("   Warning: Could not generate query embedding. Falling back to random.")
         else:
-            # Old format (list of strings)
             print("   Using Random Selection (No embeddings found in dataset)...")
-            selected = random.sample(examples, min(n, len(examples)))
+        return [self.format_examples(platform, self.random_examples(platform, n)) for _ in topics]
 
-        formatted = "\n\n".join([f"Example {i+1}:\n{ex}" for i, ex in enumerate(selected)])
-        return f"\n\nHere are {len(selected)} examples of highly successful {platform} content to mimic:\n{formatted}\n"
+    def campaign_style_examples(self, topics, platforms, product_info, n=3):
+        """
+        Style examples for every topic x platform pair of a campaign: the topic queries are
+        embedded in one request and each platform's examples are scanned once.
+
+        Returns:
+            dict: {platform: {topic: formatted examples}}
+        """
+        topics = list(dict.fromkeys(topics))
+        query_embeddings = None
+        if any(self.example_index(platform) for platform in platforms):
+            query_embeddings = self.get_embeddings([f"{topic} {product_info}" for topic in topics])
+        return {
+            platform: dict(zip(topics, self.get_style_examples_many(platform, topics, product_info, n, query_embeddings)))
+            for platform in platforms
+        }
 
-    def generate_draft(self, topic, platform, product_info):
-        style_examples = self.get_style_examples(platform, topic, product_info)
+    def generate_draft(self, topic, platform, product_info, style_examples=None):
+        if style_examples is None:
+            style_examples = self.get_style_examples(platform, topic, product_info)
         
         prompt = f"""
         You are an expert Content Marketing AI specialized in {platform}.
@@ -152,17 +241,27 @@ class ContentEngine:
             print(f"Error optimizing: {e}")
             return draft
 
-    def run_pipeline(self, topic, platform, product_info):
+    def run_pipeline(self, topic, platform, product_info, style_examples=None, on_stage=None):
+        """
+        Draft -> critique -> optimize (if the score is below 8.5).
+
+        Args:
+            on_stage: Optional callback(message, progress) called as each stage starts, with
+                progress as a percentage of the whole job
+        """
+        report = on_stage or (lambda message, progress: None)
         print(f"\n--- Running Content Engine for {platform} ---")
         print(f"Topic: {topic}")
         
         # 1. Draft
         print("1. Generating Draft with Style Injection...")
-        draft = self.generate_draft(topic, platform, product_info)
+        report("Generating draft...", 30)
+        draft = self.generate_draft(topic, platform, product_info, style_examples)
         if not draft: return None
         
         # 2. Critique
         print("2. Critiquing Draft...")
+        report("Critiquing draft...", 50)
         scores = self.critique_content(draft, platform)
         print(f"   Score: {scores.get('average_score')}/10 - {scores.get('critique')}")
         
@@ -172,10 +271,12 @@ class ContentEngine:
         # 3. Optimize (if needed)
         if scores.get('average_score', 0) < 8.5:
             print("3. Score below 8.5. Optimizing...")
+            report("Optimizing draft...", 60)
             final_content = self.optimize_content(draft, scores.get('critique'), platform)
             status = "Optimized"
             
             # Re-score (optional, but good for logging)
+            report("Re-scoring optimized draft...", 75)
             new_scores = self.critique_content(final_content, platform)
             print(f"   New Score: {new_scores.get('average_score')}/10")
             scores = new_scores # Update scores for logging
@@ -1,4 +1,5 @@
 import pandas as pd
+import heapq
 import json
 import os
 import re
@@ -17,6 +18,14 @@ except ImportError:
     print("Warning: GEMINI_API_KEY not found. Embeddings will be skipped.")
     GEMINI_API_KEY = None
 
+# Raised by Celery in a task past its soft time limit (api/tasks/extraction_tasks.py); the
+# broad error handlers below must let it through so the task can stop cleanly
+try:
+    from celery.exceptions import SoftTimeLimitExceeded
+except ImportError:
+    class SoftTimeLimitExceeded(Exception):
+        pass
+
 def clean_text(text):
     """Removes URLs and excessive whitespace from text."""
     if not isinstance(text, str):
@@ -27,8 +36,121 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
-def get_embedding(text):
-    """Generates embedding for a given text using Gemini API."""
+# --- Streaming curation settings ---
+# In streaming mode the CSVs are read in chunks and only the top STREAM_TOP_N
+# rows by engagement are kept, so memory is bounded by top-N instead of file size.
+STREAM_CHUNK_SIZE = 50_000
+STREAM_TOP_N = 500
+
+LINKEDIN_COLUMNS = {"post_text": "string", "total_engagement": "float64"}
+YOUTUBE_COLUMNS = {
+    "title": "string",
+    "description": "string",
+    "view_count": "float64",
+    "like_count": "float64",
+    "comment_count": "float64",
+}
+
+# Parquet datasets written by src/utils/parquet_sink.py
+PARQUET_DATASETS = {
+    "linkedin": "linkedin_posts",
+    "youtube": "youtube_videos",
+    "twitter": "tweets",
+    "trends": "trends_related_queries",
+}
+
+def iter_chunks(filepath, columns, dataset=None, since=None, chunksize=STREAM_CHUNK_SIZE):
+    """
+    Yields DataFrame chunks restricted to `columns`.
+
+    Reads the CSV at filepath, or the Parquet dataset when one is given. Parquet reads
+    use column projection and push the extraction_date >= since filter down to the files.
+    """
+    if dataset:
+        from src.utils.parquet_sink import iter_dataset
+        filters = [("extraction_date", ">=", since)] if since else None
+        yield from iter_dataset(dataset, columns=list(columns), filters=filters, batch_size=chunksize)
+    else:
+        # Numeric columns are read as object and coerced per chunk like the in-memory path,
+        # so a stray non-numeric cell becomes NaN instead of failing the whole read
+        dtypes = {name: "object" if dtype == "float64" else dtype for name, dtype in columns.items()}
+        for chunk in pd.read_csv(filepath, usecols=list(columns), dtype=dtypes, chunksize=chunksize):
+            yield coerce_numeric(chunk, columns)
+
+def coerce_numeric(chunk, columns):
+    for name, dtype in columns.items():
+        if dtype == "float64":
+            chunk[name] = pd.to_numeric(chunk[name], errors="coerce")
+    return chunk
+
+def source_exists(filepath, dataset=None):
+    if dataset:
+        from src.utils.parquet_sink import open_dataset
+        return open_dataset(dataset) is not None
+    return os.path.exists(filepath)
+
+def stream_top_rows(chunks, columns, score_fn, top_n=STREAM_TOP_N):
+    """
+    Scans chunks and keeps a running top-N heap on the engagement score.
+
+    Args:
+        chunks: Iterable of DataFrames (see iter_chunks)
+        columns: Columns to keep for the surviving rows
+        score_fn: Callable taking a chunk DataFrame and returning a score Series
+        top_n: Number of rows to keep
+
+    Returns:
+        DataFrame of the surviving rows sorted by score (descending), with a 'score' column
+    """
+    heap = []  # min-heap of (score, -row_number, record)
+
+    for chunk in chunks:
+        scores = score_fn(chunk).fillna(0)
+
+        # Vectorized pre-filter: only rows that could enter the heap touch Python
+        candidates = scores.nlargest(top_n)
+        if len(heap) == top_n:
+            candidates = candidates[candidates > heap[0][0]]
+
+        records = chunk.loc[candidates.index].to_dict("records")
+        for (idx, score), record in zip(candidates.items(), records):
+            # Chunk indexes continue across chunks, so earlier rows win ties
+            entry = (float(score), -idx, record)
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heappushpop(heap, entry)
+
+    survivors = sorted(heap, reverse=True)
+    df = pd.DataFrame([record for _, _, record in survivors], columns=list(columns))
+    df["score"] = [score for score, _, _ in survivors]
+    return df
+
+def load_known_embeddings(filepath):
+    """{text: embedding} of the examples in a previous top_performing_examples.json."""
+    if not os.path.exists(filepath):
+        return {}
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read previous embeddings from {filepath}: {e}")
+        return {}
+    return {
+        example["text"]: example["embedding"]
+        for key, examples in data.items() if key.endswith("_best")
+        for example in examples
+        if isinstance(example, dict) and example.get("embedding")
+    }
+
+def get_embedding(text, known_embeddings=None):
+    """
+    Generates embedding for a given text using Gemini API.
+
+    Texts found in known_embeddings (see load_known_embeddings) are not embedded again.
+    """
+    if known_embeddings and text in known_embeddings:
+        return known_embeddings[text]
     if not GEMINI_API_KEY or not text:
         return None
     try:
@@ -41,61 +163,79 @@ def get_embedding(text):
         )
         time.sleep(0.5) # Rate limit protection
         return result['embedding']
+    except SoftTimeLimitExceeded:
+        raise
     except Exception as e:
         print(f"  x Error generating embedding: {e}")
         return None
 
-def curate_linkedin_data(filepath):
-    if not os.path.exists(filepath):
-        print(f"Warning: {filepath} not found.")
+def curate_linkedin_data(filepath, stream=False, top_n=STREAM_TOP_N, dataset=None, since=None, known_embeddings=None):
+    if not source_exists(filepath, dataset):
+        print(f"Warning: {dataset or filepath} not found.")
         return []
     
     try:
-        df = pd.read_csv(filepath)
-        # Ensure numeric
-        df['total_engagement'] = pd.to_numeric(df['total_engagement'], errors='coerce').fillna(0)
-        
-        # Sort by engagement
-        df_sorted = df.sort_values(by='total_engagement', ascending=False)
-        
-        # Take top 10% or at least top 10
-        top_n = max(10, int(len(df) * 0.1))
-        top_posts = df_sorted.head(top_n)
+        if stream or dataset:
+            chunks = iter_chunks(filepath, LINKEDIN_COLUMNS, dataset, since)
+            top_posts = stream_top_rows(chunks, LINKEDIN_COLUMNS, lambda df: df['total_engagement'], top_n=top_n)
+        else:
+            df = pd.read_csv(filepath)
+            # Ensure numeric
+            df['total_engagement'] = pd.to_numeric(df['total_engagement'], errors='coerce').fillna(0)
+            
+            # Sort by engagement
+            df_sorted = df.sort_values(by='total_engagement', ascending=False)
+            
+            # Take top 10% or at least top 10
+            top_n = max(10, int(len(df) * 0.1))
+            top_posts = df_sorted.head(top_n)
         
         examples = []
         print(f"   Generating embeddings for {len(top_posts)} LinkedIn posts...")
         for _, row in top_posts.iterrows():
             cleaned = clean_text(row['post_text'])
             if len(cleaned) > 50: # Filter out very short posts
-                embedding = get_embedding(cleaned)
+                embedding = get_embedding(cleaned, known_embeddings)
                 if embedding:
                     examples.append({"text": cleaned, "embedding": embedding})
         
         print(f"✓ Curated {len(examples)} high-performing LinkedIn posts with embeddings.")
         return examples
+    except SoftTimeLimitExceeded:
+        raise
     except Exception as e:
         print(f"Error processing LinkedIn data: {e}")
         return []
 
-def curate_youtube_data(filepath):
-    if not os.path.exists(filepath):
-        print(f"Warning: {filepath} not found.")
+def youtube_engagement_score(df):
+    """Composite engagement score: views are common, likes/comments are high signal."""
+    return (
+        df['view_count'].fillna(0) * 0.1
+        + df['like_count'].fillna(0) * 10
+        + df['comment_count'].fillna(0) * 20
+    )
+
+def curate_youtube_data(filepath, stream=False, top_n=STREAM_TOP_N, dataset=None, since=None, known_embeddings=None):
+    if not source_exists(filepath, dataset):
+        print(f"Warning: {dataset or filepath} not found.")
         return []
     
     try:
-        df = pd.read_csv(filepath)
-        # Create a composite engagement score
-        # Views are common, likes/comments are high signal
-        df['view_count'] = pd.to_numeric(df['view_count'], errors='coerce').fillna(0)
-        df['like_count'] = pd.to_numeric(df['like_count'], errors='coerce').fillna(0)
-        df['comment_count'] = pd.to_numeric(df['comment_count'], errors='coerce').fillna(0)
-        
-        df['engagement_score'] = df['view_count'] * 0.1 + df['like_count'] * 10 + df['comment_count'] * 20
-        
-        df_sorted = df.sort_values(by='engagement_score', ascending=False)
-        
-        top_n = max(10, int(len(df) * 0.1))
-        top_videos = df_sorted.head(top_n)
+        if stream or dataset:
+            chunks = iter_chunks(filepath, YOUTUBE_COLUMNS, dataset, since)
+            top_videos = stream_top_rows(chunks, YOUTUBE_COLUMNS, youtube_engagement_score, top_n=top_n)
+        else:
+            df = pd.read_csv(filepath)
+            df['view_count'] = pd.to_numeric(df['view_count'], errors='coerce').fillna(0)
+            df['like_count'] = pd.to_numeric(df['like_count'], errors='coerce').fillna(0)
+            df['comment_count'] = pd.to_numeric(df['comment_count'], errors='coerce').fillna(0)
+            
+            df['engagement_score'] = youtube_engagement_score(df)
+            
+            df_sorted = df.sort_values(by='engagement_score', ascending=False)
+            
+            top_n = max(10, int(len(df) * 0.1))
+            top_videos = df_sorted.head(top_n)
         
         examples = []
         print(f"   Generating embeddings for {len(top_videos)} YouTube videos...")
@@ -105,22 +245,55 @@ def curate_youtube_data(filepath):
             # Combine title and description for a full context example
             full_text = f"Title: {title}\nDescription: {desc[:500]}..." # Truncate desc if too long
             
-            embedding = get_embedding(full_text)
+            embedding = get_embedding(full_text, known_embeddings)
             if embedding:
                 examples.append({"text": full_text, "embedding": embedding})
             
         print(f"✓ Curated {len(examples)} high-performing YouTube video scripts/descriptions with embeddings.")
         return examples
+    except SoftTimeLimitExceeded:
+        raise
     except Exception as e:
         print(f"Error processing YouTube data: {e}")
         return []
 
-def curate_twitter_data(filepath):
-    if not os.path.exists(filepath):
-        print(f"Warning: {filepath} not found. Skipping Twitter.")
+def twitter_stream_columns(filepath, dataset=None):
+    """Picks the engagement columns present in the Twitter CSV header (or Parquet schema)."""
+    if dataset:
+        from src.utils.parquet_sink import dataset_columns
+        header = dataset_columns(dataset)
+    else:
+        header = pd.read_csv(filepath, nrows=0).columns
+    likes_col = 'favorite_count' if 'favorite_count' in header else 'likes'
+    retweets_col = 'retweet_count' if 'retweet_count' in header else 'retweets'
+    if likes_col not in header:
+        return None, None, None
+    columns = {"text": "string", likes_col: "float64"}
+    if retweets_col in header:
+        columns[retweets_col] = "float64"
+    else:
+        retweets_col = None
+    return columns, likes_col, retweets_col
+
+def curate_twitter_data(filepath, stream=False, top_n=STREAM_TOP_N, dataset=None, since=None, known_embeddings=None):
+    if not source_exists(filepath, dataset):
+        print(f"Warning: {dataset or filepath} not found. Skipping Twitter.")
         return []
     
     try:
+        if stream or dataset:
+            columns, likes_col, retweets_col = twitter_stream_columns(filepath, dataset)
+            if not columns:
+                print("Twitter CSV missing engagement columns.")
+                return []
+
+            def score(df):
+                retweets = df[retweets_col].fillna(0) if retweets_col else 0
+                return df[likes_col].fillna(0) + retweets * 2
+
+            chunks = iter_chunks(filepath, columns, dataset, since)
+            return embed_tweets(stream_top_rows(chunks, columns, score, top_n=top_n), known_embeddings)
+
         df = pd.read_csv(filepath)
         # Assuming columns like 'favorite_count', 'retweet_count', 'text'
         # Adjust based on actual extractor if needed, but standard is usually these
@@ -139,29 +312,37 @@ def curate_twitter_data(filepath):
         df_sorted = df.sort_values(by='score', ascending=False)
         
         top_n = max(10, int(len(df) * 0.1))
-        top_tweets = df_sorted.head(top_n)
-        
-        examples = []
-        print(f"   Generating embeddings for {len(top_tweets)} Tweets...")
-        for _, row in top_tweets.iterrows():
-            cleaned = clean_text(row['text'])
-            embedding = get_embedding(cleaned)
-            if embedding:
-                examples.append({"text": cleaned, "embedding": embedding})
-            
-        print(f"✓ Curated {len(examples)} high-performing Tweets with embeddings.")
-        return examples
+        return embed_tweets(df_sorted.head(top_n), known_embeddings)
+    except SoftTimeLimitExceeded:
+        raise
     except Exception as e:
         print(f"Error processing Twitter data: {e}")
         return []
 
-def get_trending_topics(filepath):
-    if not os.path.exists(filepath):
-        print(f"Warning: {filepath} not found.")
+def embed_tweets(top_tweets, known_embeddings=None):
+    examples = []
+    print(f"   Generating embeddings for {len(top_tweets)} Tweets...")
+    for _, row in top_tweets.iterrows():
+        cleaned = clean_text(row['text'])
+        embedding = get_embedding(cleaned, known_embeddings)
+        if embedding:
+            examples.append({"text": cleaned, "embedding": embedding})
+        
+    print(f"✓ Curated {len(examples)} high-performing Tweets with embeddings.")
+    return examples
+
+def get_trending_topics(filepath, dataset=None, since=None):
+    if not source_exists(filepath, dataset):
+        print(f"Warning: {dataset or filepath} not found.")
         return []
     
     try:
-        df = pd.read_csv(filepath)
+        if dataset:
+            from src.utils.parquet_sink import read_dataset
+            filters = [("extraction_date", ">=", since)] if since else None
+            df = read_dataset(dataset, columns=["query", "keyword_searched"], filters=filters)
+        else:
+            df = pd.read_csv(filepath)
         # Assuming 'query' column from Google Trends related queries
         if 'query' in df.columns:
             return df['query'].head(20).tolist()
@@ -174,23 +355,49 @@ def get_trending_topics(filepath):
         print(f"Error processing Trends data: {e}")
         return []
 
-if __name__ == "__main__":
+def run_curation(stream=False, top_n=STREAM_TOP_N, parquet=False, since=None, data_dir=None):
+    """
+    Builds data/top_performing_examples.json from the extractor outputs.
+
+    Returns:
+        dict: The curated dataset
+    """
     print("--- Starting Data Curation for Content Engine ---")
+    if stream or parquet:
+        print(f"Streaming mode: keeping top {top_n} rows per platform")
+    datasets = PARQUET_DATASETS if parquet else {}
     
     # Locate data directory relative to this script (src/engine/ -> ../../data)
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.abspath(os.path.join(script_dir, "..", "..", "data"))
+    if data_dir is None:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        data_dir = os.path.abspath(os.path.join(script_dir, "..", "..", "data"))
     
     print(f"Looking for data in: {data_dir}")
     
+    # Examples already embedded by the previous run are reused instead of embedded again
+    output_file = os.path.join(data_dir, "top_performing_examples.json")
+    known_embeddings = load_known_embeddings(output_file)
+    if known_embeddings:
+        print(f"Reusing the embeddings of {len(known_embeddings)} previously curated examples")
+    
     data = {
-        "linkedin_best": curate_linkedin_data(os.path.join(data_dir, "linkedin_product_marketing_posts.csv")),
-        "youtube_best": curate_youtube_data(os.path.join(data_dir, "youtube_product_marketing_videos.csv")),
-        "twitter_best": curate_twitter_data(os.path.join(data_dir, "product_marketing_tweets.csv")),
-        "trending_topics": get_trending_topics(os.path.join(data_dir, "google_trends_related_queries.csv"))
+        "linkedin_best": curate_linkedin_data(
+            os.path.join(data_dir, "linkedin_product_marketing_posts.csv"), stream, top_n,
+            datasets.get("linkedin"), since, known_embeddings
+        ),
+        "youtube_best": curate_youtube_data(
+            os.path.join(data_dir, "youtube_product_marketing_videos.csv"), stream, top_n,
+            datasets.get("youtube"), since, known_embeddings
+        ),
+        "twitter_best": curate_twitter_data(
+            os.path.join(data_dir, "product_marketing_tweets.csv"), stream, top_n,
+            datasets.get("twitter"), since, known_embeddings
+        ),
+        "trending_topics": get_trending_topics(
+            os.path.join(data_dir, "google_trends_related_queries.csv"), datasets.get("trends"), since
+        )
     }
     
-    output_file = os.path.join(data_dir, "top_performing_examples.json")
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
         
@@ -200,3 +407,16 @@ if __name__ == "__main__":
     print(f"  - Twitter Examples: {len(data['twitter_best'])}")
     print(f"  - Trending Topics: {len(data['trending_topics'])}")
     print("--- Curation Complete ---")
+    return data
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Curate top performing examples for the Content Engine')
+    parser.add_argument('--stream', action='store_true', help='Stream CSVs in chunks with bounded memory')
+    parser.add_argument('--top-n', type=int, default=STREAM_TOP_N, help='Rows kept per platform in streaming mode')
+    parser.add_argument('--parquet', action='store_true', help='Read the partitioned Parquet datasets instead of the CSVs')
+    parser.add_argument('--since', default=None, help='With --parquet, only read partitions with extraction_date >= YYYY-MM-DD')
+    args = parser.parse_args()
+
+    run_curation(args.stream, args.top_n, args.parquet, args.since)
@@ -0,0 +1,210 @@
+# base.py
+"""
+Common interface for the platform extractors.
+
+Every extractor follows the same three steps:
+  1. fetch: call the platform API and return one DataFrame per output
+  2. normalize: map the platform rows onto the shared RECORD_COLUMNS schema
+  3. sink: write each output (CSV, optional Parquet, Google Sheets) and notify Slack
+
+Subclasses only implement check_credentials(), fetch() and normalize(), and describe their
+outputs with ExtractorOutput; Extractor.run() takes care of checkpoints and the sinks.
+fetch() may return an iterable of DataFrame chunks instead of a DataFrame for large
+outputs (e.g. record_sink.NDJSONFrames): each chunk is written and normalized in turn, so
+only one chunk is in memory at a time.
+Extractors register themselves with @register so the orchestrator can find them by name.
+"""
+import importlib
+import os
+import time
+
+import pandas as pd
+
+from src.utils.checkpoint import Checkpoint, FULL_REFRESH, append_new_rows, read_keys
+from src.utils.http_cache import is_replay
+
+# Script is in src/extractors/ -> ../../data
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+
+SPREADSHEET_ID = "1gNHWjMghm4kTVbFSgC298LgWOWhgREY2wRRzTq-yHrk"
+SPREADSHEET_URL = f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/edit?usp=sharing"
+
+# Shared record schema across platforms
+RECORD_COLUMNS = [
+    "platform", "record_id", "text", "author", "url",
+    "published_at", "engagement", "search_term_matched", "extracted_at",
+]
+
+EXTRACTORS = {}
+
+def register(cls):
+    """Class decorator adding an extractor to the registry under cls.name."""
+    EXTRACTORS[cls.name] = cls
+    return cls
+
+class ExtractorOutput:
+    """
+    One output of an extractor.
+
+    Args:
+        key: Key of the DataFrame in the dict returned by fetch()
+        filename: CSV file name under data/
+        key_columns: Columns identifying a row; None rewrites the file every run (snapshots)
+        dataset: Parquet dataset name (see parquet_sink.DATASET_SCHEMAS), or None
+        worksheet: Google Sheets worksheet name, or None to skip the upload
+    """
+
+    def __init__(self, key, filename, key_columns=None, dataset=None, worksheet=None):
+        self.key = key
+        self.filename = filename
+        self.key_columns = key_columns
+        self.dataset = dataset
+        self.worksheet = worksheet
+
+class Extractor:
+    name = None # Registry and checkpoint name, e.g. "youtube"
+    platform = None # Platform label written to records, e.g. "YouTube"
+    outputs = []
+    depends_on = ()
+
+    def __init__(self, data_dir=DATA_DIR, upload=True, notify=True):
+        self.data_dir = data_dir
+        self.upload = upload
+        self.notify = notify
+
+    # --- To implement ---
+    def check_credentials(self):
+        """Raises MissingCredentialError (or a client error) if the extractor cannot run."""
+
+    def fetch(self, checkpoint):
+        """Returns {output key: DataFrame}."""
+        raise NotImplementedError
+
+    def normalize(self, outputs):
+        """Maps the primary output onto RECORD_COLUMNS."""
+        return pd.DataFrame(columns=RECORD_COLUMNS)
+
+    def slack_message(self, outputs):
+        return None
+
+    # --- Shared pipeline ---
+    def run(self, full_refresh=FULL_REFRESH):
+        """
+        Runs fetch -> sink for this extractor.
+
+        Returns:
+            dict: Row counts per output, the normalized records (an iterator of DataFrames, see
+            normalize_chunks) and the elapsed seconds
+        """
+        started = time.perf_counter()
+        print(f"--- Starting {self.platform} extraction ---")
+        if not is_replay():
+            self.check_credentials()
+        checkpoint = Checkpoint(self.name).begin(full_refresh)
+        outputs = self.fetch(checkpoint)
+
+        rows = {}
+        for output in self.outputs:
+            rows[output.key] = 0
+            value = outputs.get(output.key)
+            existing_keys = None
+            if output.key_columns and not isinstance(value, pd.DataFrame):
+                # Chunks: read the CSV's keys once instead of once per chunk
+                csv_path = os.path.join(self.data_dir, output.filename)
+                existing_keys = set() if full_refresh else read_keys(csv_path, output.key_columns)
+            for i, df in enumerate(iter_frames(value)):
+                # Only the first chunk may rewrite the file on a full refresh
+                rows[output.key] += len(self.write_output(output, df, full_refresh and i == 0, existing_keys))
+            if not rows[output.key]:
+                print(f"[{self.name}] No data for {output.key}.")
+
+        if any(rows.values()):
+            message = self.slack_message(outputs) if self.notify else None
+            if message:
+                try:
+                    from src.utils.slack_notifier import send_slack_notification
+                    send_slack_notification(message)
+                except ImportError:
+                    print("Slack notification function not available.")
+                except Exception as e:
+                    print(f"\nError sending Slack notification: {e}")
+
+        checkpoint.finish()
+        records = self.normalize_chunks(outputs)
+        elapsed = time.perf_counter() - started
+        print(f"--- {self.platform} extraction complete in {elapsed:.1f}s ---")
+        return {"rows": rows, "records": records, "seconds": elapsed}
+
+    def normalize_chunks(self, outputs):
+        """
+        Yields normalize() of each chunk of the primary output (a single frame when the output
+        is a DataFrame). Chunks are normalized as they are consumed, one at a time.
+        """
+        primary = self.outputs[0].key if self.outputs else None
+        value = outputs.get(primary)
+        if value is None or isinstance(value, pd.DataFrame):
+            yield self.normalize(outputs)
+            return
+        for chunk in iter_frames(value):
+            yield self.normalize(dict(outputs, **{primary: chunk}))
+
+    def write_output(self, output, df, full_refresh=FULL_REFRESH, existing_keys=None):
+        """
+        Writes one output to CSV, Parquet and Google Sheets. Returns the rows written.
+
+        existing_keys: Keys already in the CSV, kept across the chunks of an output (see append_new_rows)
+        """
+        csv_path = os.path.join(self.data_dir, output.filename)
+        if output.key_columns:
+            written = append_new_rows(df, csv_path, output.key_columns, full_refresh, existing_keys)
+            print(f"[{self.name}] Appended {len(written)} new rows to {csv_path}")
+        else:
+            df.to_csv(csv_path, index=False)
+            written = df
+            print(f"[{self.name}] Saved {len(df)} rows to {csv_path}")
+
+        # --- Optional Parquet sink (typed, partitioned by platform/date) ---
+        if output.dataset:
+            try:
+                from src.utils.parquet_sink import PARQUET_SINK_ENABLED, write_dataset
+                if PARQUET_SINK_ENABLED:
+                    write_dataset(written, output.dataset, self.platform.replace(" ", ""))
+            except Exception as e:
+                print(f"\nError writing Parquet output: {e}")
+
+        if output.worksheet and self.upload:
+            try:
+                from src.utils.upload_to_sheets import sync_to_google_sheet
+                print(f"\nSyncing {output.key} to Google Sheets...")
+                # Keyed outputs only send rows the worksheet has not seen; snapshots are replaced
+                sync_to_google_sheet(df, SPREADSHEET_ID, output.worksheet, output.key_columns)
+            except ImportError:
+                print("\nWarning: src.utils.upload_to_sheets not found. Skipping Google Sheets upload.")
+            except Exception as e:
+                print(f"\nError uploading {output.key} to Google Sheets: {e}")
+        return written
+
+def iter_frames(value):
+    """Non-empty DataFrames of an output: the DataFrame itself, or the chunks of an iterable."""
+    if value is None:
+        return
+    for df in [value] if isinstance(value, pd.DataFrame) else value:
+        if df is not None and not df.empty:
+            yield df
+
+# Modules that register an extractor, imported on demand so one missing client
+# library (e.g. linkedin-api) does not block the others
+EXTRACTOR_MODULES = {
+    "linkedin": "src.extractors.linkedin_data_extractor",
+    "youtube": "src.extractors.youtube_data_extractor",
+    "twitter": "src.extractors.twitter_data_extractor",
+    "google_trends": "src.extractors.google_trends_extract",
+}
+
+def get_extractor(name):
+    """Imports the extractor module if needed and returns the registered class."""
+    if name not in EXTRACTORS:
+        if name not in EXTRACTOR_MODULES:
+            raise KeyError(f"Unknown extractor '{name}'. Choose from: {', '.join(EXTRACTOR_MODULES)}")
+        importlib.import_module(EXTRACTOR_MODULES[name])
+    return EXTRACTORS[name]
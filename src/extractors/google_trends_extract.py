@@ -1,12 +1,20 @@
 from pytrends.request import TrendReq
 import pandas as pd
 from datetime import datetime, timedelta
-import time
-import random
 import os
 
-# --- 1. Initialize pytrends ---
-pytrends = TrendReq(hl='en-US', tz=330) # hl=host language, tz=timezone (330 for India, 360 for US Central, etc.)
+from src.extractors.base import RECORD_COLUMNS, Extractor, ExtractorOutput, register
+from src.utils.http_cache import cached_call
+from src.utils.rate_limiter import get_limiter
+
+# --- 1. Initialize pytrends (on first use: TrendReq fetches cookies from Google) ---
+pytrends = None
+
+def get_pytrends():
+    global pytrends
+    if pytrends is None:
+        pytrends = TrendReq(hl='en-US', tz=330) # hl=host language, tz=timezone (330 for India, 360 for US Central, etc.)
+    return pytrends
 
 # --- 2. Define Search Parameters ---
 GOOGLE_TRENDS_KEYWORDS = [
@@ -38,182 +46,234 @@ TIMEFRAME = 'today 3-m' # Last 3 months for recent trends
 # Examples: 'US', 'IN' (India), 'GB' (United Kingdom)
 GEO = 'IN' # Let's target India for example, change to '' for worldwide
 
-def get_interest_over_time(keywords, timeframe=TIMEFRAME, geo=GEO):
+# Paces Google Trends requests and backs off when we get 429s
+limiter = get_limiter("google_trends")
+
+# Every interest-over-time payload carries the anchor, so all chunks can be put on one scale
+ANCHOR_KEYWORD = "new product"
+MAX_KEYWORDS_PER_PAYLOAD = 5 # Google Trends limit
+
+# Trends data moves slowly: reuse responses younger than this instead of refetching
+CACHE_TTL_HOURS = 12
+
+def chunk_keywords(keywords, size=MAX_KEYWORDS_PER_PAYLOAD, anchor=None):
+    """Splits keywords into payloads; with an anchor, it is the first keyword of every payload."""
+    if not anchor:
+        return [keywords[i:i + size] for i in range(0, len(keywords), size)]
+    others = [kw for kw in keywords if kw != anchor]
+    step = size - 1
+    return [[anchor] + others[i:i + step] for i in range(0, len(others), step)] or [[anchor]]
+
+def rescale_to_anchor(frames, anchor):
+    """
+    Puts chunks that were each normalized to their own 0-100 scale onto one common scale.
+
+    The reference is the first chunk in which the anchor has interest: each chunk is multiplied
+    by (anchor total in the reference / anchor total in that chunk), then the combined frame is
+    rescaled so its overall peak is 100 again. Chunks without anchor interest (all of them, if
+    the anchor has none anywhere) are left unscaled.
+    """
+    anchors = pd.concat([df[anchor] for df in frames], axis=1)
+    totals = anchors.sum().reset_index(drop=True)
+    nonzero = totals[totals > 0]
+    reference = nonzero.index[0] if not nonzero.empty else 0
+    factors = (totals[reference] / totals.where(totals > 0)).fillna(1.0).tolist()
+
+    scaled = [df.drop(columns=anchor).mul(factor) for df, factor in zip(frames, factors)]
+    combined = pd.concat([frames[reference][[anchor]]] + scaled, axis=1)
+    combined = combined.loc[:, ~combined.columns.duplicated()]
+    peak = combined.to_numpy().max() if not combined.empty else 0
+    return (combined * (100.0 / peak)).round(2) if peak else combined
+
+def fetch_interest_over_time(chunk, timeframe, geo):
+    client = get_pytrends()
+    client.build_payload(chunk, cat=0, timeframe=timeframe, geo=geo)
+    return client.interest_over_time()
+
+def fetch_related(chunk, timeframe, geo):
+    """One payload for up to 5 keywords, both related endpoints: cached together as a single unit."""
+    client = get_pytrends()
+    client.build_payload(chunk, cat=0, timeframe=timeframe, geo=geo)
+    return client.related_queries(), client.related_topics()
+
+def get_interest_over_time(keywords, timeframe=TIMEFRAME, geo=GEO, checkpoint=None, anchor=ANCHOR_KEYWORD,
+                           cache_ttl_hours=CACHE_TTL_HOURS):
     """
     Fetches Google Trends 'Interest Over Time' for a list of keywords.
-    Google Trends allows a maximum of 5 keywords per request.
+    Google Trends allows a maximum of 5 keywords per request, each normalized to its own 0-100
+    scale, so every request includes the anchor keyword and the chunks are rescaled onto
+    one scale (see rescale_to_anchor). Responses are cached on disk for cache_ttl_hours.
+    With a checkpoint, chunks fetched before an interruption are reused.
     """
     all_interest_data = []
-    
-    # Split keywords into chunks of 5
-    keyword_chunks = [keywords[i:i + 5] for i in range(0, len(keywords), 5)]
+    keyword_chunks = chunk_keywords(keywords, anchor=anchor)
 
-    print(f"Fetching Google Trends 'Interest Over Time' for {len(keywords)} keywords ({TIMEFRAME}, Geo: {GEO})...")
+    print(f"Fetching Google Trends 'Interest Over Time' for {len(keywords)} keywords "
+          f"in {len(keyword_chunks)} request(s) ({timeframe}, Geo: {geo}, anchor: '{anchor}')...")
 
     for chunk in keyword_chunks:
+        unit = f"interest:{geo}:{timeframe}:{'|'.join(chunk)}"
+        if checkpoint and checkpoint.is_done(unit):
+            print(f"  Reusing data fetched earlier in this run for: {', '.join(chunk)}")
+            staged = checkpoint.staged_frame(unit)
+            if not staged.empty:
+                all_interest_data.append(staged)
+            continue
         print(f"  Requesting data for: {', '.join(chunk)}")
         try:
-            pytrends.build_payload(chunk, cat=0, timeframe=timeframe, geo=geo)
-            df = pytrends.interest_over_time()
+            df = cached_call("google_trends", "interest_over_time",
+                             {"kw_list": chunk, "timeframe": timeframe, "geo": geo},
+                             lambda: fetch_interest_over_time(chunk, timeframe, geo), limiter=limiter,
+                             ttl=cache_ttl_hours * 3600)
             if not df.empty:
                 # Remove the 'isPartial' column if it exists
                 if 'isPartial' in df.columns:
                     df = df.drop(columns=['isPartial'])
-                df['geo'] = geo
-                df['timeframe'] = timeframe
                 all_interest_data.append(df)
             else:
                 print(f"    No data returned for keywords: {', '.join(chunk)}")
-            time.sleep(random.randint(5, 10)) # Be polite to Google Trends
+            if checkpoint:
+                checkpoint.mark_done(unit, df)
         except Exception as e:
             print(f"    Error fetching interest over time for {', '.join(chunk)}: {e}")
-            print("    Waiting longer due to potential rate limit or error...")
-            time.sleep(random.randint(30, 60)) # Longer wait for errors
+            limiter.report(e) # Backs off harder on 429s than on other errors
 
     if all_interest_data:
-        # Concatenate all dataframes. The 'date' column will be the index.
-        # Ensure the 'date' column is explicitly reset for sheets upload.
-        combined_df = pd.concat(all_interest_data, axis=1)
-        # Drop duplicate columns that might arise from concat (e.g., if a keyword chunk overlaps somehow, though it shouldn't with slicing)
-        combined_df = combined_df.loc[:,~combined_df.columns.duplicated()].copy()
-        
-        # Move geo and timeframe columns to the front and ensure 'date' is a column
-        if 'geo' in combined_df.columns and 'timeframe' in combined_df.columns:
-            cols = ['geo', 'timeframe'] + [col for col in combined_df.columns if col not in ['geo', 'timeframe']]
-            combined_df = combined_df[cols]
-        
-        # Reset index to make 'date' a regular column for CSV/Sheets
+        if anchor and all(anchor in df.columns for df in all_interest_data):
+            combined_df = rescale_to_anchor(all_interest_data, anchor)
+        else:
+            # Chunks without a usable anchor keep their own per-chunk scale
+            combined_df = pd.concat(all_interest_data, axis=1)
+            combined_df = combined_df.loc[:, ~combined_df.columns.duplicated()].copy()
+
+        # geo and timeframe go to the front, 'date' becomes a regular column for CSV/Sheets
+        combined_df.insert(0, 'timeframe', timeframe)
+        combined_df.insert(0, 'geo', geo)
         combined_df = combined_df.reset_index()
         combined_df.rename(columns={'index': 'date'}, inplace=True)
         
         return combined_df
     return pd.DataFrame()
 
-def get_related_queries_and_topics(keywords, timeframe=TIMEFRAME, geo=GEO):
+def related_frame(related_dict, keyword, type_column, geo, timeframe):
+    """The 'top' table for one keyword out of a related_queries()/related_topics() result."""
+    entry = (related_dict or {}).get(keyword) or {}
+    df = entry.get('top')
+    if df is None or df.empty:
+        return None
+    df = df.copy()
+    df['keyword_searched'] = keyword
+    df[type_column] = 'top'
+    df['geo'] = geo
+    df['timeframe'] = timeframe
+    return df
+
+def get_related_queries_and_topics(keywords, timeframe=TIMEFRAME, geo=GEO, checkpoint=None,
+                                   cache_ttl_hours=CACHE_TTL_HOURS):
     """
-    Fetches Google Trends 'Related Queries' and 'Related Topics' for individual keywords.
-    This works best for single keywords.
+    Fetches Google Trends 'Related Queries' and 'Related Topics' for the keywords.
+    Related data is reported per keyword, so up to 5 keywords share one payload.
+    With a checkpoint, each finished payload is persisted, so an interrupted run
+    resumes at the first payload it had not completed.
     """
     all_related_queries = []
     all_related_topics = []
+    keyword_chunks = chunk_keywords(keywords)
 
-    print(f"\nFetching Google Trends 'Related Queries' and 'Related Topics' for {len(keywords)} keywords ({TIMEFRAME}, Geo: {GEO})...")
+    print(f"\nFetching Google Trends 'Related Queries' and 'Related Topics' for {len(keywords)} keywords "
+          f"in {len(keyword_chunks)} payload(s) ({timeframe}, Geo: {geo})...")
 
-    for keyword in keywords:
-        print(f"  Requesting related data for: '{keyword}'")
+    for chunk in keyword_chunks:
+        unit = f"{geo}:{timeframe}:{'|'.join(chunk)}"
+        if checkpoint and checkpoint.is_done(f"related_topics:{unit}"):
+            print(f"  Reusing related data fetched earlier in this run for: {', '.join(chunk)}")
+            for frames, prefix in ((all_related_queries, "related_queries"), (all_related_topics, "related_topics")):
+                staged = checkpoint.staged_frame(f"{prefix}:{unit}")
+                if not staged.empty:
+                    frames.append(staged)
+            continue
+        print(f"  Requesting related data for: {', '.join(chunk)}")
         try:
-            pytrends.build_payload([keyword], cat=0, timeframe=timeframe, geo=geo)
-            
-            # Related Queries
-            related_queries_dict = pytrends.related_queries()
-            if related_queries_dict and keyword in related_queries_dict and related_queries_dict[keyword]['top'] is not None:
-                df_queries = related_queries_dict[keyword]['top']
-                df_queries['keyword_searched'] = keyword
-                df_queries['query_type'] = 'top'
-                df_queries['geo'] = geo
-                df_queries['timeframe'] = timeframe
-                all_related_queries.append(df_queries)
-            else:
-                print(f"    No top related queries found for '{keyword}'")
-
-            # Related Topics
-            related_topics_dict = pytrends.related_topics()
-            if related_topics_dict and keyword in related_topics_dict and related_topics_dict[keyword]['top'] is not None:
-                df_topics = related_topics_dict[keyword]['top']
-                df_topics['keyword_searched'] = keyword
-                df_topics['topic_type'] = 'top'
-                df_topics['geo'] = geo
-                df_topics['timeframe'] = timeframe
-                all_related_topics.append(df_topics)
-            else:
-                print(f"    No top related topics found for '{keyword}'")
-                
-            time.sleep(random.randint(10, 20)) # Be more polite for related queries/topics
+            related_queries_dict, related_topics_dict = cached_call(
+                "google_trends", "related", {"kw_list": chunk, "timeframe": timeframe, "geo": geo},
+                lambda: fetch_related(chunk, timeframe, geo), limiter=limiter, ttl=cache_ttl_hours * 3600
+            )
+
+            chunk_queries, chunk_topics = [], []
+            for keyword in chunk:
+                df_queries = related_frame(related_queries_dict, keyword, 'query_type', geo, timeframe)
+                if df_queries is not None:
+                    chunk_queries.append(df_queries)
+                else:
+                    print(f"    No top related queries found for '{keyword}'")
+
+                df_topics = related_frame(related_topics_dict, keyword, 'topic_type', geo, timeframe)
+                if df_topics is not None:
+                    chunk_topics.append(df_topics)
+                else:
+                    print(f"    No top related topics found for '{keyword}'")
+
+            all_related_queries.extend(chunk_queries)
+            all_related_topics.extend(chunk_topics)
+            if checkpoint:
+                # Topics are marked last: they mark the payload as complete
+                checkpoint.mark_done(f"related_queries:{unit}",
+                                     pd.concat(chunk_queries, ignore_index=True) if chunk_queries else None)
+                checkpoint.mark_done(f"related_topics:{unit}",
+                                     pd.concat(chunk_topics, ignore_index=True) if chunk_topics else None)
 
         except Exception as e:
-            print(f"    Error fetching related data for '{keyword}': {e}")
-            print("    Waiting longer due to potential rate limit or error...")
-            time.sleep(random.randint(60, 120)) # Even longer wait for errors
+            print(f"    Error fetching related data for {', '.join(chunk)}: {e}")
+            limiter.report(e)
 
     if all_related_queries:
         combined_queries_df = pd.concat(all_related_queries, ignore_index=True)
         return combined_queries_df, pd.concat(all_related_topics, ignore_index=True) if all_related_topics else pd.DataFrame()
     return pd.DataFrame(), pd.DataFrame()
 
+@register
+class GoogleTrendsExtractor(Extractor):
+    """Trends outputs are rolling snapshots, so they are rewritten each run instead of appended."""
+    name = "google_trends"
+    platform = "Google Trends"
+    outputs = [
+        ExtractorOutput("interest_over_time", "google_trends_interest_over_time.csv",
+                        dataset="trends_interest_over_time", worksheet="GoogleTrends_Interest_Over_Time"),
+        ExtractorOutput("related_queries", "google_trends_related_queries.csv",
+                        dataset="trends_related_queries", worksheet="GoogleTrends_Related_Queries"),
+        ExtractorOutput("related_topics", "google_trends_related_topics.csv",
+                        dataset="trends_related_topics", worksheet="GoogleTrends_Related_Topics"),
+    ]
+
+    def fetch(self, checkpoint):
+        interest_over_time_df = get_interest_over_time(GOOGLE_TRENDS_KEYWORDS, checkpoint=checkpoint)
+        related_queries_df, related_topics_df = get_related_queries_and_topics(GOOGLE_TRENDS_KEYWORDS, checkpoint=checkpoint)
+        return {
+            "interest_over_time": interest_over_time_df,
+            "related_queries": related_queries_df,
+            "related_topics": related_topics_df,
+        }
+
+    def normalize(self, outputs):
+        df = outputs.get("related_queries")
+        if df is None or df.empty:
+            return super().normalize(outputs)
+        return pd.DataFrame({
+            "platform": self.platform,
+            "record_id": df["keyword_searched"] + ":" + df["query"],
+            "text": df["query"],
+            "author": None,
+            "url": None,
+            "published_at": None,
+            "engagement": df["value"],
+            "search_term_matched": df["keyword_searched"],
+            "extracted_at": datetime.now().isoformat(),
+        }, columns=RECORD_COLUMNS)
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    
     print("--- Starting Google Trends Data Extraction ---")
-
-    # 1. Get Interest Over Time
-    interest_over_time_df = get_interest_over_time(GOOGLE_TRENDS_KEYWORDS)
-    if not interest_over_time_df.empty:
-        csv_path_iot = os.path.join("data", "google_trends_interest_over_time.csv")
-        interest_over_time_df.to_csv(csv_path_iot, index=False)
-        print(f"\nSuccessfully extracted Interest Over Time data for {len(GOOGLE_TRENDS_KEYWORDS)} keywords.")
-        print(f"Data saved to {csv_path_iot}")
-        print("\nFirst 5 rows of Interest Over Time data:")
-        print(interest_over_time_df.head())
-
-        # Upload to Google Sheets
-        try:
-            from src.utils.upload_to_sheets import upload_to_google_sheet
-            print("\nAttempting to upload Interest Over Time data to Google Sheets...")
-            upload_to_google_sheet(interest_over_time_df, "1gNHWjMghm4kTVbFSgC298LgWOWhgREY2wRRzTq-yHrk", "GoogleTrends_Interest_Over_Time")
-        except ImportError:
-            print("\nWarning: src.utils.upload_to_sheets not found. Skipping Google Sheets upload.")
-        except Exception as e:
-            print(f"\nError uploading Interest Over Time to Google Sheets: {e}")
-    else:
-        print("\nNo Interest Over Time data extracted.")
-
-    # 2. Get Related Queries and Topics (using the same keywords)
-    related_queries_df, related_topics_df = get_related_queries_and_topics(GOOGLE_TRENDS_KEYWORDS)
-
-    if not related_queries_df.empty:
-        csv_path_rq = os.path.join("data", "google_trends_related_queries.csv")
-        related_queries_df.to_csv(csv_path_rq, index=False)
-        print(f"\nSuccessfully extracted Related Queries data for {len(GOOGLE_TRENDS_KEYWORDS)} keywords.")
-        print(f"Data saved to {csv_path_rq}")
-        print("\nFirst 5 rows of Related Queries data:")
-        print(related_queries_df.head())
-
-        # Upload to Google Sheets
-        try:
-            from src.utils.upload_to_sheets import upload_to_google_sheet
-            print("\nAttempting to upload Related Queries data to Google Sheets...")
-            upload_to_google_sheet(related_queries_df, "1gNHWjMghm4kTVbFSgC298LgWOWhgREY2wRRzTq-yHrk", "GoogleTrends_Related_Queries")
-        except ImportError:
-            print("\nWarning: src.utils.upload_to_sheets not found. Skipping Google Sheets upload.")
-        except Exception as e:
-            print(f"\nError uploading Related Queries to Google Sheets: {e}")
-    else:
-        print("\nNo Related Queries data extracted.")
-
-    if not related_topics_df.empty:
-        csv_path_rt = os.path.join("data", "google_trends_related_topics.csv")
-        related_topics_df.to_csv(csv_path_rt, index=False)
-        print(f"\nSuccessfully extracted Related Topics data for {len(GOOGLE_TRENDS_KEYWORDS)} keywords.")
-        print(f"Data saved to {csv_path_rt}")
-        print("\nFirst 5 rows of Related Topics data:")
-        print(related_topics_df.head())
-
-        # Upload to Google Sheets
-        try:
-            from src.utils.upload_to_sheets import upload_to_google_sheet
-            print("\nAttempting to upload Related Topics data to Google Sheets...")
-            upload_to_google_sheet(related_topics_df, "1gNHWjMghm4kTVbFSgC298LgWOWhgREY2wRRzTq-yHrk", "GoogleTrends_Related_Topics")
-        except ImportError:
-            print("\nWarning: src.utils.upload_to_sheets not found. Skipping Google Sheets upload.")
-        except Exception as e:
-            print(f"\nError uploading Related Topics to Google Sheets: {e}")
-    else:
-        print("\nNo Related Topics data extracted.")
-    
+    result = GoogleTrendsExtractor().run()
+    for output, rows in result["rows"].items():
+        print(f"  {output}: {rows} rows")
     print("\n--- Google Trends Data Extraction Complete ---")
-
-    try:
-        from src.utils.slack_notifier import send_slack_notification
-    except ImportError:
-        pass
\ No newline at end of file
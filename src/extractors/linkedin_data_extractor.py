@@ -1,25 +1,24 @@
 import pandas as pd
 from datetime import datetime, timedelta
-import time
-import random
 import os
 from linkedin_api import Linkedin
 
-# --- 1. Load API Credentials from credentials.py ---
-try:
-    from credentials import LINKEDIN_EMAIL, LINKEDIN_PASSWORD
-except ImportError:
-    print("Error: LinkedIn credentials not found in credentials.py. Please add LINKEDIN_EMAIL and LINKEDIN_PASSWORD.")
-    exit()
-
-# --- 2. Initialize LinkedIn API Client ---
-try:
-    api = Linkedin(LINKEDIN_EMAIL, LINKEDIN_PASSWORD)
-    print("Successfully authenticated to LinkedIn API")
-except Exception as e:
-    print(f"Failed to authenticate to LinkedIn: {e}")
-    print("Please ensure your credentials are correct and 2FA is disabled or configured properly.")
-    exit()
+from src.extractors.base import DATA_DIR, RECORD_COLUMNS, SPREADSHEET_URL, Extractor, ExtractorOutput, iter_frames, register
+from src.utils.credential_loader import MissingCredentialError, get_credential
+from src.utils.http_cache import cached_call
+from src.utils.rate_limiter import get_limiter
+from src.utils.record_sink import NDJSONFrames, NDJSONSink
+
+# --- 1/2. LinkedIn API Client, authenticated on first use ---
+# credentials.py must contain LINKEDIN_EMAIL and LINKEDIN_PASSWORD
+api = None
+
+def get_api():
+    global api
+    if api is None:
+        api = Linkedin(get_credential("LINKEDIN_EMAIL"), get_credential("LINKEDIN_PASSWORD"))
+        print("Successfully authenticated to LinkedIn API")
+    return api
 
 # --- 3. Define Search Parameters ---
 # Companies to monitor (LinkedIn public IDs or company names)
@@ -53,87 +52,135 @@ LINKEDIN_PRODUCT_SEARCH_TERMS = [
 POSTS_PER_COMPANY = 10  # How many recent posts to fetch per company
 DAYS_BACK = 7  # How far back to look for posts
 
-def get_linkedin_product_posts(companies, search_terms, posts_limit=POSTS_PER_COMPANY, days_back=DAYS_BACK):
+# Parsed posts of the current run are appended here in batches while the sweep runs
+# (see record_sink); the previous run is kept as linkedin_posts.ndjson.1
+LINKEDIN_SINK_PATH = os.path.join(DATA_DIR, "linkedin_posts.ndjson")
+
+limiter = get_limiter("linkedin")
+
+def fetch_company_posts(company_name, posts_limit):
+    """Raw recent posts of a company page, or None if the company cannot be found."""
+    # Get company URN/ID
+    company_info = cached_call("linkedin", "get_company", {"public_id": company_name},
+                               lambda: get_api().get_company(company_name), limiter=limiter)
+    if not company_info:
+        print(f"    Could not find company: {company_name}")
+        return None
+
+    # Fetch company posts
+    params = {"public_id": company_name, "max_results": posts_limit}
+    return cached_call("linkedin", "get_company_updates", params,
+                       lambda: get_api().get_company_updates(**params), limiter=limiter)
+
+def fetch_search_posts(term):
+    # Search for posts containing the term
+    params = {"keywords": term, "limit": 15}
+    return cached_call("linkedin", "search_posts", params,
+                       lambda: get_api().search_posts(**params), limiter=limiter)
+
+def iter_units(companies, search_terms, posts_limit):
+    """Yields (unit, source label, fetch) for every target company, then every keyword search."""
+    for company_name in companies:
+        yield f"company:{company_name}", f"company:{company_name}", \
+            lambda company_name=company_name: fetch_company_posts(company_name, posts_limit)
+    for term in search_terms:
+        yield f"search:{term}", f"search:'{term}'", lambda term=term: fetch_search_posts(term)
+
+def iter_posts(raw_posts, source_identifier, cutoff_date, seen_post_ids):
+    """Parses raw posts lazily, skipping old posts and post IDs already seen."""
+    for post in raw_posts or []:
+        post_data = extract_post_data(post, source_identifier, cutoff_date)
+        if post_data and post_data['post_id'] not in seen_post_ids:
+            seen_post_ids.add(post_data['post_id'])
+            yield post_data
+
+def stream_linkedin_posts(companies, search_terms, sink, posts_limit=POSTS_PER_COMPANY, days_back=DAYS_BACK, checkpoint=None):
     """
-    Fetches product-centric posts from specified LinkedIn companies and performs keyword searches.
+    Fetches product-centric posts from specified LinkedIn companies and keyword searches,
+    writing each parsed post straight to `sink` (an NDJSONSink) instead of keeping them in memory.
+
+    With a checkpoint, a unit (company or term) is marked done once its posts have been
+    flushed to disk, so an interrupted sweep resumes after the last durable unit. Post IDs
+    seen in previous runs are skipped and the cutoff moves up to the newest post of the
+    last successful run.
+
+    Returns:
+        int: Number of posts written
     """
-    all_posts_data = []
-    seen_post_ids = set()  # To prevent duplicate posts
+    seen_post_ids = checkpoint.seen_ids() if checkpoint else set()  # To prevent duplicate posts
     
     print(f"Starting LinkedIn data extraction...")
     print(f"Looking back {days_back} days for content\n")
     
     # Calculate cutoff date
     cutoff_date = datetime.now() - timedelta(days=days_back)
-    
-    # --- Fetch from specific companies ---
-    print("Fetching posts from target companies...")
-    for company_name in companies:
-        print(f"  Processing: {company_name}")
+    watermark = checkpoint.watermark("published_after") if checkpoint else None
+    if watermark and datetime.fromisoformat(watermark) > cutoff_date:
+        cutoff_date = datetime.fromisoformat(watermark)
+        print(f"Incremental: only posts published after {watermark}\n")
+
+    written = 0
+    unflushed_units = []
+
+    def commit_units():
+        if checkpoint:
+            for unit in unflushed_units:
+                checkpoint.mark_done(unit)
+        unflushed_units.clear()
+
+    for unit, label, fetch in iter_units(companies, search_terms, posts_limit):
+        if checkpoint and checkpoint.is_done(unit):
+            print(f"  Skipping (done earlier in this run): {label}")
+            continue
+        print(f"  Processing: {label}")
         try:
-            # Get company URN/ID
-            company_info = api.get_company(company_name)
-            
-            if not company_info:
-                print(f"    Could not find company: {company_name}")
+            raw_posts = fetch()
+            if raw_posts is None:
                 continue
-            
-            # Fetch company posts
-            company_posts = api.get_company_updates(
-                public_id=company_name,
-                max_results=posts_limit
-            )
-            
-            if company_posts:
-                added = 0
-                for post in company_posts:
-                    post_data = extract_post_data(post, f"company:{company_name}", cutoff_date)
-                    if post_data and post_data['post_id'] not in seen_post_ids:
-                        all_posts_data.append(post_data)
-                        seen_post_ids.add(post_data['post_id'])
-                        added += 1
-                
-                print(f"    Added {added} posts")
-            else:
-                print(f"    No posts found")
-            
-            # Be polite with rate limiting
-            time.sleep(random.randint(3, 6))
-            
-        except Exception as e:
-            print(f"    Error fetching from {company_name}: {e}")
-    
-    # --- Perform keyword searches ---
-    print("\nPerforming keyword searches...")
-    for term in search_terms:
-        print(f"  Searching for: '{term}'")
-        try:
-            # Search for posts containing the term
-            search_results = api.search_posts(
-                keywords=term,
-                limit=15
-            )
-            
-            if search_results:
-                added = 0
-                for post in search_results:
-                    post_data = extract_post_data(post, f"search:'{term}'", cutoff_date)
-                    if post_data and post_data['post_id'] not in seen_post_ids:
-                        all_posts_data.append(post_data)
-                        seen_post_ids.add(post_data['post_id'])
-                        added += 1
-                
-                print(f"    Added {added} unique posts")
-            else:
-                print(f"    No results found")
-            
-            # Be polite with rate limiting
-            time.sleep(random.randint(3, 6))
+
+            added = 0
+            for post_data in iter_posts(raw_posts, label, cutoff_date, seen_post_ids):
+                sink.write(post_data)
+                added += 1
+                if checkpoint:
+                    checkpoint.add_seen(post_data['post_id'])
+                    if post_data['published_date']:
+                        checkpoint.advance_watermark("published_after", post_data['published_date'])
+            written += added
+            print(f"    Added {added} posts" if added or raw_posts else "    No posts found")
+
+            unflushed_units.append(unit)
+            if not sink.buffered():
+                # The sink just flushed a batch: every unit so far is on disk
+                commit_units()
             
         except Exception as e:
-            print(f"    Error searching for '{term}': {e}")
-    
-    return pd.DataFrame(all_posts_data)
+            print(f"    Error fetching {label}: {e}")
+            limiter.report(e)
+
+    sink.flush()
+    commit_units()
+    return written
+
+def get_linkedin_product_posts(companies, search_terms, posts_limit=POSTS_PER_COMPANY, days_back=DAYS_BACK,
+                               checkpoint=None, sink_path=LINKEDIN_SINK_PATH):
+    """
+    Streams the sweep to the NDJSON sink and returns the posts of this run (including those
+    flushed by an interrupted attempt of the same run) as DataFrame chunks, so the sinks
+    never hold the whole run in memory. Rows are in extraction order; sort downstream
+    where ranking matters.
+    """
+    sink = NDJSONSink(sink_path)
+    # A new run starts an empty log; a resumed run keeps appending to its own
+    if not (checkpoint and checkpoint.run_value("sink_rotated", False)):
+        sink.rotate()
+        if checkpoint:
+            checkpoint.set_run_value("sink_rotated", True)
+    with sink:
+        stream_linkedin_posts(companies, search_terms, sink, posts_limit, days_back, checkpoint)
+
+    # A unit re-run after a crash may have appended some posts twice
+    return NDJSONFrames(sink_path, key='post_id')
 
 def extract_post_data(post, source_identifier, cutoff_date=None):
     """
@@ -215,69 +262,76 @@ def extract_post_data(post, source_identifier, cutoff_date=None):
         print(f"  Error extracting post data: {e}")
         return None
 
+@register
+class LinkedInExtractor(Extractor):
+    name = "linkedin"
+    platform = "LinkedIn"
+    outputs = [
+        ExtractorOutput("posts", "linkedin_product_marketing_posts.csv", ["post_id"], "linkedin_posts",
+                        "LinkedIn_Product_Content"),
+    ]
+
+    def check_credentials(self):
+        try:
+            get_api()
+        except MissingCredentialError:
+            raise
+        except Exception as e:
+            print(f"Failed to authenticate to LinkedIn: {e}")
+            print("Please ensure your credentials are correct and 2FA is disabled or configured properly.")
+            raise
+
+    def fetch(self, checkpoint):
+        return {"posts": get_linkedin_product_posts(TARGET_COMPANIES, LINKEDIN_PRODUCT_SEARCH_TERMS, checkpoint=checkpoint)}
+
+    def normalize(self, outputs):
+        df = outputs.get("posts")
+        if df is None or df.empty:
+            return super().normalize(outputs)
+        return pd.DataFrame({
+            "platform": self.platform,
+            "record_id": df["post_id"],
+            "text": df["post_text"],
+            "author": df["author"],
+            "url": df["post_url"],
+            "published_at": df["published_date"],
+            "engagement": df["total_engagement"],
+            "search_term_matched": df["search_term_matched"],
+            "extracted_at": df["extracted_at"],
+        }, columns=RECORD_COLUMNS)
+
+    def slack_message(self, outputs):
+        count = engagement = 0
+        for posts in outputs["posts"]:
+            count += len(posts)
+            engagement += int(posts['total_engagement'].sum())
+        return (
+            f"✨ New LinkedIn product marketing posts found! 💼\n"
+            f"Extracted {count} unique product-related LinkedIn posts.\n"
+            f"Total engagement: {engagement:,}\n"
+            f"Check the Google Sheet here: {SPREADSHEET_URL}\n"
+            f"Worksheet: TrendForgeAI\n"
+            f"Check: LinkedIn_Product_Content worksheet for the details."
+        )
+
 # --- Main Execution ---
 if __name__ == "__main__":
     print("--- Starting LinkedIn Product Marketing Data Extraction ---\n")
-    
-    linkedin_posts_df = get_linkedin_product_posts(
-        TARGET_COMPANIES, 
-        LINKEDIN_PRODUCT_SEARCH_TERMS
-    )
-    
-    # Filter out any None entries from failed extractions
-    linkedin_posts_df = linkedin_posts_df.dropna(subset=['post_id'])
-    
-    if not linkedin_posts_df.empty:
-        # Sort by total engagement
-        linkedin_posts_df = linkedin_posts_df.sort_values('total_engagement', ascending=False)
-        
-        # Save to data directory
-        output_csv_path = os.path.join("data", "linkedin_product_marketing_posts.csv")
-        linkedin_posts_df.to_csv(output_csv_path, index=False)
-        
-        print(f"\n{'='*60}")
-        print(f"Successfully extracted {len(linkedin_posts_df)} unique product-related LinkedIn posts.")
-        print(f"Data saved to {output_csv_path}")
-        print(f"{'='*60}\n")
-        
-        print("Top 5 posts by engagement:")
-        print(linkedin_posts_df[['author', 'post_text', 'total_engagement', 'published_date']].head().to_string(index=False))
-        
-        # --- Integrate with Google Sheets ---
-        try:
-            from src.utils.upload_to_sheets import upload_to_google_sheet
-            print("\n\nAttempting to upload data to Google Sheets...")
-            upload_to_google_sheet(
-                linkedin_posts_df, 
-                "1gNHWjMghm4kTVbFSgC298LgWOWhgREY2wRRzTq-yHrk",  # Spreadsheet ID from URL
-                "LinkedIn_Product_Content"
-            )
-            print("✓ Successfully uploaded to Google Sheets")
-        except ImportError:
-            print("\nWarning: src.utils.upload_to_sheets not found. Skipping Google Sheets upload.")
-        except Exception as e:
-            print(f"\nError uploading to Google Sheets: {e}")
-        
-        # --- Slack Notification Integration ---
-        try:
-            from src.utils.slack_notifier import send_slack_notification
-            
-            slack_message = (
-                f"✨ New LinkedIn product marketing posts found! 💼\n"
-                f"Extracted {len(linkedin_posts_df)} unique product-related LinkedIn posts.\n"
-                f"Total engagement: {linkedin_posts_df['total_engagement'].sum():,}\n"
-                f"Check the Google Sheet here: https://docs.google.com/spreadsheets/d/1gNHWjMghm4kTVbFSgC298LgWOWhgREY2wRRzTq-yHrk/edit?usp=sharing\n"
-                f"Worksheet: TrendForgeAI\n"
-                f"Check: LinkedIn_Product_Content worksheet for the details."
-            )
-            send_slack_notification(slack_message)
-            print("✓ Slack notification sent")
-        except ImportError:
-            print("\nSlack notification function not available.")
-        except Exception as e:
-            print(f"\nError sending Slack notification: {e}")
-    
+    try:
+        result = LinkedInExtractor().run()
+    except MissingCredentialError as e:
+        print(f"Error: {e}")
+        exit()
+    except Exception as e:
+        print(f"LinkedIn extraction failed: {e}")
+        exit()
+
+    # Top 5 of each chunk, then of those: the posts are never all in memory
+    tops = [records.nlargest(5, 'engagement') for records in iter_frames(result["records"])]
+    if tops:
+        print("\nTop 5 posts by engagement:")
+        top_posts = pd.concat(tops).nlargest(5, 'engagement')
+        print(top_posts[['author', 'text', 'engagement', 'published_at']].to_string(index=False))
     else:
         print("\nNo product marketing LinkedIn posts found or an error occurred during extraction.")
-    
     print("\n--- LinkedIn Product Marketing Data Extraction Complete ---")
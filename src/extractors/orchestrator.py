@@ -0,0 +1,169 @@
+# orchestrator.py
+"""
+Runs the registered extractors concurrently, then the data curator.
+
+Steps run on a thread pool as soon as their dependencies have finished: extractors have
+no dependencies by default (Extractor.depends_on), and the curator waits for every
+selected extractor. A full refresh therefore takes about as long as the slowest source.
+Each extractor keeps its own rate limiter and checkpoint, so they do not interfere.
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.extractors.base import DATA_DIR, EXTRACTOR_MODULES, RECORD_COLUMNS, get_extractor, iter_frames
+from src.utils.checkpoint import FULL_REFRESH, append_new_rows, read_keys
+
+CURATOR_STEP = "curator"
+RECORDS_FILENAME = "unified_records.csv" # Normalized records of all platforms
+RECORD_KEY = ["platform", "record_id"]
+
+class Step:
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.status = "pending"
+        self.seconds = 0.0
+        self.result = None
+        self.error = None
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            self.result = self.func()
+            self.status = "ok"
+        except (Exception, SystemExit) as e:
+            # SystemExit from a legacy exit() call must not take down the whole run;
+            # KeyboardInterrupt propagates so Ctrl-C stops it
+            self.error = e
+            self.status = "failed"
+        self.seconds = time.perf_counter() - started
+        return self
+
+def build_steps(names, curate=True, full_refresh=FULL_REFRESH, upload=True, notify=True, curate_options=None):
+    """Creates the extractor steps (plus the curator) with their dependencies."""
+    steps = {}
+    for name in names:
+        try:
+            extractor = get_extractor(name)(upload=upload, notify=notify)
+        except ImportError as e:
+            # e.g. linkedin-api not installed: report it, keep the other sources running
+            steps[name] = Step(name, None)
+            steps[name].status, steps[name].error = "failed", e
+            continue
+        depends_on = [dep for dep in extractor.depends_on if dep in names]
+        steps[name] = Step(name, lambda extractor=extractor: extractor.run(full_refresh), depends_on)
+
+    if curate:
+        from src.engine.data_curator import run_curation
+        steps[CURATOR_STEP] = Step(CURATOR_STEP, lambda: run_curation(**(curate_options or {})), names)
+    return steps
+
+def check_dependencies(steps):
+    """Rejects unknown dependencies and cycles before anything runs."""
+    visiting, done = set(), set()
+
+    def visit(name, path):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for dep in steps[name].depends_on:
+            if dep not in steps:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+            visit(dep, path + [name])
+        visiting.discard(name)
+        done.add(name)
+
+    for name in steps:
+        visit(name, [])
+
+def run_steps(steps, max_workers=None):
+    """Runs steps concurrently in dependency order. A step still runs if a dependency failed."""
+    check_dependencies(steps)
+    pending = {name: step for name, step in steps.items() if step.status == "pending"}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(steps))) as pool:
+        while pending or running:
+            finished = {name for name, step in steps.items() if step.status in ("ok", "failed")}
+            for name, step in list(pending.items()):
+                if all(dep in finished for dep in step.depends_on):
+                    failed = [dep for dep in step.depends_on if steps[dep].status == "failed"]
+                    if failed:
+                        print(f"[orchestrator] {name}: running despite failed dependencies ({', '.join(failed)})")
+                    step.status = "running"
+                    running[pool.submit(step.run)] = name
+                    del pending[name]
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                future.result() # Re-raises KeyboardInterrupt from a step
+    return steps
+
+def write_records(steps, data_dir=DATA_DIR, full_refresh=FULL_REFRESH):
+    """
+    Appends the normalized records of the successful extractors to unified_records.csv.
+
+    Records are written frame by frame (chunked extractors yield one per chunk), so a large
+    run is never assembled in memory; the file's keys are read once for all frames.
+    """
+    path = os.path.join(data_dir, RECORDS_FILENAME)
+    existing_keys = set() if full_refresh else read_keys(path, RECORD_KEY)
+    frames = written = 0
+    for name, step in steps.items():
+        if step.status != "ok" or not isinstance(step.result, dict):
+            continue
+        try:
+            for records in iter_frames(step.result.get("records")):
+                # Only the first frame may rewrite the file on a full refresh
+                new_rows = append_new_rows(records[RECORD_COLUMNS], path, RECORD_KEY,
+                                           full_refresh and frames == 0, existing_keys)
+                frames += 1
+                written += len(new_rows)
+        except Exception as e:
+            print(f"[orchestrator] Could not write the records of {name}: {e}")
+    if frames:
+        print(f"[orchestrator] Appended {written} normalized records to {path}")
+    return written
+
+def print_summary(steps, total_seconds):
+    print("\n" + "=" * 60)
+    print("   Run summary")
+    print("=" * 60)
+    for name, step in steps.items():
+        detail = ""
+        if step.status == "failed":
+            detail = f"error: {step.error}"
+        elif isinstance(step.result, dict) and "rows" in step.result:
+            detail = ", ".join(f"{key}={rows}" for key, rows in step.result["rows"].items())
+        print(f"  {name:<14} {step.status:<7} {step.seconds:>8.1f}s  {detail}")
+    sequential = sum(step.seconds for step in steps.values())
+    print("-" * 60)
+    print(f"  Wall time {total_seconds:.1f}s (sum of steps {sequential:.1f}s)")
+    print("=" * 60)
+
+def run_pipeline(names=None, curate=True, max_workers=None, full_refresh=FULL_REFRESH,
+                 upload=True, notify=True, curate_options=None):
+    """
+    Runs the selected extractors concurrently, then the curator.
+
+    Args:
+        names: Extractor names (defaults to all of EXTRACTOR_MODULES)
+        curate: Run the data curator once the extractors are done
+        max_workers: Thread pool size (defaults to one thread per step)
+        upload / notify: Forwarded to the extractors (Google Sheets upload / Slack)
+        curate_options: Keyword arguments for run_curation()
+
+    Returns:
+        dict: Steps by name, with status, seconds, result and error
+    """
+    names = list(names or EXTRACTOR_MODULES)
+    started = time.perf_counter()
+    steps = build_steps(names, curate, full_refresh, upload, notify, curate_options)
+    print(f"[orchestrator] Running {', '.join(steps)}")
+    run_steps(steps, max_workers)
+    write_records(steps, full_refresh=full_refresh)
+    print_summary(steps, time.perf_counter() - started)
+    return steps
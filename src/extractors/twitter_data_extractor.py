@@ -1,30 +1,61 @@
-# twitter_data_extractor.py (DEMO-SAFE)
+# twitter_data_extractor.py (DEMO-SAFE by default, see TRENDFORGE_TWITTER_MODE)
 import tweepy
 import pandas as pd
-import time
-import random
 import os
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 
+from src.extractors.base import RECORD_COLUMNS, Extractor, ExtractorOutput, register
+from src.utils.credential_loader import MissingCredentialError, get_credential
+from src.utils.http_cache import Fetched, cached_call
+from src.utils.rate_limiter import get_limiter
+
 # ---------------- CONFIG ----------------
-DEMO_MODE = True   # keep True for demo (single-term, small results)
-DEFAULT_MAX_RESULTS = 10 if DEMO_MODE else 50
+# Demo mode (default): single term, one small page. Set TRENDFORGE_TWITTER_MODE=production
+# to page through every term's full time window concurrently.
+DEMO_MODE = os.environ.get("TRENDFORGE_TWITTER_MODE", "demo").lower() != "production"
+DEFAULT_MAX_RESULTS = 10 if DEMO_MODE else 10_000 # Tweets per term
 RECENT_TWEETS_DAYS = 7
+PAGE_SIZE = 100 # search_recent_tweets accepts 10-100 per page
+MAX_WORKERS = 1 if DEMO_MODE else 4 # Terms fetched concurrently (sharing the limiter)
+MAX_RATE_LIMIT_RETRIES = 3 # Per page, after sleeping until the window resets
+
+TWEET_FIELDS = ['created_at', 'text', 'public_metrics', 'entities', 'author_id']
+USER_FIELDS = ['username', 'name', 'public_metrics']
+
+# public_metrics field -> output column
+METRIC_COLUMNS = {
+    "like_count": "likes",
+    "retweet_count": "retweets",
+    "reply_count": "replies",
+    "quote_count": "quotes",
+    "impression_count": "impressions",
+}
+# entities field -> (item key, output column)
+ENTITY_COLUMNS = {
+    "hashtags": ("tag", "hashtags"),
+    "mentions": ("username", "mentions"),
+    "urls": ("expanded_url", "urls"),
+}
+
+limiter = get_limiter("twitter")
 
-# --- 1. Load API Credentials from credentials.py ---
-try:
-    # credentials.py must contain BEARER_TOKEN (you can include others but only BEARER_TOKEN is required for demo)
-    from credentials import BEARER_TOKEN
-except ImportError:
-    print("Error: credentials.py not found or missing BEARER_TOKEN. Please create it with your Twitter BEARER_TOKEN.")
-    exit()
-
-# --- 2. Initialize Tweepy Client (bearer-only, wait on rate limit) ---
-try:
-    client = tweepy.Client(bearer_token=BEARER_TOKEN, wait_on_rate_limit=True)
-except Exception as e:
-    print("Failed to create Tweepy client with bearer token:", e)
-    exit()
+# --- 1/2. Tweepy Client (bearer-only), created on first use in each worker thread ---
+# credentials.py must contain BEARER_TOKEN (you can include others but only BEARER_TOKEN is required for demo)
+# The client returns the raw requests.Response: its JSON body is plain data that the HTTP cache
+# can store and replay (tweepy's Response/Tweet models pickle but cannot be unpickled).
+# wait_on_rate_limit is off: 429s reach search_page, where the shared limiter pauses every
+# term until the reset instead of tweepy sleeping inside one thread.
+# Each client wraps a requests.Session, so terms running concurrently get their own.
+_thread_local = threading.local()
+
+def get_client():
+    if not hasattr(_thread_local, "client"):
+        _thread_local.client = tweepy.Client(bearer_token=get_credential("BEARER_TOKEN"), wait_on_rate_limit=False,
+                                             return_type=requests.Response)
+    return _thread_local.client
 
 # --- 3. Define Search Terms ---
 FULL_PRODUCT_SEARCH_TERMS = [
@@ -39,93 +70,220 @@ if DEMO_MODE:
 else:
     PRODUCT_SEARCH_TERMS = FULL_PRODUCT_SEARCH_TERMS
 
-# ---------------- Extractor (simple demo-friendly) ----------------
-def get_product_marketing_tweets(search_terms, max_results=DEFAULT_MAX_RESULTS, days_ago=RECENT_TWEETS_DAYS):
-    rows = []
-    start_time = datetime.now(timezone.utc) - timedelta(days=days_ago)
-    print(f"Starting extraction for {len(search_terms)} term(s), looking back {days_ago} days. max_results={max_results}")
+# ---------------- Extractor ----------------
+def collect_rows(frames, checkpoint):
+    """Rows of this call, plus rows staged by earlier attempts of a resumed run."""
+    if checkpoint:
+        frames = checkpoint.staged_frames("term:")
+    frames = [df for df in frames if not df.empty]
+    return pd.concat(frames, ignore_index=True).drop_duplicates(subset=["tweet_id"]) if frames else pd.DataFrame()
 
-    for term in search_terms:
-        print(f"\nSearching for term: {term}")
+def int_column(df, column):
+    if column not in df.columns:
+        return pd.Series(0, index=df.index, dtype="int64")
+    return pd.to_numeric(df[column], errors="coerce").fillna(0).astype("int64")
+
+def entity_column(df, column, key):
+    if column not in df.columns:
+        return pd.Series([[] for _ in range(len(df))], index=df.index, dtype=object)
+    return df[column].map(lambda items: [item[key] for item in items if key in item] if isinstance(items, list) else [])
+
+def parse_page(payload, term):
+    """
+    Turns one search_recent_tweets JSON payload ({"data", "includes", "meta"}) into a typed DataFrame.
+    The raw tweet/user payloads are flattened with json_normalize, so metrics and entities
+    become columns in one pass instead of per-row attribute lookups.
+    """
+    raw = pd.json_normalize(payload.get("data") or [])
+    if raw.empty:
+        return pd.DataFrame()
+
+    df = pd.DataFrame({
+        "platform": "Twitter",
+        "tweet_id": raw["id"].astype(str),
+        "created_at": raw["created_at"] if "created_at" in raw.columns else None,
+        "text": raw["text"],
+        "search_term_matched": term,
+    })
+    for field, column in METRIC_COLUMNS.items():
+        df[column] = int_column(raw, f"public_metrics.{field}")
+    df["author_id"] = raw["author_id"].astype(str) if "author_id" in raw.columns else None
+
+    includes = payload.get("includes") or {}
+    users = pd.json_normalize(includes.get("users") or [])
+    if not users.empty:
+        users = pd.DataFrame({
+            "author_id": users["id"].astype(str),
+            "author_username": users.get("username"),
+            "author_name": users.get("name"),
+            "author_followers": int_column(users, "public_metrics.followers_count"),
+        }).drop_duplicates(subset=["author_id"])
+        df = df.merge(users, on="author_id", how="left")
+        df["author_followers"] = df["author_followers"].fillna(0).astype("int64")
+    else:
+        df["author_username"] = df["author_name"] = None
+        df["author_followers"] = 0
+
+    for field, (key, column) in ENTITY_COLUMNS.items():
+        df[column] = entity_column(raw, f"entities.{field}", key).values
+    return df
+
+def fetch_page(params):
+    """Live search_recent_tweets call; the x-rate-limit-* headers go to the limiter"""
+    response = get_client().search_recent_tweets(**params)
+    return Fetched(response.json(), response.headers)
+
+def search_page(params, window, cache_params, next_token, term):
+    """One page of search results as a JSON payload; sleeps until the rate-limit window resets on 429s."""
+    page_params = dict(params, next_token=next_token) if next_token else params
+    page_cache_params = dict(cache_params, next_token=next_token)
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
         try:
-            query = f'{term} -is:retweet -is:reply lang:en'
-            resp = client.search_recent_tweets(
-                query=query,
-                tweet_fields=['created_at', 'text', 'public_metrics', 'entities', 'author_id'],
-                user_fields=['username', 'name', 'public_metrics'],
-                expansions=['author_id'],
-                start_time=start_time,
-                max_results=max(5, min(max_results, 100))
+            return cached_call(
+                "twitter", "search_recent_tweets", page_cache_params,
+                lambda: fetch_page(dict(page_params, **window)),
+                limiter=limiter
             )
+        except tweepy.errors.TooManyRequests as e:
+            if attempt == MAX_RATE_LIMIT_RETRIES:
+                raise
+            # Pauses the shared limiter until x-rate-limit-reset, so other terms wait too
+            limiter.report(e)
+            print(f"  Rate limited on '{term}', retrying after the reset ({attempt + 1}/{MAX_RATE_LIMIT_RETRIES})")
 
-            users = {}
-            if hasattr(resp, "includes") and resp.includes:
-                for u in resp.includes.get("users", []) or []:
-                    users[str(u["id"])] = u
-
-            if resp.data:
-                added = 0
-                for t in resp.data:
-                    tid = str(t.id)
-                    author = users.get(str(t.author_id))
-                    rows.append({
-                        "platform": "Twitter",
-                        "tweet_id": tid,
-                        "created_at": t.created_at.isoformat() if t.created_at else None,
-                        "text": t.text,
-                        "search_term_matched": term,
-                        "likes": t.public_metrics.get("like_count", 0) if t.public_metrics else 0,
-                        "retweets": t.public_metrics.get("retweet_count", 0) if t.public_metrics else 0,
-                        "replies": t.public_metrics.get("reply_count", 0) if t.public_metrics else 0,
-                        "quotes": t.public_metrics.get("quote_count", 0) if t.public_metrics else 0,
-                        "impressions": t.public_metrics.get("impression_count", 0) if t.public_metrics else 0,
-                        "author_id": t.author_id,
-                        "author_username": author.get("username") if author else None,
-                        "author_name": author.get("name") if author else None,
-                        "author_followers": author.get("public_metrics", {}).get("followers_count", 0) if author else 0,
-                        "hashtags": [h["tag"] for h in t.entities.get("hashtags", [])] if getattr(t, "entities", None) and t.entities.get("hashtags") else [],
-                        "mentions": [m["username"] for m in t.entities.get("mentions", [])] if getattr(t, "entities", None) and t.entities.get("mentions") else [],
-                        "urls": [u["expanded_url"] for u in t.entities.get("urls", [])] if getattr(t, "entities", None) and t.entities.get("urls") else [],
-                    })
-                    added += 1
-                print(f"  Added {added} tweets (returned: {len(resp.data)})")
-            else:
-                print("  No tweets returned for this term.")
-
-            # short polite pause (demo-friendly)
-            time.sleep(random.randint(2, 6))
+def fetch_term(term, start_time, max_results, days_ago, checkpoint):
+    """Pages through all results for one term (up to max_results) and returns them as a DataFrame."""
+    query = f'{term} -is:retweet -is:reply lang:en'
+    window = {"start_time": start_time}
+    since_id = checkpoint.watermark(f"since_id:{term}") if checkpoint else None
+    if since_id:
+        # Only the delta since the newest tweet of the last run
+        window = {"since_id": since_id}
+        print(f"  Incremental '{term}': since_id={since_id}")
 
-        except tweepy.errors.TooManyRequests as e:
-            print("  Rate limit (429) encountered while demoing. Error:", e)
-            print("  Demo aborted to avoid long waits. Run the mock generator instead or try again later.")
-            return pd.DataFrame(rows)
-        except tweepy.errors.TweepyException as e:
-            print("  Tweepy error:", e)
-        except Exception as e:
-            print("  Unexpected error:", e)
+    params = dict(
+        query=query,
+        tweet_fields=TWEET_FIELDS,
+        user_fields=USER_FIELDS,
+        expansions=['author_id'],
+        max_results=max(10, min(max_results, PAGE_SIZE)),
+    )
+    # The cache key uses days_ago rather than the moving start_time
+    cache_params = dict(params, since_id=since_id, days_ago=days_ago)
+    seen = checkpoint.seen_ids() if checkpoint else set()
+
+    pages = []
+    fetched = 0
+    newest_id = None
+    next_token = None
+    while fetched < max_results:
+        payload = search_page(params, window, cache_params, next_token, term)
+        meta = payload.get("meta") or {}
+        if newest_id is None and meta.get("newest_id"):
+            newest_id = int(meta["newest_id"]) # The first page holds the newest tweet
+        page = parse_page(payload, term)
+        fetched += len(page)
+        if not page.empty:
+            page = page[~page["tweet_id"].isin(seen)]
+            pages.append(page)
+        next_token = meta.get("next_token")
+        if not next_token or DEMO_MODE:
+            break
+
+    df = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+    if checkpoint:
+        if not df.empty:
+            checkpoint.add_seen_many(df["tweet_id"])
+        if newest_id:
+            checkpoint.advance_watermark(f"since_id:{term}", newest_id)
+        checkpoint.mark_done(f"term:{term}", df)
+    print(f"  '{term}': added {len(df)} tweets (returned: {fetched})")
+    return df
 
-    return pd.DataFrame(rows)
+def get_product_marketing_tweets(search_terms, max_results=DEFAULT_MAX_RESULTS, days_ago=RECENT_TWEETS_DAYS,
+                                 checkpoint=None, max_workers=MAX_WORKERS):
+    """
+    Searches recent tweets for every term, following next_token through the whole time window
+    (up to max_results tweets per term). Terms run concurrently and share the rate limiter.
+
+    With a checkpoint, terms finished earlier in the run are skipped and each term only
+    fetches tweets newer than its since_id watermark from the last successful run.
+    """
+    start_time = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    mode = "demo" if DEMO_MODE else "production"
+    print(f"Starting {mode} extraction for {len(search_terms)} term(s), looking back {days_ago} days. "
+          f"max_results={max_results} per term, {max_workers} worker(s)")
+
+    pending_terms = []
+    for term in search_terms:
+        if checkpoint and checkpoint.is_done(f"term:{term}"):
+            print(f"\nSkipping term already done in this run: {term}")
+        else:
+            pending_terms.append(term)
 
+    frames = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(fetch_term, term, start_time, max_results, days_ago, checkpoint): term
+            for term in pending_terms
+        }
+        for future in as_completed(futures):
+            term = futures[future]
+            try:
+                frames.append(future.result())
+            except tweepy.errors.TooManyRequests as e:
+                print(f"  Still rate limited on '{term}' after {MAX_RATE_LIMIT_RETRIES} retries: {e}")
+            except tweepy.errors.TweepyException as e:
+                print(f"  Tweepy error on '{term}':", e)
+                limiter.report(e)
+            except Exception as e:
+                print(f"  Unexpected error on '{term}':", e)
+                limiter.report(e)
+
+    return collect_rows(frames, checkpoint)
+
+@register
+class TwitterExtractor(Extractor):
+    name = "twitter"
+    platform = "Twitter"
+    outputs = [
+        ExtractorOutput("tweets", "product_marketing_tweets.csv", ["tweet_id"], "tweets", "Twitter_Product_Content"),
+    ]
+
+    def check_credentials(self):
+        get_client()
+
+    def fetch(self, checkpoint):
+        return {"tweets": get_product_marketing_tweets(PRODUCT_SEARCH_TERMS, checkpoint=checkpoint)}
+
+    def normalize(self, outputs):
+        df = outputs.get("tweets")
+        if df is None or df.empty:
+            return super().normalize(outputs)
+        engagement = df[["likes", "retweets", "replies", "quotes"]].fillna(0).astype(int).sum(axis=1)
+        return pd.DataFrame({
+            "platform": self.platform,
+            "record_id": df["tweet_id"].astype(str),
+            "text": df["text"],
+            "author": df["author_username"],
+            "url": "https://twitter.com/i/web/status/" + df["tweet_id"].astype(str),
+            "published_at": df["created_at"],
+            "engagement": engagement,
+            "search_term_matched": df["search_term_matched"],
+            "extracted_at": datetime.now().isoformat(),
+        }, columns=RECORD_COLUMNS)
 
 if __name__ == "__main__":
-    print("--- Starting Product Marketing Tweet Extraction (DEMO-SAFE) ---")
-    df = get_product_marketing_tweets(PRODUCT_SEARCH_TERMS)
-    if df is not None and not df.empty:
-        out = os.path.join("data", "product_marketing_tweets.csv")
-        df.to_csv(out, index=False)
-        print(f"\nSaved {len(df)} rows to {out}\n")
-        print(df.head().to_string(index=False))
-        
-        # --- Integrate with Google Sheets ---
-        try:
-            from src.utils.upload_to_sheets import upload_to_google_sheet
-            print("\nAttempting to upload data to Google Sheets...")
-            upload_to_google_sheet(df, "1gNHWjMghm4kTVbFSgC298LgWOWhgREY2wRRzTq-yHrk", "Twitter_Product_Content")
-            print("✓ Successfully uploaded to Google Sheets")
-        except ImportError:
-            print("\nWarning: src.utils.upload_to_sheets not found. Skipping Google Sheets upload.")
-        except Exception as e:
-            print(f"\nError uploading to Google Sheets: {e}")
-    else:
+    mode_label = "DEMO-SAFE" if DEMO_MODE else "PRODUCTION"
+    print(f"--- Starting Product Marketing Tweet Extraction ({mode_label}) ---")
+    try:
+        result = TwitterExtractor().run()
+    except MissingCredentialError as e:
+        print(f"Error: {e}")
+        exit()
+    except tweepy.errors.TweepyException as e:
+        print("Failed to create Tweepy client with bearer token:", e)
+        exit()
+    if not result["rows"]["tweets"]:
         print("\nNo data saved (empty DataFrame).")
-    print("\n--- Extraction (DEMO-SAFE) Complete ---")
+    print(f"\n--- Extraction ({mode_label}) Complete ---")
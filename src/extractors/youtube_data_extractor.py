@@ -1,26 +1,22 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import googleapiclient.discovery
+import googleapiclient.errors
 import pandas as pd
 from datetime import datetime, timedelta
-import time
-import random
 
-# --- 1. Load API Credentials from credentials.py ---
-try:
-    from credentials import YOUTUBE_API_KEY
-except ImportError:
-    print("Error: YOUTUBE_API_KEY not found in credentials.py. Please add it.")
-    exit()
+from src.extractors.base import RECORD_COLUMNS, SPREADSHEET_URL, Extractor, ExtractorOutput, register
+from src.utils import http_cache
+from src.utils.credential_loader import MissingCredentialError, get_credential
+from src.utils.http_cache import Fetched, cached_call
+from src.utils.rate_limiter import get_limiter
 
-# --- 2. Initialize YouTube API Client ---
+# --- 1. YouTube API Client ---
 # API service name and version
 API_SERVICE_NAME = "youtube"
 API_VERSION = "v3"
-
-# Build the client
-youtube = googleapiclient.discovery.build(
-    API_SERVICE_NAME, API_VERSION, developerKey=YOUTUBE_API_KEY
-)
+# The client is built lazily by get_client() from YOUTUBE_API_KEY in credentials.py
 
 # --- 3. Define Search Parameters ---
 YOUTUBE_PRODUCT_SEARCH_TERMS = [
@@ -42,136 +38,318 @@ YOUTUBE_PRODUCT_SEARCH_TERMS = [
     "\"smart home devices\"",
 ]
 
-MAX_RESULTS_PER_QUERY = 50 # Max 50 per page, can get up to 500 per query with pagination
+MAX_RESULTS_PER_QUERY = 50 # Results per search term; pages of 50 are fetched via nextPageToken up to this total
 DAYS_AGO = 7 # Look for videos published in the last N days
 
-def get_product_marketing_videos(search_terms, max_results=MAX_RESULTS_PER_QUERY, days_ago=DAYS_AGO):
+MAX_WORKERS = 6 # Concurrent API calls
+VIDEOS_BATCH_SIZE = 50 # Max video IDs per videos.list request
+
+# YouTube Data API quota cost (units) per call, see developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+    "search.list": 100,
+    "videos.list": 1,
+}
+DAILY_QUOTA_UNITS = 10_000 # Default project quota
+
+# Shared by all worker threads
+limiter = get_limiter("youtube")
+
+class QuotaExceeded(Exception):
+    pass
+
+class QuotaTracker:
+    """Thread-safe accounting of YouTube quota units spent by this run."""
+
+    def __init__(self, budget=DAILY_QUOTA_UNITS):
+        self.budget = budget
+        self.used = 0
+        self.calls = {method: 0 for method in QUOTA_COSTS}
+        self._lock = threading.Lock()
+
+    def reserve(self, method, keep=0):
+        """
+        Reserves the units for one call, raising QuotaExceeded if the budget would be exceeded.
+        `keep` units are held back for later calls (e.g. videos.list after the searches).
+        """
+        cost = QUOTA_COSTS[method]
+        with self._lock:
+            if self.used + cost + keep > self.budget:
+                raise QuotaExceeded(f"{method} needs {cost} units, {self.budget - self.used} left")
+            self.used += cost
+            self.calls[method] += 1
+
+    def exhaust(self):
+        """Marks the budget as spent (e.g. after a quotaExceeded response)."""
+        with self._lock:
+            self.used = self.budget
+
+    @staticmethod
+    def videos_cost(num_terms, max_results):
+        # Worst case: every result is a new video
+        return -(-num_terms * max_results // VIDEOS_BATCH_SIZE) * QUOTA_COSTS["videos.list"]
+
+    def estimate(self, num_terms, max_results):
+        pages = num_terms * -(-max_results // 50)
+        return pages * QUOTA_COSTS["search.list"] + self.videos_cost(num_terms, max_results)
+
+    def summary(self):
+        calls = ", ".join(f"{method}={count}" for method, count in self.calls.items())
+        return f"{self.used}/{self.budget} quota units ({calls})"
+
+# googleapiclient/httplib2 objects are not thread-safe, so each worker thread builds its own client
+_thread_local = threading.local()
+
+def get_client():
+    if not hasattr(_thread_local, "youtube"):
+        _thread_local.youtube = googleapiclient.discovery.build(
+            API_SERVICE_NAME, API_VERSION, developerKey=get_credential("YOUTUBE_API_KEY")
+        )
+    return _thread_local.youtube
+
+def execute_with_headers(request):
+    """Executes a googleapiclient request, keeping the HTTP response headers for the limiter"""
+    headers = {}
+    postproc = request.postproc
+
+    def keep_headers(resp, content):
+        headers.update(resp)
+        return postproc(resp, content)
+
+    request.postproc = keep_headers
+    return Fetched(request.execute(), headers)
+
+def is_quota_error(error):
+    return error.resp.status == 403 and b"quotaExceeded" in (error.content or b"")
+
+def search_term(term, published_after, max_results, quota, keep=0, window_key=None):
+    """
+    Runs search().list for one term, following nextPageToken until max_results are collected.
+    Stops early (keeping the pages already fetched) once the quota budget is reached.
+    window_key stands in for publishedAfter in the HTTP cache key, which moves with the clock.
+
+    Returns:
+        list: Video IDs in result order
+    """
+    video_ids = []
+    page_token = None
+
+    while len(video_ids) < max_results:
+        try:
+            quota.reserve("search.list", keep=keep)
+        except QuotaExceeded:
+            if not video_ids:
+                raise
+            print(f"  Quota budget reached, stopping pagination for '{term}' at {len(video_ids)} videos")
+            break
+        params = dict(
+            part="snippet",
+            q=term,
+            type="video", # We only want videos
+            order="relevance", # Sort by relevance
+            publishedAfter=published_after, # Only recent videos
+            maxResults=min(50, max_results - len(video_ids)),
+            relevanceLanguage="en", # Filter for English videos
+            pageToken=page_token,
+        )
+        cache_params = dict(params, publishedAfter=window_key or published_after)
+        response = cached_call("youtube", "search.list", cache_params,
+                               lambda: execute_with_headers(get_client().search().list(**params)), limiter=limiter)
+
+        video_ids.extend(item['id']['videoId'] for item in response.get('items', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+
+    return video_ids
+
+def fetch_video_details(batch_ids, quota):
+    """Runs one videos().list call for up to 50 IDs."""
+    quota.reserve("videos.list")
+    params = dict(part="snippet,statistics", id=",".join(batch_ids))
+    response = cached_call("youtube", "videos.list", params,
+                           lambda: execute_with_headers(get_client().videos().list(**params)), limiter=limiter)
+    return response.get('items', [])
+
+def build_video_info(video_item, term):
+    snippet = video_item['snippet']
+    stats = video_item.get('statistics', {}) # statistics might be missing for some videos
+
+    return {
+        "platform": "YouTube",
+        "video_id": video_item['id'],
+        "search_term_matched": term,
+        "title": snippet['title'],
+        "description": snippet['description'],
+        "published_at": snippet['publishedAt'],
+        "channel_title": snippet['channelTitle'],
+        "channel_id": snippet['channelId'],
+        "view_count": stats.get('viewCount', 0),
+        "like_count": stats.get('likeCount', 0), # Likes might be disabled/hidden
+        "comment_count": stats.get('commentCount', 0), # Comments might be disabled
+        "tags": snippet.get('tags', []), # Hashtags in description or video tags
+        # You can add more fields if needed, e.g., default_thumbnail.url
+        "thumbnail_url": snippet['thumbnails']['high']['url'] if 'thumbnails' in snippet and 'high' in snippet['thumbnails'] else None,
+    }
+
+def report_http_error(error, context):
+    print(f"  YouTube API HTTP Error for {context}: {error}")
+    limiter.report(error)
+    if error.resp.status == 403: # Forbidden, often means API Key issues or quota exceeded
+        print("  Quota Exceeded or API Key issue. Check your Google Cloud Console for daily quota.")
+    elif error.resp.status == 400: # Bad Request
+        print("  Bad request. Check your search query parameters.")
+
+def get_product_marketing_videos(search_terms, max_results=MAX_RESULTS_PER_QUERY, days_ago=DAYS_AGO,
+                                 max_workers=MAX_WORKERS, quota_budget=DAILY_QUOTA_UNITS, checkpoint=None):
     """
     Searches YouTube for product-centric videos and extracts relevant data.
+
+    Search terms run concurrently on a bounded thread pool. The de-duplicated video IDs from
+    all terms are then fetched in full 50-ID videos().list batches, also concurrently.
+    Every call is charged against a QuotaTracker so a sweep never exceeds quota_budget.
+
+    With a checkpoint, searches finished earlier in the run are reused, publishedAfter starts
+    at the newest video of the last successful run, and videos seen before are skipped.
     """
     all_video_data = []
+    quota = QuotaTracker(quota_budget)
     
     # Calculate `publishedAfter` for recent videos
     published_after = (datetime.utcnow() - timedelta(days=days_ago)).isoformat("T") + "Z"
+    window_key = f"{days_ago}d"
+    watermark = checkpoint.watermark("published_after") if checkpoint else None
+    if watermark and watermark > published_after:
+        published_after = window_key = watermark
+        print(f"Incremental: only videos published after {published_after}")
 
     print(f"Starting YouTube data extraction for {len(search_terms)} terms, looking back {days_ago} days...")
+    print(f"Estimated quota (worst case): {quota.estimate(len(search_terms), max_results)} of {quota_budget} units")
     
-    # Use a set to store unique video IDs to avoid duplicates
-    seen_video_ids = set()
+    # Map each unique video ID to the first term that found it (in search term order)
+    term_results = {}
+    pending_terms = []
+    for term in search_terms:
+        if checkpoint and checkpoint.is_done(f"search:{term}"):
+            staged = checkpoint.staged_frame(f"search:{term}")
+            term_results[term] = staged["video_id"].tolist() if not staged.empty else []
+            print(f"  Reusing {len(term_results[term])} videos for '{term}' from the interrupted run")
+        else:
+            pending_terms.append(term)
+
+    # Hold back enough units to fetch statistics for everything the searches can return
+    keep = QuotaTracker.videos_cost(len(pending_terms), max_results)
 
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(search_term, term, published_after, max_results, quota, keep, window_key): term
+            for term in pending_terms
+        }
+        for future in as_completed(futures):
+            term = futures[future]
+            try:
+                term_results[term] = future.result()
+                print(f"  Found {len(term_results[term])} potential videos for '{term}'")
+                if checkpoint:
+                    checkpoint.mark_done(f"search:{term}", pd.DataFrame({"video_id": term_results[term]}))
+            except QuotaExceeded as e:
+                print(f"  Skipped '{term}': quota budget reached ({e})")
+            except googleapiclient.errors.HttpError as e:
+                report_http_error(e, f"term '{term}'")
+                if is_quota_error(e):
+                    quota.exhaust()
+                print("  Skipping to next term due to API error.")
+            except Exception as e:
+                print(f"  An unexpected error occurred for term '{term}': {e}")
+
+    video_terms = {}
     for term in search_terms:
-        print(f"\nSearching for term: '{term}'")
-        try:
-            # Perform the search request
-            request = youtube.search().list(
-                part="snippet",
-                q=term,
-                type="video", # We only want videos
-                order="relevance", # Sort by relevance
-                publishedAfter=published_after, # Only recent videos
-                maxResults=max_results,
-                relevanceLanguage="en", # Filter for English videos
-            )
-            response = request.execute()
-
-            video_ids_for_stats = []
-            if response.get('items'):
-                print(f"  Found {len(response['items'])} potential videos for '{term}'")
-                for item in response['items']:
-                    video_id = item['id']['videoId']
-                    if video_id not in seen_video_ids:
-                        video_ids_for_stats.append(video_id)
-                        seen_video_ids.add(video_id)
-            else:
-                print(f"  No videos found for '{term}' in the last {days_ago} days.")
-
-            # If we found video IDs, get their statistics (views, likes, comments)
-            if video_ids_for_stats:
-                # Max 50 video IDs per videos.list request
-                for i in range(0, len(video_ids_for_stats), 50):
-                    batch_ids = video_ids_for_stats[i:i+50]
-                    videos_request = youtube.videos().list(
-                        part="snippet,statistics",
-                        id=",".join(batch_ids)
-                    )
-                    videos_response = videos_request.execute()
-
-                    for video_item in videos_response.get('items', []):
-                        snippet = video_item['snippet']
-                        stats = video_item.get('statistics', {}) # statistics might be missing for some videos
-
-                        video_info = {
-                            "platform": "YouTube",
-                            "video_id": video_item['id'],
-                            "search_term_matched": term,
-                            "title": snippet['title'],
-                            "description": snippet['description'],
-                            "published_at": snippet['publishedAt'],
-                            "channel_title": snippet['channelTitle'],
-                            "channel_id": snippet['channelId'],
-                            "view_count": stats.get('viewCount', 0),
-                            "like_count": stats.get('likeCount', 0), # Likes might be disabled/hidden
-                            "comment_count": stats.get('commentCount', 0), # Comments might be disabled
-                            "tags": snippet.get('tags', []), # Hashtags in description or video tags
-                            # You can add more fields if needed, e.g., default_thumbnail.url
-                            "thumbnail_url": snippet['thumbnails']['high']['url'] if 'thumbnails' in snippet and 'high' in snippet['thumbnails'] else None,
-                        }
-                        all_video_data.append(video_info)
-            
-            # Be polite to the API
-            time.sleep(random.randint(5, 15))
-
-        except googleapiclient.errors.HttpError as e:
-            print(f"  YouTube API HTTP Error for term '{term}': {e}")
-            if e.resp.status == 403: # Forbidden, often means API Key issues or quota exceeded
-                print("  Quota Exceeded or API Key issue. Check your Google Cloud Console for daily quota.")
-                # You might want to break here if it's a hard quota
-            elif e.resp.status == 400: # Bad Request
-                print("  Bad request. Check your search query parameters.")
-            print("  Skipping to next term due to API error.")
-        except Exception as e:
-            print(f"  An unexpected error occurred for term '{term}': {e}")
+        for video_id in term_results.get(term, []):
+            if checkpoint and checkpoint.has_seen(video_id):
+                continue
+            video_terms.setdefault(video_id, term)
+
+    video_ids = list(video_terms)
+    batches = [video_ids[i:i + VIDEOS_BATCH_SIZE] for i in range(0, len(video_ids), VIDEOS_BATCH_SIZE)]
+    print(f"\nFetching statistics for {len(video_ids)} unique videos in {len(batches)} batch(es)...")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(fetch_video_details, batch, quota) for batch in batches]
+        for future in as_completed(futures):
+            try:
+                for video_item in future.result():
+                    all_video_data.append(build_video_info(video_item, video_terms[video_item['id']]))
+            except QuotaExceeded as e:
+                print(f"  Skipped a videos.list batch: quota budget reached ({e})")
+            except googleapiclient.errors.HttpError as e:
+                report_http_error(e, "videos.list batch")
+                if is_quota_error(e):
+                    quota.exhaust()
+            except Exception as e:
+                print(f"  An unexpected error occurred fetching video details: {e}")
+
+    print(f"Quota used: {quota.summary()}")
+    if http_cache.CACHE_MODE != "off":
+        print(http_cache.summary())
 
+    # Keep a deterministic order independent of thread completion order
+    order = {video_id: i for i, video_id in enumerate(video_ids)}
+    all_video_data.sort(key=lambda row: order[row['video_id']])
+
+    if checkpoint:
+        for row in all_video_data:
+            checkpoint.add_seen(row['video_id'])
+            checkpoint.advance_watermark("published_after", row['published_at'])
     return pd.DataFrame(all_video_data)
 
-# --- Main Execution ---
-if __name__ == "__main__":
-    print("--- Starting YouTube Product Marketing Video Extraction ---")
-    youtube_videos_df = get_product_marketing_videos(YOUTUBE_PRODUCT_SEARCH_TERMS)
+@register
+class YouTubeExtractor(Extractor):
+    name = "youtube"
+    platform = "YouTube"
+    outputs = [
+        ExtractorOutput("videos", "youtube_product_marketing_videos.csv", ["video_id"], "youtube_videos",
+                        "YouTube_Product_Content"),
+    ]
 
-    if not youtube_videos_df.empty:
-        output_csv_path = os.path.join("data", "youtube_product_marketing_videos.csv")
-        youtube_videos_df.to_csv(output_csv_path, index=False)
-        print(f"\nSuccessfully extracted {len(youtube_videos_df)} unique product-related YouTube videos.")
-        print(f"Data saved to {output_csv_path}")
-        print("\nFirst 5 rows of extracted data:")
-        print(youtube_videos_df.head())
+    def check_credentials(self):
+        get_client()
 
-        # --- Integrate with Google Sheets ---
-        try:
-            from src.utils.upload_to_sheets import upload_to_google_sheet
-            print("\nAttempting to upload data to Google Sheets...")
-            upload_to_google_sheet(youtube_videos_df, "1gNHWjMghm4kTVbFSgC298LgWOWhgREY2wRRzTq-yHrk", "YouTube_Product_Content")
-        except ImportError:
-            print("\nWarning: src.utils.upload_to_sheets not found. Skipping Google Sheets upload.")
-        except Exception as e:
-            print(f"\nError uploading to Google Sheets: {e}")
-
-    else:
-        print("\nNo product marketing videos found or an error occurred during extraction.")
-    print("\n--- YouTube Product Marketing Video Extraction Complete ---")
+    def fetch(self, checkpoint):
+        return {"videos": get_product_marketing_videos(YOUTUBE_PRODUCT_SEARCH_TERMS, checkpoint=checkpoint)}
 
+    def normalize(self, outputs):
+        df = outputs.get("videos")
+        if df is None or df.empty:
+            return super().normalize(outputs)
+        counts = df[["view_count", "like_count", "comment_count"]].apply(pd.to_numeric, errors="coerce").fillna(0)
+        return pd.DataFrame({
+            "platform": self.platform,
+            "record_id": df["video_id"],
+            "text": df["title"],
+            "author": df["channel_title"],
+            "url": "https://www.youtube.com/watch?v=" + df["video_id"],
+            "published_at": df["published_at"],
+            "engagement": (counts["like_count"] + counts["comment_count"]).astype(int),
+            "search_term_matched": df["search_term_matched"],
+            "extracted_at": datetime.now().isoformat(),
+        }, columns=RECORD_COLUMNS)
 
-    # --- Slack Notification Integration ---
-    try:
-        from src.utils.slack_notifier import send_slack_notification
-        slack_message = (
+    def slack_message(self, outputs):
+        return (
             f":sparkles: New YouTube product marketing videos found! :youtube:\n"
-            f"Extracted {len(youtube_videos_df)} unique product-related YouTube videos.\n"
-            f"Check the Google Sheet here: https://docs.google.com/spreadsheets/d/1gNHWjMghm4kTVbFSgC298LgWOWhgREY2wRRzTq-yHrk/edit?usp=sharing\n"
+            f"Extracted {len(outputs['videos'])} unique product-related YouTube videos.\n"
+            f"Check the Google Sheet here: {SPREADSHEET_URL}\n"
             f"Worksheet: TrendForgeAI\n"
             f"Check: YouTube_Product_Content worksheet for the details."
         )
-        send_slack_notification(slack_message)
-    except ImportError:
-        print("Slack notification function not available.")
\ No newline at end of file
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    print("--- Starting YouTube Product Marketing Video Extraction ---")
+    try:
+        result = YouTubeExtractor().run()
+    except MissingCredentialError as e:
+        print(f"Error: {e}")
+        exit()
+    if not result["rows"]["videos"]:
+        print("\nNo new product marketing videos found or an error occurred during extraction.")
+    print("\n--- YouTube Product Marketing Video Extraction Complete ---")
@@ -0,0 +1,244 @@
+# checkpoint.py
+"""
+Per-source checkpoints for resumable, incremental extraction.
+
+A checkpoint lives in data/checkpoints/<source>.json and tracks:
+  - the current run: which units (keywords, companies, search terms) are already done.
+    Each finished unit's rows are staged next to the checkpoint, so a crashed run
+    resumes where it stopped instead of starting from zero.
+  - watermarks (e.g. Twitter since_id per term, YouTube publishedAfter) that are committed
+    only when a run finishes, so the next run fetches only the delta.
+  - recently seen record IDs, used to de-duplicate across runs. They are kept in a separate
+    <source>.seen.json, written every SEEN_FLUSH_EVERY new IDs and when the run finishes, so
+    finishing a unit only rewrites the small run state.
+
+Outputs are appended with append_new_rows() instead of being overwritten.
+Set TRENDFORGE_FULL_REFRESH=1 to ignore existing checkpoints and rewrite the outputs.
+"""
+import itertools
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+# Script is in src/utils/ -> ../../data/checkpoints
+CHECKPOINT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "checkpoints"))
+
+FULL_REFRESH = os.environ.get("TRENDFORGE_FULL_REFRESH", "").lower() in ("1", "true", "yes")
+
+MAX_SEEN_IDS = 200_000 # Cap on persisted IDs per source
+SEEN_FLUSH_EVERY = 10_000 # New seen IDs between writes of the seen-ID file during a run
+
+def write_json(path, data):
+    """Writes JSON atomically (tmp file + rename)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_path, path)
+
+class Checkpoint:
+    def __init__(self, source, base_dir=CHECKPOINT_DIR):
+        self.source = source
+        self.path = os.path.join(base_dir, f"{source}.json")
+        self.seen_path = os.path.join(base_dir, f"{source}.seen.json")
+        self.staging_dir = os.path.join(base_dir, source)
+        self.state = self._load()
+        # Checkpoints written before the seen-ID file kept the IDs inline
+        inline_seen = self.state.pop("seen_ids", None)
+        # dict as an insertion-ordered set: oldest IDs first, so truncation drops the oldest
+        self._seen = dict.fromkeys(inline_seen if inline_seen is not None else self._load_seen())
+        # IDs added since the seen-ID file was written (inline IDs move to it on the next save)
+        self._unflushed = SEEN_FLUSH_EVERY if inline_seen else 0
+        # Extractors may finish units from several threads
+        self._lock = threading.RLock()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Warning: could not read checkpoint {self.path} ({e}), starting fresh.")
+        return {"run": None, "watermarks": {}, "last_success_at": None}
+
+    def _load_seen(self):
+        if os.path.exists(self.seen_path):
+            try:
+                with open(self.seen_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Warning: could not read seen IDs {self.seen_path} ({e}), starting fresh.")
+        return []
+
+    def save(self):
+        """Writes the run state, and the seen IDs once SEEN_FLUSH_EVERY new ones are pending."""
+        with self._lock:
+            write_json(self.path, self.state)
+            if self._unflushed >= SEEN_FLUSH_EVERY:
+                self.save_seen()
+
+    def save_seen(self):
+        """Writes the seen IDs (at most MAX_SEEN_IDS, the newest)."""
+        with self._lock:
+            self._truncate_seen()
+            write_json(self.seen_path, list(self._seen))
+            self._unflushed = 0
+
+    def begin(self, full_refresh=FULL_REFRESH):
+        """Starts a new run, or resumes the unfinished one."""
+        if full_refresh:
+            print(f"[{self.source}] Full refresh: ignoring existing checkpoint.")
+            self.reset()
+        run = self.state.get("run")
+        if run:
+            print(f"[{self.source}] Resuming run from {run['started_at']} "
+                  f"({len(run['completed'])} unit(s) already done)")
+        else:
+            self.state["run"] = {
+                "started_at": datetime.now().isoformat(),
+                "completed": [],
+                "pending_watermarks": {},
+            }
+            self.save()
+        return self
+
+    def reset(self):
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        self.state = {"run": None, "watermarks": {}, "last_success_at": None}
+        with self._lock:
+            self._seen = {}
+            self.save_seen()
+
+    def run_value(self, key, default=None):
+        """A value stored with the current run, set to `default` the first time it is asked for."""
+        run = self.state["run"]
+        if key not in run:
+            run[key] = default
+            self.save()
+        return run[key]
+
+    def set_run_value(self, key, value):
+        self.state["run"][key] = value
+        self.save()
+
+    # --- Units of work ---
+    def is_done(self, unit):
+        run = self.state.get("run")
+        return bool(run) and unit in run["completed"]
+
+    def _staging_path(self, unit):
+        safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", unit)
+        return os.path.join(self.staging_dir, f"{safe}.pkl")
+
+    def mark_done(self, unit, frame=None):
+        """Records a finished unit and stages its rows so a resumed run keeps them."""
+        if frame is not None and not frame.empty:
+            os.makedirs(self.staging_dir, exist_ok=True)
+            frame.to_pickle(self._staging_path(unit))
+        with self._lock:
+            if unit not in self.state["run"]["completed"]:
+                self.state["run"]["completed"].append(unit)
+            self.save()
+
+    def staged_frame(self, unit):
+        path = self._staging_path(unit)
+        return pd.read_pickle(path) if os.path.exists(path) else pd.DataFrame()
+
+    def staged_frames(self, prefix=""):
+        """Rows staged by the completed units of the current run (optionally by unit prefix)."""
+        units = [u for u in (self.state.get("run") or {}).get("completed", []) if u.startswith(prefix)]
+        return [df for df in (self.staged_frame(u) for u in units) if not df.empty]
+
+    # --- Watermarks ---
+    def watermark(self, key, default=None):
+        return self.state["watermarks"].get(key, default)
+
+    def advance_watermark(self, key, value):
+        """Raises a watermark for commit at finish(); lower values are ignored."""
+        with self._lock:
+            pending = self.state["run"]["pending_watermarks"]
+            current = pending.get(key, self.state["watermarks"].get(key))
+            if current is None or value > current:
+                pending[key] = value
+
+    # --- Seen IDs ---
+    def has_seen(self, record_id):
+        return str(record_id) in self._seen
+
+    def add_seen(self, record_id):
+        self.add_seen_many([record_id])
+
+    def add_seen_many(self, record_ids):
+        with self._lock:
+            for record_id in record_ids:
+                record_id = str(record_id)
+                # Seeing an ID again makes it the newest
+                self._seen.pop(record_id, None)
+                self._seen[record_id] = None
+                self._unflushed += 1
+
+    def _truncate_seen(self):
+        excess = len(self._seen) - MAX_SEEN_IDS
+        if excess > 0:
+            for record_id in list(itertools.islice(self._seen, excess)):
+                del self._seen[record_id]
+
+    def seen_ids(self):
+        with self._lock:
+            return set(self._seen)
+
+    def finish(self):
+        """Commits watermarks and clears the staged rows of the completed run."""
+        run = self.state.get("run") or {}
+        self.state["watermarks"].update(run.get("pending_watermarks", {}))
+        self.state["run"] = None
+        self.state["last_success_at"] = datetime.now().isoformat()
+        self.save_seen()
+        self.save()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        print(f"[{self.source}] Checkpoint committed.")
+
+def read_keys(csv_path, key_columns):
+    """Keys (tuples of strings) of the rows in csv_path; empty if the file does not exist yet."""
+    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        return set()
+    existing = pd.read_csv(csv_path, usecols=key_columns, dtype=str)
+    return set(existing.itertuples(index=False, name=None))
+
+def append_new_rows(df, csv_path, key_columns, full_refresh=FULL_REFRESH, existing_keys=None):
+    """
+    Appends the rows of df whose key is not already in csv_path.
+
+    Only the key columns of the existing file are read. New rows are aligned to the
+    existing header so appended lines stay column-compatible.
+
+    Args:
+        existing_keys: Keys already in csv_path (see read_keys), for a series of appends to
+            the same file (e.g. chunks); updated with the written rows. Read from the file if None.
+
+    Returns:
+        DataFrame: The rows actually written
+    """
+    if df is None or df.empty:
+        return df
+    df = df.drop_duplicates(subset=key_columns)
+
+    if full_refresh or not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        df.to_csv(csv_path, index=False)
+        written = df
+    else:
+        header = list(pd.read_csv(csv_path, nrows=0).columns)
+        known = read_keys(csv_path, key_columns) if existing_keys is None else existing_keys
+        keys = df[key_columns].astype(str).itertuples(index=False, name=None)
+        written = df[[key not in known for key in keys]]
+        if not written.empty:
+            written.reindex(columns=header).to_csv(csv_path, mode="a", header=False, index=False)
+
+    if existing_keys is not None:
+        existing_keys.update(written[key_columns].astype(str).itertuples(index=False, name=None))
+    return written
@@ -0,0 +1,23 @@
+# credential_loader.py
+"""
+Lazy access to the values in the project-root credentials.py.
+
+Modules call get_credential() when they first need an API client instead of importing
+credentials at module load, so they can be imported (and replayed offline) without secrets.
+"""
+import importlib
+
+class MissingCredentialError(RuntimeError):
+    pass
+
+def get_credential(name):
+    """Returns credentials.<name>, raising MissingCredentialError if it is not configured."""
+    try:
+        credentials = importlib.import_module("credentials")
+    except ImportError:
+        raise MissingCredentialError(f"credentials.py not found. Please create it and add {name}.")
+
+    value = getattr(credentials, name, None)
+    if not value:
+        raise MissingCredentialError(f"{name} not found in credentials.py. Please add it.")
+    return value
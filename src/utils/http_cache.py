@@ -0,0 +1,126 @@
+# http_cache.py
+"""
+Record/replay cache for extractor API calls.
+
+Set TRENDFORGE_HTTP_CACHE to choose the mode:
+  - off (default): every call goes to the live API
+  - record: calls go to the live API and the raw responses are stored gzip-compressed
+    under data/http_cache/<source>/
+  - replay: responses are served from the cache at full speed: no network, no credentials
+    and no rate limiting. A missing entry raises CacheMiss.
+
+Calls are keyed by (source, method, params), so callers pass the request parameters
+explicitly and leave out volatile values such as "now"-based time windows.
+
+Independently of the mode, callers can pass ttl (seconds) to reuse recorded responses
+younger than ttl instead of calling the API again (used for slow-moving Google Trends data).
+
+Example (offline benchmark of LinkedIn parsing and DataFrame assembly):
+    TRENDFORGE_HTTP_CACHE=record python -m src.extractors.linkedin_data_extractor
+    TRENDFORGE_HTTP_CACHE=replay TRENDFORGE_FULL_REFRESH=1 python -m src.extractors.linkedin_data_extractor
+"""
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from typing import NamedTuple
+
+# Script is in src/utils/ -> ../../data/http_cache
+CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "http_cache"))
+
+MODES = ("off", "record", "replay")
+CACHE_MODE = os.environ.get("TRENDFORGE_HTTP_CACHE", "off").lower()
+if CACHE_MODE not in MODES:
+    print(f"Warning: unknown TRENDFORGE_HTTP_CACHE={CACHE_MODE!r}, using 'off'.")
+    CACHE_MODE = "off"
+
+class CacheMiss(KeyError):
+    pass
+
+class Fetched(NamedTuple):
+    """
+    Returned by fetch() to hand the response headers to the rate limiter.
+    Only data is cached; the headers (x-rate-limit-remaining/reset) only matter for live calls.
+    """
+    data: object
+    headers: object
+
+_stats = {"hits": 0, "misses": 0, "recorded": 0}
+_stats_lock = threading.Lock()
+
+def is_replay():
+    return CACHE_MODE == "replay"
+
+def cache_key(method, params):
+    payload = json.dumps({"method": method, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+
+def cache_path(source, method, params, base_dir=CACHE_DIR):
+    safe_method = method.replace("/", "_").replace(".", "_")
+    return os.path.join(base_dir, source, f"{safe_method}-{cache_key(method, params)}.pkl.gz")
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+def is_fresh(path, ttl):
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl
+
+def cached_call(source, method, params, fetch, limiter=None, mode=None, base_dir=CACHE_DIR, ttl=None):
+    """
+    Runs fetch() through the record/replay cache.
+
+    Args:
+        source: Extractor name, e.g. "youtube"
+        method: API method name, e.g. "search.list"
+        params: JSON-serializable request parameters (the cache key)
+        fetch: Zero-argument callable performing the live call; may return Fetched(data, headers)
+        limiter: Optional AdaptiveRateLimiter, used only for live calls
+        ttl: Optional expiry in seconds; fresher stored responses are reused in any mode
+
+    Returns:
+        The live or replayed response object
+    """
+    mode = mode or CACHE_MODE
+    path = cache_path(source, method, params, base_dir)
+
+    if mode == "replay":
+        if not os.path.exists(path):
+            _count("misses")
+            raise CacheMiss(f"No recorded response for {source}:{method} {params}")
+        with gzip.open(path, "rb") as f:
+            _count("hits")
+            return pickle.load(f)
+
+    if ttl and is_fresh(path, ttl):
+        try:
+            with gzip.open(path, "rb") as f:
+                response = pickle.load(f)
+            _count("hits")
+            return response
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            print(f"Warning: ignoring unreadable cache entry {path} ({e})")
+
+    if limiter:
+        limiter.acquire()
+    response = fetch()
+    headers = None
+    if isinstance(response, Fetched):
+        response, headers = response
+    if limiter:
+        limiter.on_success(headers)
+
+    if mode == "record" or ttl:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wb") as f:
+            pickle.dump(response, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        _count("recorded")
+    return response
+
+def summary():
+    return f"HTTP cache ({CACHE_MODE}): {_stats['hits']} hits, {_stats['misses']} misses, {_stats['recorded']} recorded"
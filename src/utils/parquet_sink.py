@@ -0,0 +1,209 @@
+# parquet_sink.py
+"""
+Optional columnar storage for extractor outputs.
+
+Each extractor output is written as a Parquet dataset under data/parquet/<dataset>/,
+partitioned by platform and extraction date (hive layout), with typed columns:
+integer counts, real timestamps and proper list columns instead of "['a', 'b']" strings.
+Readers get column projection and predicate pushdown through read_dataset().
+"""
+import ast
+import os
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    print("Warning: pyarrow not installed. Parquet storage will be disabled.")
+
+# Enable the sink for extractor runs with TRENDFORGE_PARQUET_SINK=1
+PARQUET_SINK_ENABLED = os.environ.get("TRENDFORGE_PARQUET_SINK", "").lower() in ("1", "true", "yes")
+
+# Script is in src/utils/ -> ../../data/parquet
+PARQUET_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "parquet"))
+
+PARTITION_COLS = ["platform", "extraction_date"]
+
+# Column typing per dataset. Columns missing from a frame are ignored.
+DATASET_SCHEMAS = {
+    "linkedin_posts": {
+        "counts": ["likes", "comments", "shares", "total_engagement"],
+        "timestamps": ["published_date", "extracted_at"],
+        "lists": [],
+        "bools": ["is_company_post"],
+    },
+    "youtube_videos": {
+        "counts": ["view_count", "like_count", "comment_count"],
+        "timestamps": ["published_at"],
+        "lists": ["tags"],
+        "bools": [],
+    },
+    "tweets": {
+        "counts": ["likes", "retweets", "replies", "quotes", "impressions", "author_followers"],
+        "timestamps": ["created_at"],
+        "lists": ["hashtags", "mentions", "urls"],
+        "bools": [],
+        "strings": ["tweet_id", "author_id"],
+    },
+    "trends_interest_over_time": {
+        "counts": [],
+        "timestamps": ["date"],
+        "lists": [],
+        "bools": [],
+    },
+    "trends_related_queries": {
+        "counts": ["value"],
+        "timestamps": [],
+        "lists": [],
+        "bools": [],
+    },
+    "trends_related_topics": {
+        "counts": ["value"],
+        "timestamps": [],
+        "lists": [],
+        "bools": [],
+    },
+}
+
+def is_available():
+    return pa is not None
+
+def parse_list(value):
+    """Turns a list, a stringified Python list or a missing value into a list of strings."""
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    if hasattr(value, "tolist"):
+        return [str(v) for v in value.tolist()]
+    if isinstance(value, str) and value.startswith("["):
+        try:
+            return [str(v) for v in ast.literal_eval(value)]
+        except (ValueError, SyntaxError):
+            return [value]
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+    return [str(value)]
+
+def to_typed_frame(df, dataset):
+    """Applies the dataset column typing to a copy of df."""
+    schema = DATASET_SCHEMAS.get(dataset, {})
+    df = df.copy()
+
+    for col in schema.get("counts", []):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("int64")
+    for col in schema.get("timestamps", []):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce", utc=True)
+    for col in schema.get("lists", []):
+        if col in df.columns:
+            df[col] = df[col].map(parse_list)
+    for col in schema.get("bools", []):
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.lower().eq("true")
+    for col in schema.get("strings", []):
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+
+    return df
+
+def write_dataset(df, dataset, platform, extraction_date=None, base_dir=PARQUET_DIR):
+    """
+    Appends a DataFrame to a partitioned Parquet dataset.
+
+    Args:
+        df: Extractor output
+        dataset: Dataset name (key of DATASET_SCHEMAS), e.g. "linkedin_posts"
+        platform: Platform partition value, e.g. "LinkedIn"
+        extraction_date: Date partition value (defaults to today)
+        base_dir: Root directory for all Parquet datasets
+
+    Returns:
+        str: Dataset root path, or None if nothing was written
+    """
+    if not is_available():
+        print("Parquet sink skipped: pyarrow not installed.")
+        return None
+    if df is None or df.empty:
+        return None
+
+    extraction_date = extraction_date or datetime.now().strftime("%Y-%m-%d")
+    typed = to_typed_frame(df, dataset)
+    typed["platform"] = platform
+    typed["extraction_date"] = extraction_date
+
+    root = os.path.join(base_dir, dataset)
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+    # A unique basename per run keeps earlier files for the same partition intact
+    run_id = datetime.now().strftime("%H%M%S%f")
+    pq.write_to_dataset(
+        table,
+        root_path=root,
+        partition_cols=PARTITION_COLS,
+        basename_template=f"part-{run_id}-{{i}}.parquet",
+    )
+    print(f"Parquet: wrote {len(typed)} rows to {root} (platform={platform}, extraction_date={extraction_date})")
+    return root
+
+def open_dataset(dataset, base_dir=PARQUET_DIR):
+    root = os.path.join(base_dir, dataset)
+    if not is_available() or not os.path.exists(root):
+        return None
+    return ds.dataset(root, format="parquet", partitioning="hive")
+
+def build_filter(filters):
+    """Builds a pyarrow expression from [(column, op, value), ...] tuples."""
+    ops = {
+        "=": lambda f, v: f == v,
+        "==": lambda f, v: f == v,
+        "!=": lambda f, v: f != v,
+        ">": lambda f, v: f > v,
+        ">=": lambda f, v: f >= v,
+        "<": lambda f, v: f < v,
+        "<=": lambda f, v: f <= v,
+        "in": lambda f, v: f.isin(v),
+    }
+    expression = None
+    for column, op, value in filters or []:
+        clause = ops[op](ds.field(column), value)
+        expression = clause if expression is None else expression & clause
+    return expression
+
+def read_dataset(dataset, columns=None, filters=None, base_dir=PARQUET_DIR):
+    """
+    Reads a Parquet dataset with column projection and predicate pushdown.
+
+    Args:
+        dataset: Dataset name, e.g. "youtube_videos"
+        columns: Columns to load (None for all)
+        filters: List of (column, op, value) tuples, e.g. [("extraction_date", ">=", "2025-12-01")]
+
+    Returns:
+        DataFrame (empty if the dataset does not exist)
+    """
+    dataset_obj = open_dataset(dataset, base_dir)
+    if dataset_obj is None:
+        return pd.DataFrame(columns=columns or [])
+    table = dataset_obj.to_table(columns=columns, filter=build_filter(filters))
+    return table.to_pandas()
+
+def iter_dataset(dataset, columns=None, filters=None, batch_size=50_000, base_dir=PARQUET_DIR):
+    """Yields DataFrames of at most batch_size rows, for bounded-memory scans."""
+    dataset_obj = open_dataset(dataset, base_dir)
+    if dataset_obj is None:
+        return
+    offset = 0
+    for batch in dataset_obj.to_batches(columns=columns, filter=build_filter(filters), batch_size=batch_size):
+        df = batch.to_pandas()
+        # Keep a running index so callers can tell rows apart across batches
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        offset += len(df)
+        yield df
+
+def dataset_columns(dataset, base_dir=PARQUET_DIR):
+    dataset_obj = open_dataset(dataset, base_dir)
+    return list(dataset_obj.schema.names) if dataset_obj is not None else []
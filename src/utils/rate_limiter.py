@@ -0,0 +1,172 @@
+# rate_limiter.py
+"""
+Adaptive rate control shared by the extractors.
+
+Each source (google_trends, linkedin, twitter, youtube) gets a token bucket whose refill
+rate follows AIMD: it grows additively after every successful call and is cut
+multiplicatively when the upstream throttles us (HTTP 429, Retry-After or an exhausted
+x-rate-limit-remaining header). Extractors only wait when the bucket is empty, instead of
+sleeping a fixed random interval after every request.
+"""
+import threading
+import time
+
+# Per-source defaults: rates are requests per second
+SOURCE_DEFAULTS = {
+    "google_trends": {"rate": 0.2, "min_rate": 0.02, "max_rate": 1.0, "burst": 2, "increase": 0.02},
+    "linkedin": {"rate": 0.5, "min_rate": 0.05, "max_rate": 2.0, "burst": 3, "increase": 0.05},
+    "twitter": {"rate": 1.0, "min_rate": 0.05, "max_rate": 5.0, "burst": 5, "increase": 0.1},
+    "youtube": {"rate": 5.0, "min_rate": 0.5, "max_rate": 20.0, "burst": 10, "increase": 0.5},
+}
+DEFAULT_SETTINGS = {"rate": 1.0, "min_rate": 0.05, "max_rate": 5.0, "burst": 1, "increase": 0.1}
+
+DECREASE_FACTOR = 0.5 # Multiplicative decrease on throttling
+ERROR_BACKOFF_SECONDS = 5 # Pause after a non-throttling error (timeouts, 5xx)
+DEFAULT_THROTTLE_SECONDS = 30 # Pause after a 429 without a Retry-After header
+
+RETRY_AFTER_HEADERS = ("retry-after",)
+REMAINING_HEADERS = ("x-rate-limit-remaining", "x-ratelimit-remaining")
+RESET_HEADERS = ("x-rate-limit-reset", "x-ratelimit-reset")
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket with AIMD rate adjustment."""
+
+    def __init__(self, name, rate=1.0, min_rate=0.05, max_rate=5.0, burst=1, increase=0.1,
+                 decrease_factor=DECREASE_FACTOR):
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.tokens = float(burst)
+        self.throttled = 0
+        self.waited = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self._last:
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+
+    def acquire(self):
+        """Takes one token, sleeping until it is available. Returns the time waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            # _last may be in the future while a throttle pause is in effect
+            wait = max(0.0, self._last - now) + max(0.0, -self.tokens) / self.rate
+            self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """Blocks all callers for `seconds` and empties the bucket."""
+        with self._lock:
+            resume_at = time.monotonic() + seconds
+            if resume_at > self._last:
+                self._last = resume_at
+            self.tokens = min(self.tokens, 0.0)
+
+    def on_success(self, headers=None):
+        """Additive increase; also honours an exhausted remaining/reset header pair."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+        remaining = header_value(headers, REMAINING_HEADERS)
+        if remaining is not None and remaining <= 0:
+            reset_in = seconds_until_reset(headers)
+            if reset_in:
+                print(f"  [{self.name}] rate limit window exhausted, pausing {reset_in:.1f}s until reset")
+                self.pause(reset_in)
+
+    def on_throttle(self, headers=None, retry_after=None):
+        """Multiplicative decrease and a pause driven by Retry-After / reset headers."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.throttled += 1
+        if retry_after is None:
+            retry_after = header_value(headers, RETRY_AFTER_HEADERS) or seconds_until_reset(headers)
+        delay = retry_after or DEFAULT_THROTTLE_SECONDS
+        print(f"  [{self.name}] throttled by upstream, rate now {self.rate:.2f}/s, pausing {delay:.1f}s")
+        self.pause(delay)
+
+    def on_error(self):
+        """Short pause for transient, non-throttling failures."""
+        self.pause(ERROR_BACKOFF_SECONDS)
+
+    def report(self, error):
+        """Feeds an exception back into the limiter. Returns True if it was a throttle."""
+        if is_rate_limit_error(error):
+            self.on_throttle(headers=error_headers(error))
+            return True
+        self.on_error()
+        return False
+
+    def summary(self):
+        return f"[{self.name}] rate {self.rate:.2f}/s, waited {self.waited:.1f}s, throttled {self.throttled}x"
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(source):
+    """Returns the process-wide limiter for a source, creating it from SOURCE_DEFAULTS."""
+    with _limiters_lock:
+        if source not in _limiters:
+            _limiters[source] = AdaptiveRateLimiter(source, **SOURCE_DEFAULTS.get(source, DEFAULT_SETTINGS))
+        return _limiters[source]
+
+def header_value(headers, names):
+    if not headers:
+        return None
+    lowered = {str(k).lower(): v for k, v in dict(headers).items()}
+    for name in names:
+        if name in lowered:
+            try:
+                return float(lowered[name])
+            except (TypeError, ValueError):
+                return None
+    return None
+
+def seconds_until_reset(headers):
+    """Reset headers are either an epoch timestamp (Twitter) or a delta in seconds."""
+    reset = header_value(headers, RESET_HEADERS)
+    if reset is None:
+        return None
+    if reset > 1_000_000_000:
+        return max(0.0, reset - time.time())
+    return reset
+
+def error_status(error):
+    """Extracts the HTTP status from requests/tweepy/googleapiclient/pytrends errors."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        status = getattr(response, "status_code", None) or getattr(response, "status", None)
+        if status:
+            return int(status)
+    resp = getattr(error, "resp", None) # googleapiclient.errors.HttpError
+    if resp is not None and getattr(resp, "status", None):
+        return int(resp.status)
+    return None
+
+def error_headers(error):
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "headers", None) is not None:
+        return response.headers
+    resp = getattr(error, "resp", None)
+    if resp is not None:
+        return dict(resp)
+    return None
+
+def is_rate_limit_error(error):
+    status = error_status(error)
+    if status == 429:
+        return True
+    # YouTube reports per-user rate limits as 403 rateLimitExceeded
+    content = getattr(error, "content", b"") or b""
+    if status == 403 and b"rateLimitExceeded" in content:
+        return True
+    return type(error).__name__ in ("TooManyRequests", "TooManyRequestsError")
@@ -0,0 +1,101 @@
+# record_sink.py
+"""
+Append-only NDJSON sink for streaming extractors.
+
+Records are buffered and appended in batches of RECORD_BATCH_SIZE lines (flushed and
+fsynced), so a long sweep keeps bounded memory and everything flushed survives a crash.
+The file is a log: a resumed unit may append a record twice, so readers de-duplicate
+on the record key. It holds one run: rotate() moves the previous run to <path>.1.
+NDJSONFrames reads it back as DataFrame chunks, so converting it to CSV/Parquet also
+stays bounded by the chunk size.
+"""
+import json
+import os
+
+import pandas as pd
+
+RECORD_BATCH_SIZE = 200
+READ_CHUNK_SIZE = 10_000 # Records per DataFrame when reading the log back
+
+class NDJSONSink:
+    def __init__(self, path, batch_size=RECORD_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.written = 0
+        self._buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def rotate(self):
+        """Starts an empty log, keeping the previous one as <path>.1."""
+        self._buffer = []
+        if os.path.exists(self.path):
+            os.replace(self.path, self.path + ".1")
+
+    def size(self):
+        """Current file size in bytes (the offset of the next flushed record)."""
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def buffered(self):
+        return len(self._buffer)
+
+    def write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Appends the buffered records and syncs them to disk."""
+        if not self._buffer:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lines = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in self._buffer)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.written += len(self._buffer)
+        self._buffer = []
+
+def read_ndjson(path, offset=0, chunksize=None):
+    """
+    Reads the records appended after byte `offset`.
+
+    Returns:
+        DataFrame, or an iterator of DataFrames when chunksize is set
+    """
+    if not os.path.exists(path) or os.path.getsize(path) <= offset:
+        return iter([]) if chunksize else pd.DataFrame()
+    f = open(path, "r", encoding="utf-8")
+    f.seek(offset)
+    if chunksize:
+        return _close_after(pd.read_json(f, lines=True, chunksize=chunksize, dtype=False), f)
+    with f:
+        return pd.read_json(f, lines=True, dtype=False)
+
+def _close_after(reader, f):
+    with f:
+        yield from reader
+
+class NDJSONFrames:
+    """
+    Re-iterable view of an NDJSON log as DataFrame chunks of up to `chunksize` records.
+
+    Records repeated within a chunk keep their last copy; callers writing keyed outputs
+    (append_new_rows) skip keys written by earlier chunks.
+    """
+
+    def __init__(self, path, key=None, chunksize=READ_CHUNK_SIZE):
+        self.path = path
+        self.key = key
+        self.chunksize = chunksize
+
+    def __iter__(self):
+        for chunk in read_ndjson(self.path, chunksize=self.chunksize):
+            if self.key:
+                chunk = chunk.drop_duplicates(subset=[self.key], keep="last")
+            yield chunk.reset_index(drop=True)
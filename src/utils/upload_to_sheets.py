@@ -1,68 +1,258 @@
 # upload_to_sheets.py (DEBUGGING VERSION)
+"""
+Google Sheets sink.
+
+The authorized client and spreadsheet handles are cached for the whole process.
+sync_to_google_sheet() remembers which row keys were synced to each worksheet
+(data/checkpoints/sheets/, seeded from the worksheet on first use) and appends only new
+rows, in chunked values_append calls, so API time and quota scale with the change
+instead of the sheet size.
+upload_to_google_sheet() keeps the old replace-everything behaviour for snapshot data: the
+worksheet is cleared, resized to the snapshot and written in place, so it does not grow.
+"""
 import gspread
-from gspread_dataframe import set_with_dataframe
 import pandas as pd
 from datetime import datetime, timedelta
+import json
 import os
+import threading
 
-def upload_to_google_sheet(dataframe, sheet_id_or_name, worksheet_name):
-    """
-    Uploads a pandas DataFrame to a specified Google Sheet worksheet.
-    Assumes you have set up gspread authentication using a service account JSON file.
+# Script is in src/utils/ -> ../../data/checkpoints/sheets
+SYNC_STATE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "checkpoints", "sheets"))
+
+# Chunking keeps each request well under the Sheets API payload limits
+MAX_ROWS_PER_REQUEST = 1_000
+MAX_CELLS_PER_REQUEST = 40_000
+
+_client = None
+_spreadsheets = {}
+_lock = threading.Lock()
+
+def find_service_account():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    # Look for service_account.json in project root (../../ from src/utils)
+    project_root = os.path.abspath(os.path.join(script_dir, "..", ".."))
+    service_account_path = os.path.join(project_root, "service_account.json")
     
+    if not os.path.exists(service_account_path):
+         # Try data directory
+         service_account_path = os.path.join(project_root, "data", "service_account.json")
+
+    if not os.path.exists(service_account_path):
+         # Fallback to CWD if running from root
+         service_account_path = os.path.join(os.getcwd(), "service_account.json")
+    return service_account_path
+
+def get_client():
+    """Authorizes with the service account once per process."""
+    global _client
+    with _lock:
+        if _client is None:
+            service_account_path = find_service_account()
+            print(f"DEBUG: Attempting to load service account from: {service_account_path}")
+            _client = gspread.service_account(filename=service_account_path)
+            print(f"DEBUG: Service account loaded successfully.")
+        return _client
+
+def get_spreadsheet(sheet_id_or_name):
+    """Opens a spreadsheet by ID or title, reusing the handle on later calls."""
+    gc = get_client()
+    with _lock:
+        if sheet_id_or_name not in _spreadsheets:
+            print(f"DEBUG: Attempting to open spreadsheet: '{sheet_id_or_name}'")
+            # Try to open by ID first (more reliable)
+            if len(sheet_id_or_name) > 30:  # Likely a spreadsheet ID
+                _spreadsheets[sheet_id_or_name] = gc.open_by_key(sheet_id_or_name)
+            else:  # Likely a spreadsheet name
+                _spreadsheets[sheet_id_or_name] = gc.open(sheet_id_or_name)
+        return _spreadsheets[sheet_id_or_name]
+
+def get_worksheet(spreadsheet, worksheet_name, cols):
+    try:
+        return spreadsheet.worksheet(worksheet_name)
+    except gspread.exceptions.WorksheetNotFound:
+        print(f"DEBUG: Worksheet '{worksheet_name}' not found, creating it...")
+        return spreadsheet.add_worksheet(title=worksheet_name, rows="1000", cols=str(max(cols, 1)))
+
+def cell_value(value):
+    """Converts a DataFrame cell into something JSON/Sheets friendly."""
+    if isinstance(value, (list, tuple, dict)):
+        return str(value)
+    if value is None or (not hasattr(value, "__len__") and pd.isna(value)):
+        return ""
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    if hasattr(value, "item"): # numpy scalars
+        return value.item()
+    return value
+
+def to_rows(dataframe):
+    return [[cell_value(v) for v in row] for row in dataframe.itertuples(index=False, name=None)]
+
+def chunk_rows(rows, width):
+    """Splits rows so every request stays under both the row and the cell limit."""
+    size = max(1, min(MAX_ROWS_PER_REQUEST, MAX_CELLS_PER_REQUEST // max(width, 1)))
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def append_rows(spreadsheet, worksheet_name, rows, width):
+    """Appends rows after the sheet's table in chunked values_append calls. Returns the call count."""
+    calls = 0
+    for chunk in chunk_rows(rows, width):
+        spreadsheet.values_append(
+            f"'{worksheet_name}'!A1",
+            params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+            body={"values": chunk},
+        )
+        calls += 1
+    return calls
+
+def write_rows(spreadsheet, worksheet_name, rows, width):
+    """Writes rows from A1 down, in place, in chunked values_update calls. Returns the call count."""
+    calls = start = 0
+    for chunk in chunk_rows(rows, width):
+        spreadsheet.values_update(
+            f"'{worksheet_name}'!A{start + 1}",
+            params={"valueInputOption": "RAW"},
+            body={"values": chunk},
+        )
+        start += len(chunk)
+        calls += 1
+    return calls
+
+def row_keys(dataframe, key_columns):
+    return dataframe[key_columns].astype(str).agg("|".join, axis=1)
+
+# --- Sync state: header and keys of the rows already in each worksheet ---
+# <name>.json holds the worksheet header; <name>.keys is an append-only log with one synced
+# row key per line, so recording a sync costs O(new rows) rather than O(sheet)
+_synced_keys = {} # state path -> set of keys, loaded once per process
+
+def state_path(sheet_id_or_name, worksheet_name, base_dir=SYNC_STATE_DIR):
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in f"{sheet_id_or_name[:12]}_{worksheet_name}")
+    return os.path.join(base_dir, f"{safe}.json")
+
+def keys_path(path):
+    return os.path.splitext(path)[0] + ".keys"
+
+def load_state(path):
+    """Returns (header, synced keys), or None if the worksheet was never synced."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        with _lock:
+            if path not in _synced_keys:
+                keys = set(state.get("keys", [])) # Older state files kept the keys inline
+                if os.path.exists(keys_path(path)):
+                    with open(keys_path(path), "r", encoding="utf-8") as f:
+                        keys.update(line.rstrip("\n") for line in f)
+                _synced_keys[path] = keys
+            return state["header"], _synced_keys[path]
+    except (OSError, json.JSONDecodeError, KeyError):
+        return None
+
+def save_state(path, header, keys):
+    """Writes a complete state (after seeding it from the worksheet)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"header": header, "synced_at": datetime.now().isoformat()}, f)
+    with open(keys_path(path) + ".tmp", "w", encoding="utf-8") as f:
+        f.writelines(f"{key}\n" for key in keys)
+    os.replace(keys_path(path) + ".tmp", keys_path(path))
+    os.replace(tmp_path, path)
+    with _lock:
+        _synced_keys[path] = set(keys)
+
+def append_keys(path, keys):
+    """Records newly synced keys by appending them to the key log."""
+    keys = list(keys)
+    with _lock:
+        with open(keys_path(path), "a", encoding="utf-8") as f:
+            f.writelines(f"{key}\n" for key in keys)
+        _synced_keys.setdefault(path, set()).update(keys)
+
+def seed_state(worksheet, key_columns):
+    """
+    Reads the header and the key columns already in the worksheet, so a first sync (or a
+    lost state file) appends to the existing rows instead of replacing them.
+
+    Returns:
+        tuple: (header, set of keys); the header is empty for an empty worksheet
+    """
+    header = [str(c) for c in worksheet.row_values(1)]
+    if not header:
+        return [], set()
+    missing = [c for c in key_columns if c not in header]
+    if missing:
+        print(f"DEBUG: Worksheet '{worksheet.title}' has no {missing} column(s), treating all rows as new.")
+        return header, set()
+    columns = [
+        worksheet.col_values(header.index(c) + 1, value_render_option="UNFORMATTED_VALUE")[1:]
+        for c in key_columns
+    ]
+    rows = max(len(values) for values in columns)
+    columns = [[str(v) for v in values] + [""] * (rows - len(values)) for values in columns]
+    return header, {"|".join(parts) for parts in zip(*columns)}
+
+def sync_to_google_sheet(dataframe, sheet_id_or_name, worksheet_name, key_columns=None):
+    """
+    Syncs a DataFrame to a worksheet, sending only what changed.
+
     Args:
+        dataframe: Rows to sync
         sheet_id_or_name: Either the spreadsheet ID (from URL) or the spreadsheet name/title
         worksheet_name: Name of the worksheet/tab within the spreadsheet
+        key_columns: Columns identifying a row. Rows whose key is already in the worksheet are
+            skipped and new rows are appended in the worksheet's column order.
+            Without keys the worksheet is replaced (snapshots).
+
+    Returns:
+        int: Number of rows written, or None if the sync failed
     """
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        # Look for service_account.json in project root (../../ from src/utils)
-        project_root = os.path.abspath(os.path.join(script_dir, "..", ".."))
-        service_account_path = os.path.join(project_root, "service_account.json")
-        
-        if not os.path.exists(service_account_path):
-             # Try data directory
-             service_account_path = os.path.join(project_root, "data", "service_account.json")
-
-        if not os.path.exists(service_account_path):
-             # Fallback to CWD if running from root
-             service_account_path = os.path.join(os.getcwd(), "service_account.json")
-
-        print(f"DEBUG: Attempting to load service account from: {service_account_path}")
-        gc = gspread.service_account(filename=service_account_path) 
-        print(f"DEBUG: Service account loaded successfully.")
-
-        print(f"DEBUG: Attempting to open spreadsheet: '{sheet_id_or_name}'")
-        try:
-            # Try to open by ID first (more reliable)
-            if len(sheet_id_or_name) > 30:  # Likely a spreadsheet ID
-                spreadsheet = gc.open_by_key(sheet_id_or_name)
-                print(f"DEBUG: Spreadsheet opened by ID successfully.")
-            else:  # Likely a spreadsheet name
-                spreadsheet = gc.open(sheet_id_or_name)
-                print(f"DEBUG: Spreadsheet '{sheet_id_or_name}' opened by name successfully.")
-        except gspread.exceptions.SpreadsheetNotFound:
-            print(f"ERROR: Spreadsheet '{sheet_id_or_name}' not found. Please ensure the spreadsheet exists and is shared with your service account.")
-            return # Exit function if primary spreadsheet not found
-        
-        # Get or create the worksheet
-        print(f"DEBUG: Attempting to find or create worksheet: '{worksheet_name}'")
-        try:
-            worksheet = spreadsheet.worksheet(worksheet_name)
-            print(f"DEBUG: Found existing worksheet: '{worksheet_name}'")
-        except gspread.exceptions.WorksheetNotFound:
-            print(f"DEBUG: Worksheet '{worksheet_name}' not found, attempting to create it...")
-            worksheet = spreadsheet.add_worksheet(title=worksheet_name, rows="1000", cols="50")
-            print(f"DEBUG: Created new worksheet: '{worksheet_name}' successfully.")
-
-        print(f"DEBUG: Clearing existing data in worksheet '{worksheet_name}'...")
-        worksheet.clear()
-        print(f"DEBUG: Data cleared.")
-
-        print(f"DEBUG: Uploading DataFrame to worksheet '{worksheet_name}'...")
-        set_with_dataframe(worksheet, dataframe)
-        print(f"DEBUG: Successfully uploaded data to Google Sheet, worksheet '{worksheet_name}'")
+        spreadsheet = get_spreadsheet(sheet_id_or_name)
+        header = [str(c) for c in dataframe.columns]
 
+        if not key_columns:
+            worksheet = get_worksheet(spreadsheet, worksheet_name, len(header))
+            rows = [header] + to_rows(dataframe)
+            # INSERT_ROWS appends would add rows below the cleared grid on every run
+            worksheet.clear()
+            worksheet.resize(rows=len(rows), cols=max(len(header), 1))
+            calls = write_rows(spreadsheet, worksheet_name, rows, len(header))
+            print(f"DEBUG: Replaced '{worksheet_name}' with {len(dataframe)} rows in {calls} request(s).")
+            return len(dataframe)
+
+        path = state_path(sheet_id_or_name, worksheet_name)
+        state = load_state(path)
+        if state is None:
+            worksheet = get_worksheet(spreadsheet, worksheet_name, len(header))
+            sheet_header, synced_keys = seed_state(worksheet, key_columns)
+            if not sheet_header:
+                append_rows(spreadsheet, worksheet_name, [header], len(header))
+                sheet_header = header
+            save_state(path, sheet_header, synced_keys)
+            print(f"DEBUG: Seeded sync state for '{worksheet_name}' with {len(synced_keys)} existing rows.")
+        else:
+            sheet_header, synced_keys = state
+
+        keys = row_keys(dataframe, key_columns)
+        new_mask = ~keys.isin(synced_keys) & ~keys.duplicated()
+        if not new_mask.any():
+            print(f"DEBUG: '{worksheet_name}' already up to date, nothing to sync.")
+            return 0
+        # Columns are aligned to the worksheet, like append_new_rows does for the CSVs
+        new_rows = dataframe[new_mask].reindex(columns=sheet_header)
+        calls = append_rows(spreadsheet, worksheet_name, to_rows(new_rows), len(sheet_header))
+        append_keys(path, keys[new_mask])
+        print(f"DEBUG: Appended {len(new_rows)} new rows to '{worksheet_name}' in {calls} request(s).")
+        return len(new_rows)
+
+    except gspread.exceptions.SpreadsheetNotFound:
+        print(f"ERROR: Spreadsheet '{sheet_id_or_name}' not found. Please ensure the spreadsheet exists and is shared with your service account.")
     except gspread.exceptions.APIError as e:
         print(f"\nCRITICAL GOOGLE SHEETS API ERROR: {e}")
         print("Please ensure:")
@@ -71,11 +261,23 @@ def upload_to_google_sheet(dataframe, sheet_id_or_name, worksheet_name):
         print("  3. The 'Google Drive API' and 'Google Sheets API' are enabled in your Google Cloud Project.")
         print("  4. The service account has 'Editor' role on the Google Cloud Project and/or the specific Google Sheet.")
     except FileNotFoundError:
-        print(f"\nERROR: 'service_account.json' file not found at the expected path: {service_account_path}")
+        print(f"\nERROR: 'service_account.json' file not found at the expected path: {find_service_account()}")
         print("Please ensure your Google Sheets service account JSON key file is correctly named and located.")
     except Exception as e:
         print(f"\nUNEXPECTED ERROR during Google Sheets upload: {type(e).__name__}: {e}")
         print("This error is general. Please review previous DEBUG messages for clues.")
+    return None
+
+def upload_to_google_sheet(dataframe, sheet_id_or_name, worksheet_name):
+    """
+    Uploads a pandas DataFrame to a specified Google Sheet worksheet, replacing its contents.
+    Assumes you have set up gspread authentication using a service account JSON file.
+    
+    Args:
+        sheet_id_or_name: Either the spreadsheet ID (from URL) or the spreadsheet name/title
+        worksheet_name: Name of the worksheet/tab within the spreadsheet
+    """
+    return sync_to_google_sheet(dataframe, sheet_id_or_name, worksheet_name)
     
 # Example of how you might test this function independently (optional)
 if __name__ == '__main__':
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Make `src` and `api` importable when pytest is run from the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# These scripts exercise a running server (python tests/test_api.py), they are not unit tests
+collect_ignore = ["simple_test.py", "test_api.py", "test_sync_api.py"]
@@ -0,0 +1,152 @@
+"""
+In-memory stand-ins for the Redis commands used by the API (no Redis server in unit tests)
+"""
+
+import time
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+        self.calls = []
+        return results
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.subscribers = {}  # channel -> message queues of the subscribed FakePubSubs
+
+    def _alive(self, key):
+        if key in self.expires and self.expires[key] <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(key) if self._alive(key) else None
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and self._alive(key):
+            return None
+        self.data[key] = value
+        if ex:
+            self.expires[key] = time.time() + ex
+        return True
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def expire(self, key, seconds):
+        if not self._alive(key):
+            return False
+        self.expires[key] = time.time() + seconds
+        return True
+
+    def publish(self, channel, message):
+        queues = self.subscribers.get(channel, [])
+        for queue in queues:
+            queue.append({"type": "message", "channel": channel, "data": message})
+        return len(queues)
+
+    def hset(self, key, mapping):
+        self._alive(key)
+        self.data.setdefault(key, {}).update({field: str(value) for field, value in mapping.items()})
+        return len(mapping)
+
+    def hincrby(self, key, field, amount=1):
+        self._alive(key)
+        hash_ = self.data.setdefault(key, {})
+        hash_[field] = str(int(hash_.get(field, 0)) + amount)
+        return int(hash_[field])
+
+    def hgetall(self, key):
+        return dict(self.data[key]) if self._alive(key) else {}
+
+    def rpush(self, key, *values):
+        self._alive(key)
+        items = self.data.setdefault(key, [])
+        items.extend(values)
+        return len(items)
+
+    def lrange(self, key, start, end):
+        items = self.data[key] if self._alive(key) else []
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def zadd(self, key, mapping):
+        self._alive(key)
+        zset = self.data.setdefault(key, {})
+        added = sum(member not in zset for member in mapping)
+        zset.update(mapping)
+        return added
+
+    def zrem(self, key, *members):
+        zset = self.data.get(key, {}) if self._alive(key) else {}
+        return sum(zset.pop(member, None) is not None for member in members)
+
+    def zcard(self, key):
+        return len(self.data[key]) if self._alive(key) else 0
+
+    def zremrangebyscore(self, key, low, high):
+        if not self._alive(key):
+            return 0
+        low = float(low)
+        high = float(high)
+        zset = self.data[key]
+        removed = [member for member, score in zset.items() if low <= score <= high]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+
+class FakePubSub:
+    """Async pub/sub of a FakeRedis: get_message returns None at once when nothing is queued"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = []
+        self.channels = []
+
+    async def subscribe(self, *channels):
+        for channel in channels:
+            self.redis.subscribers.setdefault(channel, []).append(self.queue)
+        self.channels.extend(channels)
+
+    async def unsubscribe(self):
+        for channel in self.channels:
+            queues = self.redis.subscribers[channel]
+            queues[:] = [queue for queue in queues if queue is not self.queue]
+        self.channels = []
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        return self.queue.pop(0) if self.queue else None
+
+    async def aclose(self):
+        pass
+
+class FakeAsyncRedis:
+    """Async facade over FakeRedis (redis.asyncio.Redis)"""
+
+    def __init__(self, redis=None):
+        self.redis = redis or FakeRedis()
+
+    def pubsub(self):
+        return FakePubSub(self.redis)
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
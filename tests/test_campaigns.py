@@ -0,0 +1,51 @@
+"""
+Unit tests for the campaign progress helpers (api/tasks/content_tasks.py)
+"""
+
+import json
+import uuid
+
+import pytest
+
+pytest.importorskip("credentials", reason="the API modules need credentials.py")
+
+import api.celery_app  # noqa: F401 (imports the task modules in the order the app does)
+from api.tasks import content_tasks
+from tests.fakes import FakeRedis
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(content_tasks, "get_redis", lambda: client)
+    return client
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(content_tasks, "publish_progress",
+                        lambda job_id, status, progress, message=None, **extra: events.append((job_id, status, progress, extra)))
+    return events
+
+def test_items_are_counted_and_published(redis, published):
+    content_tasks.start_campaign("camp-1", 4)
+    content_tasks.record_campaign_item("camp-1", succeeded=True)
+    content_tasks.record_campaign_item("camp-1", succeeded=False)
+
+    assert content_tasks.get_campaign_progress("camp-1") == {"total": 4, "completed": 1, "failed": 1}
+    assert redis.expires[content_tasks.CAMPAIGN_KEY.format("camp-1")]
+    assert [progress for _, _, progress, _ in published] == [25, 50]
+    assert published[-1] == ("camp-1", "processing", 50, {"total": 4, "completed": 1, "failed": 1})
+
+def test_unknown_campaign_has_no_progress(redis):
+    assert content_tasks.get_campaign_progress("missing") is None
+
+def test_rows_are_staged_in_order(redis):
+    content_tasks.stage_campaign_row("camp-1", {"topic": "a"})
+    content_tasks.stage_campaign_row("camp-1", {"topic": "b"})
+
+    key = content_tasks.CAMPAIGN_ROWS_KEY.format("camp-1")
+    rows = [json.loads(row) for row in redis.lrange(key, 0, -1)]
+    assert [row["topic"] for row in rows] == ["a", "b"]
+    # Each row gets its content ID when staged, so a retried write inserts it once
+    assert len({uuid.UUID(row["id"]) for row in rows}) == 2
+    assert key in redis.expires
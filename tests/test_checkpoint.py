@@ -0,0 +1,73 @@
+"""
+Unit tests for extractor checkpoints (src/utils/checkpoint.py)
+"""
+
+import pandas as pd
+
+from src.utils import checkpoint as checkpoint_module
+from src.utils.checkpoint import Checkpoint, append_new_rows
+
+def test_seen_ids_truncation_drops_the_oldest(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint_module, "MAX_SEEN_IDS", 3)
+    checkpoint = Checkpoint("test", base_dir=str(tmp_path))
+    checkpoint.add_seen_many(["a", "b", "c", "d"])
+    checkpoint.add_seen("b")  # Seen again: now the newest
+    checkpoint.add_seen("e")
+    checkpoint.save_seen()
+
+    reloaded = Checkpoint("test", base_dir=str(tmp_path))
+    assert reloaded.seen_ids() == {"d", "b", "e"}
+    assert reloaded.has_seen("b") and not reloaded.has_seen("a")
+
+def test_seen_ids_are_written_on_flush_boundaries_and_finish(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint_module, "SEEN_FLUSH_EVERY", 3)
+    checkpoint = Checkpoint("test", base_dir=str(tmp_path)).begin(full_refresh=False)
+    checkpoint.add_seen_many(["a", "b"])
+    checkpoint.mark_done("unit:1")
+    # Finishing a unit writes only the run state
+    assert Checkpoint("test", base_dir=str(tmp_path)).seen_ids() == set()
+    assert "seen_ids" not in (tmp_path / "test.json").read_text()
+
+    checkpoint.add_seen("c")
+    checkpoint.mark_done("unit:2")
+    assert Checkpoint("test", base_dir=str(tmp_path)).seen_ids() == {"a", "b", "c"}
+
+    checkpoint.add_seen("d")
+    checkpoint.finish()
+    assert Checkpoint("test", base_dir=str(tmp_path)).seen_ids() == {"a", "b", "c", "d"}
+
+def test_inline_seen_ids_move_to_the_seen_file(tmp_path):
+    (tmp_path / "test.json").write_text(
+        '{"run": null, "watermarks": {}, "seen_ids": ["a", "b"], "last_success_at": null}'
+    )
+    Checkpoint("test", base_dir=str(tmp_path)).begin(full_refresh=False)
+
+    reloaded = Checkpoint("test", base_dir=str(tmp_path))
+    assert reloaded.seen_ids() == {"a", "b"}
+    assert "seen_ids" not in reloaded.state
+
+def test_resumed_run_keeps_completed_units_and_staged_rows(tmp_path):
+    checkpoint = Checkpoint("test", base_dir=str(tmp_path)).begin(full_refresh=False)
+    checkpoint.mark_done("term:a", pd.DataFrame({"id": [1, 2]}))
+
+    resumed = Checkpoint("test", base_dir=str(tmp_path)).begin(full_refresh=False)
+    assert resumed.is_done("term:a") and not resumed.is_done("term:b")
+    assert list(resumed.staged_frames("term:")[0]["id"]) == [1, 2]
+
+def test_watermarks_commit_only_on_finish(tmp_path):
+    checkpoint = Checkpoint("test", base_dir=str(tmp_path)).begin(full_refresh=False)
+    checkpoint.advance_watermark("since_id:a", 10)
+    checkpoint.advance_watermark("since_id:a", 5)  # Lower values are ignored
+    assert checkpoint.watermark("since_id:a") is None
+    checkpoint.finish()
+    assert Checkpoint("test", base_dir=str(tmp_path)).watermark("since_id:a") == 10
+
+def test_append_new_rows_skips_existing_keys(tmp_path):
+    path = str(tmp_path / "out.csv")
+    append_new_rows(pd.DataFrame({"id": ["1", "2"], "text": ["a", "b"]}), path, ["id"], full_refresh=False)
+    written = append_new_rows(pd.DataFrame({"text": ["b", "c"], "id": ["2", "3"]}), path, ["id"], full_refresh=False)
+
+    assert list(written["id"]) == ["3"]
+    assert pd.read_csv(path, dtype=str).to_dict("records") == [
+        {"id": "1", "text": "a"}, {"id": "2", "text": "b"}, {"id": "3", "text": "c"},
+    ]
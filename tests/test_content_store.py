@@ -0,0 +1,84 @@
+"""
+Unit tests for batched content writes (api/utils/content_store.py)
+"""
+
+import asyncio
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from api.utils.content_store import content_row, insert_contents, insert_contents_async
+
+RESULT = {
+    "topic": "AI", "platform": "LinkedIn", "final_content": "Final", "original_draft": "Draft",
+    "quality_score": 8.5, "critique_notes": "Good", "research": "not stored",
+}
+
+class FakeResult:
+    def __init__(self, values):
+        self.values = values
+
+    def all(self):
+        return self.values
+
+class FakeSession:
+    """Returns one ID per row from scalars() and counts statements and commits"""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def scalars(self, statement, rows):
+        self.statements.append((statement, rows))
+        return FakeResult([uuid.uuid4() for _ in rows])
+
+    def execute(self, statement, rows):
+        self.statements.append((statement, rows))
+
+    def commit(self):
+        self.commits += 1
+
+class FakeAsyncSession(FakeSession):
+    async def scalars(self, statement, rows):
+        return FakeSession.scalars(self, statement, rows)
+
+    async def commit(self):
+        FakeSession.commit(self)
+
+def test_row_keeps_only_content_columns():
+    row = content_row(RESULT, "Product")
+    assert row["user_id"] is None and row["status"] == "draft"
+    assert row["product_info"] == "Product" and "research" not in row
+
+def test_rows_are_written_in_one_statement_and_commit():
+    db = FakeSession()
+    rows = [content_row(RESULT, "Product", uuid.uuid4()) for _ in range(3)]
+
+    ids = insert_contents(db, rows)
+    assert len(ids) == 3
+    assert len(db.statements) == 1 and db.statements[0][1] == rows
+    assert db.commits == 1
+
+    sql = str(db.statements[0][0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO content") and "RETURNING content.id" in sql
+
+def test_idempotent_write_skips_rows_written_by_an_earlier_attempt():
+    db = FakeSession()
+    rows = [dict(content_row(RESULT, "Product", uuid.uuid4()), id=uuid.uuid4()) for _ in range(2)]
+
+    assert insert_contents(db, rows, idempotent=True) == [row["id"] for row in rows]
+    assert db.commits == 1
+    sql = str(db.statements[0][0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO content") and sql.endswith("ON CONFLICT (id) DO NOTHING")
+
+def test_nothing_to_write_skips_the_transaction():
+    db = FakeSession()
+    assert insert_contents(db, []) == []
+    assert asyncio.run(insert_contents_async(FakeAsyncSession(), [])) == []
+    assert db.commits == 0
+
+def test_async_write_is_one_statement_and_commit():
+    db = FakeAsyncSession()
+    contents = asyncio.run(insert_contents_async(db, [content_row(RESULT, "Product", uuid.uuid4())] * 2))
+    assert len(contents) == 2
+    assert len(db.statements) == 1 and db.commits == 1
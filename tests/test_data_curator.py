@@ -0,0 +1,91 @@
+"""
+Unit tests for the streaming top-N curation (src/engine/data_curator.py)
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from src.engine import data_curator
+from src.engine.data_curator import (
+    LINKEDIN_COLUMNS, YOUTUBE_COLUMNS, SoftTimeLimitExceeded, iter_chunks, stream_top_rows, youtube_engagement_score
+)
+
+def write_csv(tmp_path, rows):
+    path = tmp_path / "posts.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+def test_stream_top_rows_keeps_top_n_across_chunks(tmp_path):
+    rows = [{"post_text": f"post {i}", "total_engagement": i % 37} for i in range(200)]
+    path = write_csv(tmp_path, rows)
+
+    chunks = iter_chunks(path, LINKEDIN_COLUMNS, chunksize=16)
+    top = stream_top_rows(chunks, LINKEDIN_COLUMNS, lambda df: df["total_engagement"], top_n=6)
+
+    assert list(top["score"]) == [36, 36, 36, 36, 36, 35]
+    # Ties keep the earliest rows
+    assert list(top["post_text"][:5]) == ["post 36", "post 73", "post 110", "post 147", "post 184"]
+
+def test_stream_top_rows_matches_in_memory_ranking(tmp_path):
+    rows = [
+        {"title": f"video {i}", "description": "d", "view_count": i * 10, "like_count": i % 7, "comment_count": i % 3}
+        for i in range(100)
+    ]
+    path = write_csv(tmp_path, rows)
+
+    chunks = iter_chunks(path, YOUTUBE_COLUMNS, chunksize=7)
+    streamed = stream_top_rows(chunks, YOUTUBE_COLUMNS, youtube_engagement_score, top_n=10)
+
+    df = pd.read_csv(path)
+    df["score"] = youtube_engagement_score(df)
+    expected = df.sort_values("score", ascending=False, kind="stable").head(10)
+    assert list(streamed["title"]) == list(expected["title"])
+
+def test_non_numeric_scores_are_coerced(tmp_path):
+    rows = [
+        {"post_text": "a", "total_engagement": "12"},
+        {"post_text": "b", "total_engagement": "n/a"},
+        {"post_text": "c", "total_engagement": "40"},
+    ]
+    path = write_csv(tmp_path, rows)
+
+    chunks = iter_chunks(path, LINKEDIN_COLUMNS, chunksize=2)
+    top = stream_top_rows(chunks, LINKEDIN_COLUMNS, lambda df: df["total_engagement"], top_n=3)
+
+    assert list(top["post_text"]) == ["c", "a", "b"]
+    assert list(top["score"]) == [40, 12, 0]
+
+def linkedin_posts(tmp_path, count):
+    text = "A long enough product marketing post about launch number {} for the curator"
+    rows = [{"post_text": text.format(i), "total_engagement": i} for i in range(count)]
+    pd.DataFrame(rows).to_csv(tmp_path / "linkedin_product_marketing_posts.csv", index=False)
+    return [text.format(i) for i in range(count)]
+
+def test_previous_embeddings_are_reused(tmp_path, monkeypatch):
+    texts = linkedin_posts(tmp_path, 3)
+    previous = {"linkedin_best": [{"text": texts[2], "embedding": [0.5]}], "trending_topics": []}
+    (tmp_path / "top_performing_examples.json").write_text(json.dumps(previous))
+    embedded = []
+    monkeypatch.setattr(data_curator, "GEMINI_API_KEY", "key")
+    monkeypatch.setattr(data_curator.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(data_curator.genai, "embed_content",
+                        lambda content, **kwargs: embedded.append(content) or {"embedding": [1.0]})
+
+    data = data_curator.run_curation(stream=True, data_dir=str(tmp_path))
+
+    assert embedded == [texts[1], texts[0]]
+    assert [example["embedding"] for example in data["linkedin_best"]] == [[0.5], [1.0], [1.0]]
+
+def test_soft_time_limit_stops_the_curation(tmp_path, monkeypatch):
+    linkedin_posts(tmp_path, 2)
+
+    def over_time(content, **kwargs):
+        raise SoftTimeLimitExceeded()
+
+    monkeypatch.setattr(data_curator, "GEMINI_API_KEY", "key")
+    monkeypatch.setattr(data_curator.genai, "embed_content", over_time)
+    with pytest.raises(SoftTimeLimitExceeded):
+        data_curator.run_curation(stream=True, data_dir=str(tmp_path))
+    assert not (tmp_path / "top_performing_examples.json").exists()
@@ -0,0 +1,48 @@
+"""
+Unit tests for the content engine thread pool (api/utils/engine_pool.py)
+"""
+
+import asyncio
+import threading
+
+from api.utils import engine_pool
+
+class FakeEngine:
+    def run_pipeline(self, topic, platform, product_info, on_stage=None):
+        on_stage("Researching...", 10)
+        on_stage("Drafting...", 50)
+        return {"topic": topic, "platform": platform, "thread": threading.current_thread().name}
+
+class RecordingTimer:
+    def __init__(self, stages):
+        self.stages = stages
+
+    def __call__(self, message, progress=None):
+        self.stages.append(message)
+
+    def finish(self):
+        self.stages.append("finish")
+
+def test_pipeline_runs_on_the_engine_pool(monkeypatch):
+    monkeypatch.setattr(engine_pool, "get_engine", FakeEngine)
+    stages = []
+    monkeypatch.setattr(engine_pool, "StageTimer", lambda: RecordingTimer(stages))
+
+    result = asyncio.run(engine_pool.run_pipeline("AI", "LinkedIn", "TrendForge"))
+
+    assert result["topic"] == "AI"
+    assert result["thread"].startswith("content-engine")
+    assert stages == ["Researching...", "Drafting...", "finish"]
+
+def test_concurrent_calls_do_not_block_the_event_loop():
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.ensure_future(engine_pool.run_blocking(release.wait, 5))
+        # The loop keeps serving other work while the pool thread blocks
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        release.set()
+        return await blocked
+
+    assert asyncio.run(scenario()) is True
@@ -0,0 +1,56 @@
+"""
+Unit tests for the shared style example index (src/engine/content_engine.py)
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("credentials", reason="the content engine needs credentials.py")
+
+from src.engine import content_engine
+from src.engine.content_engine import ContentEngine, build_example_indexes
+
+@pytest.fixture
+def dataset(monkeypatch):
+    dataset = {
+        "linkedin_best": [
+            {"text": "east", "embedding": [2.0, 0.0]},
+            {"text": "north", "embedding": [0.0, 3.0]},
+            {"text": "north-east", "embedding": [1.0, 1.0]},
+        ],
+        "twitter_best": ["plain text, no embeddings"],
+        "trending_topics": ["AI"],
+    }
+    monkeypatch.setattr(content_engine, "DATASET", dataset)
+    monkeypatch.setattr(content_engine, "EXAMPLE_INDEXES", {})
+    return dataset
+
+def test_index_is_built_once_and_embeddings_are_dropped(dataset):
+    indexes = build_example_indexes()
+
+    assert set(indexes) == {"linkedin_best", "twitter_best"}
+    texts, matrix = indexes["linkedin_best"]
+    assert texts == ["east", "north", "north-east"]
+    assert matrix.dtype == np.float32
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+    assert indexes["twitter_best"] is None
+    assert dataset["linkedin_best"] == ["east", "north", "north-east"]
+
+    # A second build (another worker_init) keeps the matrices of the first
+    assert build_example_indexes()["linkedin_best"][1] is matrix
+
+def test_embeddings_are_kept_on_request(dataset):
+    build_example_indexes(drop_embeddings=False)
+    assert dataset["linkedin_best"][0]["embedding"] == [2.0, 0.0]
+
+def test_rank_examples_orders_by_cosine_similarity(dataset):
+    build_example_indexes()
+    engine = ContentEngine.__new__(ContentEngine)  # No Gemini model needed for ranking
+
+    ranked = engine.rank_examples("LinkedIn", [[5.0, 0.1], [0.0, 1.0]], n=2)
+    assert ranked == [["east", "north-east"], ["north", "north-east"]]
+
+def test_random_examples_read_the_texts_after_the_drop(dataset):
+    build_example_indexes()
+    engine = ContentEngine.__new__(ContentEngine)
+    assert sorted(engine.random_examples("LinkedIn", n=5)) == ["east", "north", "north-east"]
@@ -0,0 +1,49 @@
+"""
+Unit tests for the per-source run slots of the scheduled extractors (api/tasks/extraction_tasks.py)
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("credentials", reason="the API modules need credentials.py")
+
+import api.celery_app  # noqa: F401 (imports the task modules in the order the app does)
+from api.tasks import extraction_tasks
+from tests.fakes import FakeRedis
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(extraction_tasks, "get_redis", lambda: client)
+    return client
+
+def test_second_run_is_skipped_while_the_first_holds_the_slot(redis):
+    with extraction_tasks.source_slot("twitter", limit=1) as first:
+        with extraction_tasks.source_slot("twitter", limit=1) as second:
+            assert first and not second
+        with extraction_tasks.source_slot("youtube", limit=1) as other_source:
+            assert other_source
+    with extraction_tasks.source_slot("twitter", limit=1) as again:
+        assert again
+
+def test_limit_allows_overlapping_runs(redis):
+    with extraction_tasks.source_slot("twitter", limit=2) as first, \
+            extraction_tasks.source_slot("twitter", limit=2) as second, \
+            extraction_tasks.source_slot("twitter", limit=2) as third:
+        assert (first, second, third) == (True, True, False)
+
+def test_leaked_slot_expires_even_when_runs_keep_trying(redis, monkeypatch):
+    # A run killed at time_limit never releases its token
+    slot = extraction_tasks.source_slot("twitter", limit=1)
+    assert slot.__enter__()
+
+    now = time.time()
+    ttl = extraction_tasks.settings.EXTRACTION_TIME_LIMIT_SECONDS + 60
+    # Beats every hour keep finding the slot taken until the leaked token's own expiry
+    monkeypatch.setattr(extraction_tasks.time, "time", lambda: now + ttl - 1)
+    with extraction_tasks.source_slot("twitter", limit=1) as acquired:
+        assert not acquired
+    monkeypatch.setattr(extraction_tasks.time, "time", lambda: now + ttl + 1)
+    with extraction_tasks.source_slot("twitter", limit=1) as acquired:
+        assert acquired
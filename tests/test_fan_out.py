@@ -0,0 +1,91 @@
+"""
+Unit tests for the variation and campaign fan-out (api/tasks/content_tasks.py)
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("credentials", reason="the API modules need credentials.py")
+
+import api.celery_app  # noqa: F401 (imports the task modules in the order the app does)
+from api.celery_app import PRIORITY_LOW, PRIORITY_NORMAL
+from api.tasks import content_tasks
+from tests.fakes import FakeRedis
+
+class FakeEngine:
+    def __init__(self):
+        self.calls = []
+
+    def campaign_style_examples(self, topics, platforms, product_info):
+        self.calls.append((topics, platforms))
+        return {platform: {topic: f"{platform}/{topic} examples" for topic in topics} for platform in platforms}
+
+class FakeTask:
+    def __init__(self, task_id):
+        self.request = SimpleNamespace(id=task_id)
+        self.states = []
+
+    def update_state(self, state, meta):
+        self.states.append((state, meta))
+
+    def replace(self, signature):
+        return signature
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(content_tasks, "publish_progress", lambda job_id, status, *args, **kwargs: events.append((job_id, status)))
+    return events
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine()
+    redis = FakeRedis()
+    monkeypatch.setattr(content_tasks, "get_engine", lambda: engine)
+    monkeypatch.setattr(content_tasks, "get_redis", lambda: redis)
+    monkeypatch.setattr(content_tasks, "publish_progress", lambda *args, **kwargs: None)
+    return engine
+
+def test_one_item_per_topic_platform_and_variation(engine):
+    campaign = content_tasks.fan_out(
+        FakeTask("camp-1"), ["AI", "Cloud"], ["LinkedIn", "Twitter"], "Product", 2, "user@example.com", PRIORITY_LOW
+    )
+
+    items = campaign.tasks
+    assert len(items) == 2 * 2 * 2
+    assert {(item.args[1], item.args[2]) for item in items} == {
+        ("AI", "LinkedIn"), ("AI", "Twitter"), ("Cloud", "LinkedIn"), ("Cloud", "Twitter")
+    }
+    assert all(item.name == "generate_campaign_item" for item in items)
+    assert all(item.options["priority"] == PRIORITY_LOW for item in items)
+    assert items[0].args[4] == f"{items[0].args[2]}/{items[0].args[1]} examples"
+    assert campaign.body.name == "finish_campaign"
+    assert campaign.body.args == ("camp-1", "user@example.com")
+    [errback] = campaign.body.options["link_error"]
+    assert errback["task"] == "campaign_failed" and tuple(errback["args"]) == ("camp-1",)
+
+    # Examples are retrieved once for the whole campaign
+    assert engine.calls == [(["AI", "Cloud"], ["LinkedIn", "Twitter"])]
+    assert content_tasks.get_campaign_progress("camp-1") == {"total": 8, "completed": 0, "failed": 0}
+
+@pytest.mark.parametrize("task, args, expected", [
+    (content_tasks.generate_multiple_variations_task, ("AI", "LinkedIn", "Product", 3), (["AI"], ["LinkedIn"], 3, PRIORITY_NORMAL)),
+    (content_tasks.generate_campaign_task, (["AI", "Cloud"], ["Twitter"], "Product"), (["AI", "Cloud"], ["Twitter"], 1, PRIORITY_LOW)),
+])
+def test_variations_overtake_campaign_items(monkeypatch, task, args, expected):
+    calls = []
+    monkeypatch.setattr(content_tasks, "fan_out", lambda task, topics, platforms, product_info, num_variations, user_email, priority:
+                        calls.append((topics, platforms, num_variations, priority)))
+
+    task.run(*args)
+    assert calls == [expected]
+
+def test_failures_before_the_chord_are_published(published):
+    content_tasks.generate_campaign_task.on_failure(RuntimeError("no examples"), "camp-1", (), {}, None)
+    content_tasks.finish_campaign_task.on_failure(RuntimeError("database down"), "camp-2", (), {}, None)
+    assert published == [("camp-1", "failed"), ("camp-2", "failed")]
+
+def test_chord_error_callback_publishes_the_failure(published):
+    content_tasks.campaign_failed_task(SimpleNamespace(id="camp-1"), RuntimeError("item killed"), None, "camp-1")
+    assert published == [("camp-1", "failed")]
@@ -0,0 +1,51 @@
+"""
+Unit tests for anchor normalization of Google Trends chunks (src/extractors/google_trends_extract.py)
+"""
+
+import pandas as pd
+
+from src.extractors.google_trends_extract import chunk_keywords, rescale_to_anchor
+
+def test_every_chunk_carries_the_anchor():
+    chunks = chunk_keywords(["a", "b", "c", "d", "e", "f"], size=3, anchor="x")
+    assert chunks == [["x", "a", "b"], ["x", "c", "d"], ["x", "e", "f"]]
+
+def test_chunks_are_put_on_the_anchor_scale():
+    index = pd.date_range("2026-01-01", periods=2)
+    # Chunk 2 was normalized to a peak 4x higher: its anchor reads 4x lower
+    first = pd.DataFrame({"anchor": [40.0, 60.0], "a": [100.0, 50.0]}, index=index)
+    second = pd.DataFrame({"anchor": [10.0, 15.0], "b": [100.0, 20.0]}, index=index)
+
+    combined = rescale_to_anchor([first, second], "anchor")
+
+    assert list(combined.columns) == ["anchor", "a", "b"]
+    # b's raw 100 is worth 400 on the first chunk's scale, so it becomes the new peak
+    assert combined["b"].tolist() == [100.0, 20.0]
+    assert combined["a"].tolist() == [25.0, 12.5]
+    assert combined["anchor"].tolist() == [10.0, 15.0]
+
+def test_chunk_without_anchor_interest_is_left_unscaled():
+    index = pd.date_range("2026-01-01", periods=1)
+    first = pd.DataFrame({"anchor": [50.0], "a": [100.0]}, index=index)
+    second = pd.DataFrame({"anchor": [0.0], "b": [40.0]}, index=index)
+
+    combined = rescale_to_anchor([first, second], "anchor")
+    assert combined.loc[index[0]].tolist() == [50.0, 100.0, 40.0]
+
+def test_first_chunk_without_anchor_interest_is_not_the_reference():
+    index = pd.date_range("2026-01-01", periods=1)
+    first = pd.DataFrame({"anchor": [0.0], "a": [30.0]}, index=index)
+    second = pd.DataFrame({"anchor": [50.0], "b": [100.0]}, index=index)
+    third = pd.DataFrame({"anchor": [25.0], "c": [40.0]}, index=index)
+
+    combined = rescale_to_anchor([first, second, third], "anchor")
+    # second is the reference; third is doubled onto its scale; first is left as is
+    assert combined.loc[index[0]].tolist() == [50.0, 30.0, 100.0, 80.0]
+
+def test_anchor_without_interest_anywhere_leaves_chunks_unscaled():
+    index = pd.date_range("2026-01-01", periods=1)
+    first = pd.DataFrame({"anchor": [0.0], "a": [50.0]}, index=index)
+    second = pd.DataFrame({"anchor": [0.0], "b": [25.0]}, index=index)
+
+    combined = rescale_to_anchor([first, second], "anchor")
+    assert combined.loc[index[0]].tolist() == [0.0, 100.0, 50.0]
@@ -0,0 +1,67 @@
+"""
+Unit tests for the record/replay cache (src/utils/http_cache.py)
+"""
+
+import pytest
+
+from src.extractors.twitter_data_extractor import parse_page
+from src.utils.http_cache import CacheMiss, cached_call
+
+# Shape of a search_recent_tweets JSON body (requests.Response.json())
+TWEETS_PAYLOAD = {
+    "data": [
+        {"id": "2", "text": "launch day", "author_id": "10", "created_at": "2026-10-01T00:00:00.000Z",
+         "public_metrics": {"like_count": 5, "retweet_count": 1, "reply_count": 0, "quote_count": 0},
+         "entities": {"hashtags": [{"tag": "AI"}]}},
+        {"id": "1", "text": "new product", "author_id": "11", "created_at": "2026-09-30T00:00:00.000Z",
+         "public_metrics": {"like_count": 2, "retweet_count": 0, "reply_count": 1, "quote_count": 0}},
+    ],
+    "includes": {"users": [
+        {"id": "10", "username": "maker", "name": "Maker", "public_metrics": {"followers_count": 100}},
+    ]},
+    "meta": {"newest_id": "2", "result_count": 2},
+}
+
+def test_record_then_replay_returns_the_same_payload(tmp_path):
+    params = {"query": "new product", "days_ago": 7}
+    recorded = cached_call("twitter", "search_recent_tweets", params, lambda: TWEETS_PAYLOAD,
+                           mode="record", base_dir=str(tmp_path))
+
+    def no_network():
+        raise AssertionError("replay must not call the API")
+
+    replayed = cached_call("twitter", "search_recent_tweets", params, no_network,
+                           mode="replay", base_dir=str(tmp_path))
+    assert replayed == recorded == TWEETS_PAYLOAD
+
+def test_replay_of_unrecorded_call_raises_cache_miss(tmp_path):
+    with pytest.raises(CacheMiss):
+        cached_call("twitter", "search_recent_tweets", {"query": "x"}, lambda: None,
+                    mode="replay", base_dir=str(tmp_path))
+
+def test_ttl_reuses_fresh_entries(tmp_path):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"rows": len(calls)}
+
+    first = cached_call("google_trends", "related_queries", {"kw": ["ai"]}, fetch, mode="off",
+                        base_dir=str(tmp_path), ttl=3600)
+    second = cached_call("google_trends", "related_queries", {"kw": ["ai"]}, fetch, mode="off",
+                         base_dir=str(tmp_path), ttl=3600)
+    assert first == second == {"rows": 1}
+    assert len(calls) == 1
+
+def test_replayed_twitter_payload_parses(tmp_path):
+    cached_call("twitter", "search_recent_tweets", {"q": 1}, lambda: TWEETS_PAYLOAD,
+                mode="record", base_dir=str(tmp_path))
+    payload = cached_call("twitter", "search_recent_tweets", {"q": 1}, lambda: None,
+                          mode="replay", base_dir=str(tmp_path))
+
+    df = parse_page(payload, '"new product"')
+    assert list(df["tweet_id"]) == ["2", "1"]
+    assert list(df["likes"]) == [5, 2]
+    assert list(df["author_username"].fillna("")) == ["maker", ""]
+    assert list(df["author_followers"]) == [100, 0]
+    assert df["hashtags"].tolist() == [["AI"], []]
@@ -0,0 +1,95 @@
+"""
+Unit tests for idempotent job dispatch (api/utils/idempotency.py)
+"""
+
+import asyncio
+
+import pytest
+import redis
+
+from api.utils import idempotency
+from api.utils.idempotency import LocalRegistry, claim_job, release_job, request_fingerprint
+from tests.fakes import FakeAsyncRedis
+
+def test_fingerprint_ignores_case_and_whitespace():
+    a = request_fingerprint("generate", topic="AI  in Retail", platform="LinkedIn", num_variations=2)
+    b = request_fingerprint("generate", topic=" ai in retail", platform="linkedin", num_variations=2)
+    assert a == b
+    assert a != request_fingerprint("generate", topic="AI in Retail", platform="LinkedIn", num_variations=3)
+    assert a != request_fingerprint("campaign", topic="AI in Retail", platform="LinkedIn", num_variations=2)
+
+def test_idempotency_key_replaces_the_fields():
+    a = request_fingerprint("generate", "key-1", topic="one")
+    assert a == request_fingerprint("generate", "key-1", topic="two")
+    assert a != request_fingerprint("generate", "key-2", topic="one")
+
+def test_local_registry_holds_a_fingerprint_for_the_window(monkeypatch):
+    registry = LocalRegistry()
+    now = [100.0]
+    monkeypatch.setattr(idempotency.time, "monotonic", lambda: now[0])
+
+    assert registry.claim("fp", "job-1", window=10) is None
+    assert registry.claim("fp", "job-2", window=10) == "job-1"
+    registry.release("fp", "job-2")  # Not the holder: no effect
+    assert registry.claim("fp", "job-3", window=10) == "job-1"
+    now[0] += 11
+    assert registry.claim("fp", "job-4", window=10) is None
+
+def test_claim_and_release_through_redis(monkeypatch):
+    client = FakeAsyncRedis()
+    monkeypatch.setattr(idempotency, "get_async_redis", lambda: client)
+
+    async def scenario():
+        assert await claim_job("fp", "job-1", window=60) is None
+        assert await claim_job("fp", "job-2", window=60) == "job-1"
+        await release_job("fp", "job-1")
+        return await claim_job("fp", "job-3", window=60)
+
+    assert asyncio.run(scenario()) is None
+
+def test_local_registry_stands_in_when_redis_is_down(monkeypatch):
+    class DownRedis:
+        def __getattr__(self, name):
+            async def fail(*args, **kwargs):
+                raise redis.ConnectionError("down")
+            return fail
+
+    monkeypatch.setattr(idempotency, "get_async_redis", lambda: DownRedis())
+    monkeypatch.setattr(idempotency, "local_registry", LocalRegistry())
+
+    async def scenario():
+        return await claim_job("fp", "job-1", window=60), await claim_job("fp", "job-2", window=60)
+
+    assert asyncio.run(scenario()) == (None, "job-1")
+
+def test_dispatch_once_sends_identical_requests_once(monkeypatch):
+    pytest.importorskip("credentials", reason="the Celery app needs credentials.py")
+    client = FakeAsyncRedis()
+    monkeypatch.setattr(idempotency, "get_async_redis", lambda: client)
+    monkeypatch.setattr(idempotency, "AsyncResult", lambda job_id, app: type("Result", (), {"state": "STARTED"})())
+    sent = []
+
+    async def scenario():
+        first = await idempotency.dispatch_once("fp", sent.append)
+        second = await idempotency.dispatch_once("fp", sent.append)
+        return first, second
+
+    (job_id, first_dedup), (same_id, second_dedup) = asyncio.run(scenario())
+    assert sent == [job_id]
+    assert same_id == job_id
+    assert (first_dedup, second_dedup) == (False, True)
+
+def test_failed_job_does_not_block_a_retry(monkeypatch):
+    pytest.importorskip("credentials", reason="the Celery app needs credentials.py")
+    client = FakeAsyncRedis()
+    monkeypatch.setattr(idempotency, "get_async_redis", lambda: client)
+    monkeypatch.setattr(idempotency, "AsyncResult", lambda job_id, app: type("Result", (), {"state": "FAILURE"})())
+    sent = []
+
+    async def scenario():
+        await idempotency.dispatch_once("fp", sent.append)
+        return await idempotency.dispatch_once("fp", sent.append)
+
+    job_id, deduplicated = asyncio.run(scenario())
+    assert not deduplicated
+    assert sent[-1] == job_id and len(sent) == 2
@@ -0,0 +1,34 @@
+"""
+Unit tests for the job progress endpoints (api/routers/content.py)
+"""
+
+import pytest
+
+pytest.importorskip("credentials", reason="the API modules need credentials.py")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.celery_app  # noqa: F401 (imports the task modules in the order the app does)
+from api.routers import content
+
+@pytest.fixture
+def client(monkeypatch):
+    async def events(job_id, backend_event=None):
+        yield None
+        yield {"job_id": job_id, "status": "completed", "progress": 100}
+
+    monkeypatch.setattr(content, "progress_events", events)
+    app = FastAPI()
+    app.include_router(content.router)
+    return TestClient(app)
+
+def test_websocket_heartbeats_are_pings(client):
+    path = content.router.url_path_for("job_events_socket", job_id="job-1")
+    with client.websocket_connect(path) as websocket:
+        assert websocket.receive_json() == {"type": "ping"}
+        assert websocket.receive_json()["status"] == "completed"
+
+def test_sse_heartbeats_are_comments(client):
+    response = client.get(content.router.url_path_for("stream_job_events", job_id="job-1"))
+    assert response.text.startswith(": keep-alive\n\nevent: progress\n")
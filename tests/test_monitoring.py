@@ -0,0 +1,109 @@
+"""
+Unit tests for the Prometheus middleware, stage timer and request profiler
+(api/utils/monitoring.py, api/utils/profiler.py)
+"""
+
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.testclient import TestClient
+
+from api.utils import monitoring
+from api.utils.monitoring import MetricsMiddleware, StageTimer, route_label
+from api.utils.profiler import start_sampler, write_profile
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"item_id": item_id}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/slow")
+    async def slow():
+        await run_in_threadpool(busy_loop, 0.1)
+        return {}
+
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def sample(metric, name, **labels):
+    """Current value of one sample; read from the metric so the scrape-time collectors stay out"""
+    for family in metric.collect():
+        for s in family.samples:
+            if s.name == name and s.labels == labels:
+                return s.value
+    return 0
+
+def test_route_label_uses_the_route_template():
+    app = make_app()
+    scope = {"type": "http", "method": "GET", "path": "/items/42", "root_path": "", "app": app}
+    assert route_label(scope) == "/items/{item_id}"
+    assert route_label(dict(scope, path="/nowhere")) == "unmatched"
+
+def test_requests_are_counted_by_route_and_status():
+    client = TestClient(make_app(), raise_server_exceptions=False)
+    ok = sample(monitoring.REQUESTS, "trendforge_http_requests_total", method="GET", route="/items/{item_id}", status="200")
+    failed = sample(monitoring.REQUESTS, "trendforge_http_requests_total", method="GET", route="/boom", status="500")
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/boom")
+
+    assert sample(monitoring.REQUESTS, "trendforge_http_requests_total", method="GET", route="/items/{item_id}", status="200") == ok + 2
+    assert sample(monitoring.REQUESTS, "trendforge_http_requests_total", method="GET", route="/boom", status="500") == failed + 1
+    assert sample(monitoring.REQUESTS_IN_PROGRESS, "trendforge_http_requests_in_progress", method="GET", route="/items/{item_id}") == 0
+
+def test_stage_timer_observes_each_stage():
+    before = sample(monitoring.ENGINE_STAGE_SECONDS, "trendforge_content_engine_stage_seconds_count", stage="Drafting")
+    timer = StageTimer()
+    timer("Researching trends...", 10)
+    timer("Drafting...", 40)
+    time.sleep(0.01)
+    timer.finish()
+
+    assert sample(monitoring.ENGINE_STAGE_SECONDS, "trendforge_content_engine_stage_seconds_count", stage="Drafting") == before + 1
+    assert sample(monitoring.ENGINE_STAGE_SECONDS, "trendforge_content_engine_stage_seconds_sum", stage="Drafting") >= 0.01
+    assert sample(monitoring.ENGINE_STAGE_SECONDS, "trendforge_content_engine_stage_seconds_count", stage="Researching trends") >= 1
+
+def test_sampler_records_work_on_other_threads(tmp_path):
+    worker = threading.Thread(target=busy_loop, args=(0.2,), name="engine-worker")
+    sampler = start_sampler(1)
+    worker.start()
+    worker.join()
+    stacks = sampler.stop()
+
+    engine_stacks = [stack for stack in stacks if stack.startswith("engine-worker;")]
+    assert engine_stacks and any("busy_loop" in stack for stack in engine_stacks)
+    assert not any(stack.startswith("request-profiler") for stack in stacks)
+
+    path = write_profile(stacks, "GET", "/content/generate", 0.2, profile_dir=str(tmp_path))
+    assert path.endswith("_GET_content_generate_200ms.folded")
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in open(path)) == sum(stacks.values())
+
+def test_slow_sampled_requests_are_profiled(monkeypatch):
+    monkeypatch.setattr(monitoring.settings, "PROFILER_ENABLED", True)
+    monkeypatch.setattr(monitoring.settings, "PROFILER_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(monitoring.settings, "PROFILER_SLOW_REQUEST_MS", 50)
+    monkeypatch.setattr(monitoring.settings, "PROFILER_INTERVAL_MS", 1)
+    written = []
+    monkeypatch.setattr(monitoring, "write_profile", lambda stacks, method, path, seconds: written.append((path, stacks)))
+    client = TestClient(make_app())
+
+    client.get("/items/1")
+    client.get("/slow")
+
+    assert [path for path, _ in written] == ["/slow"]
+    # The handler's blocking work ran in the threadpool, not on the event loop
+    assert any("busy_loop" in stack for stack in written[0][1])
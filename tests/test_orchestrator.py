@@ -0,0 +1,60 @@
+"""
+Unit tests for the extractor orchestrator (src/extractors/orchestrator.py)
+"""
+
+import threading
+
+import pytest
+
+from src.extractors.orchestrator import Step, check_dependencies, run_steps
+
+def test_steps_wait_for_their_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def record(name):
+        def func():
+            with lock:
+                order.append(name)
+            return name
+        return func
+
+    steps = {
+        "curator": Step("curator", record("curator"), ["twitter", "youtube"]),
+        "twitter": Step("twitter", record("twitter")),
+        "youtube": Step("youtube", record("youtube")),
+    }
+    run_steps(steps)
+    assert order[-1] == "curator"
+    assert all(step.status == "ok" for step in steps.values())
+
+def test_failed_and_exiting_steps_do_not_stop_the_run():
+    def fails():
+        raise RuntimeError("boom")
+
+    def exits():
+        exit()
+
+    steps = {
+        "a": Step("a", fails),
+        "b": Step("b", exits),
+        "curator": Step("curator", lambda: "done", ["a", "b"]),
+    }
+    run_steps(steps)
+    assert steps["a"].status == steps["b"].status == "failed"
+    assert isinstance(steps["b"].error, SystemExit)
+    assert steps["curator"].result == "done"
+
+def test_keyboard_interrupt_propagates():
+    def interrupted():
+        raise KeyboardInterrupt
+
+    steps = {"a": Step("a", interrupted), "curator": Step("curator", lambda: None, ["a"])}
+    with pytest.raises(KeyboardInterrupt):
+        run_steps(steps)
+    assert steps["curator"].status == "pending"
+
+def test_cycles_are_rejected():
+    steps = {"a": Step("a", None, ["b"]), "b": Step("b", None, ["a"])}
+    with pytest.raises(ValueError, match="cycle"):
+        check_dependencies(steps)
@@ -0,0 +1,42 @@
+"""
+Unit tests for the keyset pagination helpers (api/utils/pagination.py)
+"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from api.utils import pagination
+from api.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 19, 12, 30, 5, 123456)
+    row_id = uuid.uuid4()
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor  # URL-safe, unpadded
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime(2026, 1, 1), uuid.uuid4())[:-3]])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+def test_counts_are_cached_per_user_and_invalidated(monkeypatch):
+    monkeypatch.setattr(pagination, "_counts", {})
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    pagination.cache_count((alice, "LinkedIn"), 12)
+    pagination.cache_count((bob, None), 3)
+
+    assert pagination.cached_count((alice, "LinkedIn")) == 12
+    pagination.invalidate_counts(alice)
+    assert pagination.cached_count((alice, "LinkedIn")) is None
+    assert pagination.cached_count((bob, None)) == 3
+
+def test_counts_expire(monkeypatch):
+    monkeypatch.setattr(pagination, "_counts", {})
+    now = pagination.time.monotonic()
+    pagination.cache_count(("user", None), 5)
+    monkeypatch.setattr(pagination.time, "monotonic", lambda: now + pagination.settings.HISTORY_COUNT_TTL_SECONDS + 1)
+    assert pagination.cached_count(("user", None)) is None
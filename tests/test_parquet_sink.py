@@ -0,0 +1,48 @@
+"""
+Unit tests for the partitioned Parquet sink (src/utils/parquet_sink.py)
+"""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.utils.parquet_sink import iter_dataset, parse_list, read_dataset, to_typed_frame, write_dataset
+
+def tweets(ids, likes):
+    return pd.DataFrame({
+        "tweet_id": ids,
+        "text": [f"tweet {i}" for i in ids],
+        "likes": likes,
+        "created_at": ["2026-10-01T10:00:00.000Z"] * len(ids),
+        "hashtags": ["['AI', 'EV']"] + [[] for _ in ids[1:]],
+    })
+
+def test_columns_are_typed():
+    typed = to_typed_frame(tweets(["1", "2"], ["5", "n/a"]), "tweets")
+    assert typed["likes"].tolist() == [5, 0]
+    assert str(typed["created_at"].dtype) == "datetime64[ns, UTC]"
+    assert typed["hashtags"].tolist() == [["AI", "EV"], []]
+    assert parse_list(float("nan")) == [] and parse_list("solo") == ["solo"]
+
+def test_partitions_are_appended_and_filtered(tmp_path):
+    base_dir = str(tmp_path)
+    write_dataset(tweets(["1", "2"], [5, 6]), "tweets", "Twitter", "2026-10-01", base_dir=base_dir)
+    write_dataset(tweets(["3"], [7]), "tweets", "Twitter", "2026-10-02", base_dir=base_dir)
+
+    everything = read_dataset("tweets", columns=["tweet_id", "likes"], base_dir=base_dir)
+    assert sorted(everything["tweet_id"]) == ["1", "2", "3"]
+
+    recent = read_dataset("tweets", columns=["tweet_id"], filters=[("extraction_date", ">=", "2026-10-02")],
+                          base_dir=base_dir)
+    assert recent["tweet_id"].tolist() == ["3"]
+
+def test_batches_carry_a_running_index(tmp_path):
+    write_dataset(tweets([str(i) for i in range(5)], list(range(5))), "tweets", "Twitter", "2026-10-01",
+                  base_dir=str(tmp_path))
+    batches = list(iter_dataset("tweets", columns=["tweet_id"], batch_size=2, base_dir=str(tmp_path)))
+    assert [list(batch.index) for batch in batches] == [[0, 1], [2, 3], [4]]
+
+def test_missing_dataset_reads_empty(tmp_path):
+    assert read_dataset("tweets", columns=["tweet_id"], base_dir=str(tmp_path)).empty
+    assert list(iter_dataset("tweets", base_dir=str(tmp_path))) == []
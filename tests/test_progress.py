@@ -0,0 +1,77 @@
+"""
+Unit tests for job progress events over Redis pub/sub (api/utils/progress.py)
+"""
+
+import asyncio
+import json
+
+import pytest
+import redis
+
+from api.utils import progress
+from tests.fakes import FakeAsyncRedis, FakeRedis
+
+@pytest.fixture
+def client(monkeypatch):
+    sync = FakeRedis()
+    monkeypatch.setattr(progress, "get_redis", lambda: sync)
+    monkeypatch.setattr(progress, "get_async_redis", lambda: FakeAsyncRedis(sync))
+    return sync
+
+async def collect(events, limit=10):
+    received = []
+    async for event in events:
+        received.append(event)
+        if len(received) == limit:
+            break
+    return received
+
+def test_publish_stores_the_snapshot(client):
+    event = progress.publish_progress("job-1", "processing", 40, "Drafting...", variation=2)
+
+    assert event == {"job_id": "job-1", "status": "processing", "progress": 40, "message": "Drafting...", "variation": 2}
+    assert json.loads(client.get(progress.PROGRESS_SNAPSHOT_KEY.format("job-1"))) == event
+
+def test_publish_failure_does_not_raise(monkeypatch):
+    class DownRedis:
+        def pipeline(self):
+            raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(progress, "get_redis", lambda: DownRedis())
+    assert progress.publish_progress("job-1", "completed", 100)["status"] == "completed"
+
+def test_finished_job_yields_only_its_snapshot(client):
+    progress.publish_progress("job-1", "completed", 100, content_id="abc")
+
+    events = asyncio.run(collect(progress.progress_events("job-1")))
+    assert [event["status"] for event in events] == ["completed"]
+    assert client.subscribers[progress.PROGRESS_CHANNEL.format("job-1")] == []
+
+def test_events_are_forwarded_until_the_job_finishes(client):
+    async def scenario():
+        events = progress.progress_events("job-1")
+        assert await anext(events) is None  # No snapshot or event yet: heartbeat
+        progress.publish_progress("job-1", "processing", 50)
+        progress.publish_progress("job-1", "completed", 100)
+        progress.publish_progress("job-1", "processing", 10)  # After the end: not read
+        return await collect(events)
+
+    assert [event["progress"] for event in asyncio.run(scenario())] == [50, 100]
+
+def test_fallback_stands_in_for_a_missing_snapshot(client):
+    async def fallback():
+        return {"job_id": "job-1", "status": "failed", "progress": 0}
+
+    events = asyncio.run(collect(progress.progress_events("job-1", backend_event=fallback)))
+    assert [event["status"] for event in events] == ["failed"]
+
+def test_heartbeat_ends_the_stream_of_a_job_that_failed_silently(client):
+    progress.publish_progress("job-1", "processing", 30)
+    states = ["processing", "failed"]
+
+    async def backend_event():
+        return {"job_id": "job-1", "status": states.pop(0), "progress": 0}
+
+    events = asyncio.run(collect(progress.progress_events("job-1", backend_event)))
+    assert [event and event["status"] for event in events] == ["processing", None, "failed"]
+    assert client.subscribers[progress.PROGRESS_CHANNEL.format("job-1")] == []
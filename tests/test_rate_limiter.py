@@ -0,0 +1,78 @@
+"""
+Unit tests for the adaptive token bucket (src/utils/rate_limiter.py)
+"""
+
+import time
+
+import pytest
+
+from src.utils import rate_limiter
+from src.utils.http_cache import Fetched, cached_call
+from src.utils.rate_limiter import AdaptiveRateLimiter, is_rate_limit_error, seconds_until_reset
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records the limiter's sleeps instead of sleeping"""
+    calls = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", calls.append)
+    return calls
+
+def test_burst_is_free_then_calls_wait_for_refill(sleeps):
+    limiter = AdaptiveRateLimiter("test", rate=2.0, burst=3)
+    waits = [limiter.acquire() for _ in range(4)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.5, abs=0.05)
+    assert len(sleeps) == 1
+
+def test_success_increases_rate_additively_up_to_max():
+    limiter = AdaptiveRateLimiter("test", rate=1.0, max_rate=1.25, increase=0.1)
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(1.1)
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.rate == 1.25
+
+def test_throttle_halves_rate_and_pauses_for_retry_after(sleeps):
+    limiter = AdaptiveRateLimiter("test", rate=4.0, min_rate=1.5, burst=5)
+    limiter.on_throttle(headers={"Retry-After": "2"})
+    assert limiter.rate == 2.0
+    assert limiter.throttled == 1
+    assert limiter.acquire() == pytest.approx(2.5, abs=0.05)  # Pause plus one token at 2/s
+    limiter.on_throttle(retry_after=0.01)
+    assert limiter.rate == 1.5  # Never below min_rate
+
+def test_exhausted_remaining_header_pauses_until_reset(sleeps):
+    limiter = AdaptiveRateLimiter("test", rate=1.0, burst=5)
+    limiter.on_success({"x-rate-limit-remaining": "3", "x-rate-limit-reset": str(time.time() + 60)})
+    assert limiter.acquire() == 0.0
+
+    limiter.on_success({"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(time.time() + 3)})
+    assert limiter.acquire() == pytest.approx(3 + 1 / limiter.rate, abs=0.1)  # Reset, then one token
+
+def test_reset_header_as_epoch_or_delta():
+    assert seconds_until_reset({"x-ratelimit-reset": "30"}) == 30
+    assert seconds_until_reset({"x-rate-limit-reset": str(time.time() + 10)}) == pytest.approx(10, abs=0.5)
+    assert seconds_until_reset({}) is None
+
+def test_rate_limit_errors_are_recognized():
+    class Response:
+        status_code = 429
+        headers = {}
+
+    class HttpError(Exception):
+        response = Response()
+
+    class TooManyRequests(Exception):
+        pass
+
+    assert is_rate_limit_error(HttpError())
+    assert is_rate_limit_error(TooManyRequests())
+    assert not is_rate_limit_error(ValueError())
+
+def test_cached_call_hands_response_headers_to_limiter(tmp_path, sleeps):
+    limiter = AdaptiveRateLimiter("test", rate=1.0, burst=5)
+    headers = {"x-rate-limit-remaining": "0", "x-rate-limit-reset": "3"}
+    data = cached_call("twitter", "search_recent_tweets", {"q": 1}, lambda: Fetched({"meta": {}}, headers),
+                       limiter=limiter, mode="record", base_dir=str(tmp_path))
+    assert data == {"meta": {}}  # Only the data is returned and cached
+    assert limiter.acquire() >= 2.9
@@ -0,0 +1,96 @@
+"""
+Unit tests for the NDJSON record sink (src/utils/record_sink.py) and chunked extractor outputs
+"""
+
+import pandas as pd
+
+from src.extractors import base
+from src.extractors.base import Extractor, ExtractorOutput
+from src.utils.checkpoint import Checkpoint
+from src.utils.record_sink import NDJSONFrames, NDJSONSink
+
+def test_sink_flushes_in_batches(tmp_path):
+    path = str(tmp_path / "posts.ndjson")
+    with NDJSONSink(path, batch_size=2) as sink:
+        for i in range(3):
+            sink.write({"post_id": str(i)})
+        assert sink.written == 2 and sink.buffered() == 1
+    assert sink.written == 3
+    assert len(open(path, encoding="utf-8").readlines()) == 3
+
+def test_rotate_keeps_only_the_previous_run(tmp_path):
+    path = str(tmp_path / "posts.ndjson")
+    for run in ("first", "second", "third"):
+        sink = NDJSONSink(path)
+        sink.rotate()
+        with sink:
+            sink.write({"run": run})
+    assert [r["run"] for r in pd.read_json(path, lines=True).to_dict("records")] == ["third"]
+    assert [r["run"] for r in pd.read_json(path + ".1", lines=True).to_dict("records")] == ["second"]
+
+def test_frames_are_chunked_and_deduplicated(tmp_path):
+    path = str(tmp_path / "posts.ndjson")
+    with NDJSONSink(path) as sink:
+        for post_id, likes in [("a", 1), ("b", 2), ("a", 3), ("c", 4), ("d", 5)]:
+            sink.write({"post_id": post_id, "likes": likes})
+
+    chunks = list(NDJSONFrames(path, key="post_id", chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [2, 2]
+    assert chunks[0].to_dict("records") == [{"post_id": "b", "likes": 2}, {"post_id": "a", "likes": 3}]
+    # Re-iterable
+    assert sum(len(chunk) for chunk in NDJSONFrames(path, key="post_id", chunksize=3)) == 4
+
+class ChunkedExtractor(Extractor):
+    name = "chunked_test"
+    platform = "Test"
+    outputs = [ExtractorOutput("posts", "posts.csv", ["post_id"])]
+
+    def __init__(self, frames, **kwargs):
+        super().__init__(**kwargs)
+        self.frames = frames
+
+    def fetch(self, checkpoint):
+        return {"posts": self.frames}
+
+    def normalize(self, outputs):
+        df = outputs.get("posts")
+        if df is None:
+            return super().normalize(outputs)
+        return pd.DataFrame({"platform": self.platform, "record_id": df["post_id"]}, columns=base.RECORD_COLUMNS)
+
+def test_extractor_writes_chunked_outputs_chunk_by_chunk(tmp_path, monkeypatch):
+    monkeypatch.setattr(base, "Checkpoint", lambda name: Checkpoint(name, base_dir=str(tmp_path / "checkpoints")))
+    monkeypatch.setattr(base, "is_replay", lambda: True)
+    path = str(tmp_path / "posts.ndjson")
+    with NDJSONSink(path) as sink:
+        for post_id in ["a", "b", "c", "a", "d"]:
+            sink.write({"post_id": post_id, "text": post_id.upper()})
+
+    extractor = ChunkedExtractor(NDJSONFrames(path, key="post_id", chunksize=2), data_dir=str(tmp_path),
+                                 upload=False, notify=False)
+    result = extractor.run(full_refresh=True)
+
+    assert result["rows"] == {"posts": 4}
+    assert list(pd.read_csv(tmp_path / "posts.csv")["post_id"]) == ["a", "b", "c", "d"]
+    # One normalized frame per chunk, de-duplicated by the orchestrator when it writes them
+    assert [len(records) for records in result["records"]] == [2, 2, 1]
+
+def test_records_are_written_frame_by_frame(tmp_path):
+    from src.extractors.orchestrator import RECORDS_FILENAME, Step, write_records
+
+    def frames(platform, *ids):
+        return iter([pd.DataFrame({"platform": platform, "record_id": list(chunk)}, columns=base.RECORD_COLUMNS)
+                     for chunk in ids])
+
+    steps = {"linkedin": Step("linkedin", None), "twitter": Step("twitter", None)}
+    steps["linkedin"].status, steps["linkedin"].result = "ok", {"records": frames("LinkedIn", "ab", "bc")}
+    steps["twitter"].status, steps["twitter"].result = "ok", {"records": frames("Twitter", "a")}
+
+    assert write_records(steps, data_dir=str(tmp_path), full_refresh=True) == 4
+    steps["twitter"].result = {"records": frames("Twitter", "ab")}
+    assert write_records({"twitter": steps["twitter"]}, data_dir=str(tmp_path), full_refresh=False) == 1
+
+    written = pd.read_csv(tmp_path / RECORDS_FILENAME, dtype=str)
+    assert list(zip(written["platform"], written["record_id"])) == [
+        ("LinkedIn", "a"), ("LinkedIn", "b"), ("LinkedIn", "c"), ("Twitter", "a"), ("Twitter", "b")
+    ]
@@ -0,0 +1,82 @@
+"""
+Unit tests for the coalescing Slack dispatcher (api/utils/slack.py)
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from api.utils import slack
+from api.utils.slack import DIGEST_MAX_LINES, SlackDispatcher, digest_text
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """Posted payloads; answers with the queued status codes, then 200"""
+    posted = []
+    statuses = []
+
+    def handler(request):
+        posted.append(json.loads(request.content))
+        return httpx.Response(statuses.pop(0) if statuses else 200, headers={"Retry-After": "0"})
+
+    monkeypatch.setattr(slack.settings, "SLACK_WEBHOOK_URL", "https://hooks.example/T000")
+    monkeypatch.setattr(slack, "SLACK_MIN_INTERVAL_SECONDS", 0)
+    client_class = httpx.AsyncClient
+    monkeypatch.setattr(slack.httpx, "AsyncClient", lambda timeout: client_class(transport=httpx.MockTransport(handler)))
+    return posted, statuses
+
+def test_single_message_is_sent_as_is():
+    assert digest_text(["Done"]) == "Done"
+
+def test_digest_numbers_and_caps_the_lines():
+    text = digest_text([f"item {i}" for i in range(DIGEST_MAX_LINES + 5)])
+    assert text.startswith(f"*{DIGEST_MAX_LINES + 5} notifications*")
+    assert f"{DIGEST_MAX_LINES}. item {DIGEST_MAX_LINES - 1}" in text
+    assert "item 21" not in text and text.endswith("_...and 5 more_")
+
+def test_messages_in_one_window_become_one_post_per_sender(webhook):
+    posted, _ = webhook
+    dispatcher = SlackDispatcher(window_seconds=0.05, max_retries=0)
+
+    async def scenario():
+        for i in range(3):
+            assert dispatcher.notify(f"Generated {i}")
+        dispatcher.notify("Report ready", username="Reports")
+        await asyncio.sleep(0.2)
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+    assert len(posted) == 2 and dispatcher.sent == 2
+    assert posted[0]["text"].startswith("*3 notifications*")
+    assert posted[1] == {"text": "Report ready", "username": "Reports", "icon_emoji": ":robot_face:"}
+
+def test_rate_limited_post_is_retried(webhook):
+    posted, statuses = webhook
+    statuses.append(429)
+    dispatcher = SlackDispatcher(window_seconds=0, max_retries=2)
+
+    async def scenario():
+        dispatcher.notify("Done")
+        await dispatcher.stop()  # Sends what is still queued
+
+    asyncio.run(scenario())
+    assert len(posted) == 2 and dispatcher.sent == 1
+
+def test_stop_flushes_the_batch_being_built(webhook):
+    posted, _ = webhook
+    dispatcher = SlackDispatcher(window_seconds=60, max_retries=0)
+
+    async def scenario():
+        dispatcher.notify("First")
+        await asyncio.sleep(0.01)  # _run has taken "First" and waits for the window
+        dispatcher.notify("Second")
+        await asyncio.wait_for(dispatcher.stop(), timeout=1)
+
+    asyncio.run(scenario())
+    assert [payload["text"] for payload in posted] == [digest_text(["First", "Second"])]
+
+def test_without_a_webhook_nothing_is_queued(monkeypatch):
+    monkeypatch.setattr(slack.settings, "SLACK_WEBHOOK_URL", None)
+    assert SlackDispatcher().notify("Done") is False
@@ -0,0 +1,46 @@
+"""
+Unit tests for the Celery queue routing (api/celery_app.py, api/worker.py)
+"""
+
+import sys
+
+import pytest
+
+pytest.importorskip("credentials", reason="the API modules need credentials.py")
+
+from api import worker
+from api.celery_app import BULK_QUEUE, INTERACTIVE_QUEUE, MAINTENANCE_QUEUE, TASK_ROUTES, celery_app
+
+def test_every_project_task_has_a_route():
+    tasks = {name for name in celery_app.tasks if not name.startswith("celery.")}
+    assert tasks == set(TASK_ROUTES)
+
+@pytest.mark.parametrize("task, queue", [
+    ("generate_content", INTERACTIVE_QUEUE),
+    ("generate_campaign_item", BULK_QUEUE),
+    ("run_extractor", MAINTENANCE_QUEUE),
+])
+def test_router_sends_tasks_to_their_queue(task, queue):
+    route = celery_app.amqp.router.route({}, task)
+    assert route["queue"].name == queue
+
+def test_priorities_favour_interactive_work():
+    assert TASK_ROUTES["generate_content"]["priority"] < TASK_ROUTES["generate_multiple_variations"]["priority"]
+    assert TASK_ROUTES["generate_multiple_variations"]["priority"] < TASK_ROUTES["generate_campaign_item"]["priority"]
+    assert celery_app.conf.broker_transport_options["priority_steps"] == list(range(10))
+
+@pytest.mark.parametrize("argv, concurrency", [
+    (["interactive"], None),
+    (["interactive", "bulk", "--concurrency", "2"], 2),
+])
+def test_worker_consumes_the_requested_queues(monkeypatch, argv, concurrency):
+    calls = []
+    monkeypatch.setattr(celery_app, "worker_main", calls.append)
+    monkeypatch.setattr(sys, "argv", ["worker", *argv])
+
+    worker.main()
+    queues = [arg for arg in argv if not arg.startswith("-") and not arg.isdigit()]
+    expected = concurrency or sum(worker.QUEUE_CONCURRENCY[queue] for queue in queues)
+    assert f"--queues={','.join(queues)}" in calls[0]
+    assert f"--concurrency={expected}" in calls[0]
+    assert f"--hostname={'+'.join(queues)}@%h" in calls[0]
@@ -0,0 +1,44 @@
+"""
+Unit tests for the in-process TTL cache (api/utils/ttl_cache.py)
+"""
+
+import pytest
+
+from api.utils import ttl_cache
+from api.utils.ttl_cache import TTLCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    return now
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TTLCache(ttl_seconds=30)
+    cache.set("job", {"status": "completed"})
+    clock[0] += 29
+    assert cache.get("job") == {"status": "completed"}
+    clock[0] += 2
+    assert cache.get("job") is None
+    assert cache.get("job", "missing") == "missing"
+
+def test_pop_removes_an_entry(clock):
+    cache = TTLCache(ttl_seconds=30)
+    cache.set("job", 1)
+    cache.pop("job")
+    cache.pop("unknown")
+    assert cache.get("job") is None
+
+def test_full_cache_drops_expired_then_oldest_entries(clock):
+    cache = TTLCache(ttl_seconds=10, max_entries=3)
+    cache.set("a", 1)
+    clock[0] += 5
+    cache.set("b", 2)
+    cache.set("c", 3)
+    clock[0] += 6  # "a" has expired
+    cache.set("d", 4)
+    assert [cache.get(key) for key in "bcd"] == [2, 3, 4]
+
+    cache.set("e", 5)  # Nothing expired: the oldest entry goes
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "cde"] == [3, 4, 5]
@@ -0,0 +1,72 @@
+"""
+Unit tests for the Twitter extractor's client handling and 429 retries
+(src/extractors/twitter_data_extractor.py)
+"""
+
+import threading
+
+import pytest
+import tweepy
+
+from src.extractors import twitter_data_extractor as twitter
+from src.utils import rate_limiter
+from src.utils.rate_limiter import AdaptiveRateLimiter
+
+class FakeResponse:
+    def __init__(self, status_code, payload, headers):
+        self.status_code = status_code
+        self.reason = "Too Many Requests" if status_code == 429 else "OK"
+        self.headers = headers
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+class FakeClient:
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = 0
+
+    def search_recent_tweets(self, **params):
+        response = self.responses[self.calls]
+        self.calls += 1
+        if response.status_code == 429:
+            raise tweepy.errors.TooManyRequests(response)
+        return response
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = AdaptiveRateLimiter("twitter", rate=1.0, burst=5)
+    sleeps = []
+    monkeypatch.setattr(twitter, "limiter", limiter)
+    monkeypatch.setattr(rate_limiter.time, "sleep", sleeps.append)
+    limiter.sleeps = sleeps
+    return limiter
+
+def test_client_waits_through_the_shared_limiter(monkeypatch):
+    monkeypatch.setattr(twitter, "get_credential", lambda name: "token")
+    monkeypatch.setattr(twitter, "_thread_local", threading.local())
+    client = twitter.get_client()
+    assert client.wait_on_rate_limit is False
+    assert twitter.get_client() is client
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(twitter.get_client()))
+    thread.start()
+    thread.join()
+    assert other[0] is not client
+
+def test_429_pauses_the_limiter_until_reset_then_retries(monkeypatch, limiter):
+    page = {"data": [{"id": "1", "text": "hi"}], "meta": {"result_count": 1}}
+    client = FakeClient([
+        FakeResponse(429, {"title": "Too Many Requests"}, {"x-rate-limit-reset": "7"}),
+        FakeResponse(200, page, {"x-rate-limit-remaining": "10"}),
+    ])
+    monkeypatch.setattr(twitter, "get_client", lambda: client)
+
+    payload = twitter.search_page({"query": "q"}, {}, {"query": "q"}, None, "q")
+
+    assert payload == page
+    assert client.calls == 2
+    assert limiter.throttled == 1
+    assert limiter.sleeps and limiter.sleeps[0] >= 7
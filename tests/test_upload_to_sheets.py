@@ -0,0 +1,97 @@
+"""
+Unit tests for the incremental Google Sheets sync (src/utils/upload_to_sheets.py)
+"""
+
+import pandas as pd
+import pytest
+
+from src.utils import upload_to_sheets as sheets
+
+class FakeWorksheet:
+    def __init__(self, title, rows):
+        self.title = title
+        self.rows = rows
+        self.row_count = max(len(rows), 1000)  # Grid size
+        self.cleared = False
+
+    def row_values(self, row):
+        return list(self.rows[row - 1]) if len(self.rows) >= row else []
+
+    def col_values(self, col, value_render_option=None):
+        return [row[col - 1] for row in self.rows if len(row) >= col]
+
+    def clear(self):
+        self.cleared = True
+        self.rows = []
+
+    def resize(self, rows, cols):
+        self.row_count = rows
+
+class FakeSpreadsheet:
+    def __init__(self, worksheet):
+        self.sheet = worksheet
+        self.requests = 0
+
+    def worksheet(self, name):
+        return self.sheet
+
+    def values_append(self, range_name, params, body):
+        self.requests += 1
+        self.sheet.rows.extend(body["values"])
+        self.sheet.row_count = max(self.sheet.row_count, len(self.sheet.rows))
+
+    def values_update(self, range_name, params, body):
+        self.requests += 1
+        start = int(range_name.rsplit("!A", 1)[1]) - 1
+        assert start + len(body["values"]) <= self.sheet.row_count  # Updates never add rows
+        self.sheet.rows[start:start + len(body["values"])] = body["values"]
+
+@pytest.fixture
+def sheet(tmp_path, monkeypatch):
+    worksheet = FakeWorksheet("Tweets", [["tweet_id", "text"], ["1", "old"], ["2", "older"]])
+    spreadsheet = FakeSpreadsheet(worksheet)
+    monkeypatch.setattr(sheets, "get_spreadsheet", lambda sheet_id: spreadsheet)
+    monkeypatch.setattr(sheets, "state_path", lambda sheet_id, name: str(tmp_path / f"{name}.json"))
+    monkeypatch.setattr(sheets, "_synced_keys", {})
+    return spreadsheet
+
+def test_first_sync_appends_to_existing_rows(sheet):
+    df = pd.DataFrame({"text": ["again", "new"], "tweet_id": ["2", "3"]})
+    assert sheets.sync_to_google_sheet(df, "sheet-id", "Tweets", ["tweet_id"]) == 1
+    assert not sheet.sheet.cleared
+    # Appended in the worksheet's column order
+    assert sheet.sheet.rows == [["tweet_id", "text"], ["1", "old"], ["2", "older"], ["3", "new"]]
+
+def test_later_syncs_only_append_keys_to_the_log(sheet, tmp_path):
+    sheets.sync_to_google_sheet(pd.DataFrame({"tweet_id": ["3"], "text": ["a"]}), "sheet-id", "Tweets", ["tweet_id"])
+    sheets.sync_to_google_sheet(pd.DataFrame({"tweet_id": ["3", "4"], "text": ["a", "b"]}), "sheet-id", "Tweets", ["tweet_id"])
+
+    assert [row[0] for row in sheet.sheet.rows] == ["tweet_id", "1", "2", "3", "4"]
+    # Seeded keys, then one line per synced row
+    assert (tmp_path / "Tweets.keys").read_text().splitlines()[-2:] == ["3", "4"]
+
+    sheets._synced_keys.clear() # A new process reads the log back
+    assert sheets.sync_to_google_sheet(pd.DataFrame({"tweet_id": ["4"], "text": ["b"]}), "sheet-id", "Tweets", ["tweet_id"]) == 0
+
+def test_empty_worksheet_gets_a_header(sheet):
+    sheet.sheet.rows = []
+    sheets.sync_to_google_sheet(pd.DataFrame({"tweet_id": ["1"], "text": ["a"]}), "sheet-id", "Tweets", ["tweet_id"])
+    assert sheet.sheet.rows == [["tweet_id", "text"], ["1", "a"]]
+
+def test_unkeyed_sync_replaces_the_worksheet(sheet):
+    sheets.sync_to_google_sheet(pd.DataFrame({"keyword": ["ai"]}), "sheet-id", "Tweets")
+    assert sheet.sheet.cleared
+    assert sheet.sheet.rows == [["keyword"], ["ai"]]
+
+def test_snapshots_do_not_grow_the_worksheet(sheet, monkeypatch):
+    monkeypatch.setattr(sheets, "MAX_ROWS_PER_REQUEST", 2)
+    for _ in range(3):
+        sheets.sync_to_google_sheet(pd.DataFrame({"keyword": ["ai", "ml", "llm"]}), "sheet-id", "Tweets")
+
+    assert sheet.sheet.row_count == 4
+    assert sheet.sheet.rows == [["keyword"], ["ai"], ["ml"], ["llm"]]
+
+def test_requests_are_chunked_by_cell_count():
+    chunks = list(sheets.chunk_rows([[0] * 10] * 9_000, width=10))
+    assert [len(chunk) for chunk in chunks] == [1_000] * 9
+    assert max(len(chunk) for chunk in sheets.chunk_rows([[0] * 100] * 1_000, width=100)) == 400
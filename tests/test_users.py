@@ -0,0 +1,58 @@
+"""
+Unit tests for cached, atomic user resolution (api/utils/users.py)
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from api.utils import users
+
+class FakeSession:
+    """Answers the upsert with `inserted_id` and the SELECT with `existing_id`"""
+
+    def __init__(self, inserted_id=None, existing_id=None):
+        self.inserted_id = inserted_id
+        self.existing_id = existing_id
+        self.statements = []
+        self.commits = 0
+
+    def scalar(self, statement):
+        self.statements.append(statement)
+        return self.inserted_id if len(self.statements) == 1 else self.existing_id
+
+    def commit(self):
+        self.commits += 1
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    users.invalidate_user()
+    yield
+    users.invalidate_user()
+
+def test_upsert_is_a_single_atomic_statement():
+    sql = str(users.upsert_statement("a@b.c", "A").compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (email) DO NOTHING" in sql
+    assert "RETURNING users.id" in sql
+
+def test_new_user_is_inserted_once_then_cached():
+    user_id = uuid.uuid4()
+    db = FakeSession(inserted_id=user_id)
+
+    assert users.resolve_user_id_sync(db, "new@x.io") == user_id
+    assert users.resolve_user_id_sync(db, "new@x.io") == user_id
+    assert len(db.statements) == 1 and db.commits == 1
+
+def test_existing_user_is_read_after_the_conflict():
+    user_id = uuid.uuid4()
+    db = FakeSession(inserted_id=None, existing_id=user_id)
+
+    assert users.resolve_user_id_sync(db, "old@x.io") == user_id
+    assert len(db.statements) == 2 and db.commits == 0
+
+def test_cached_ids_expire(monkeypatch):
+    users.cache_user_id("a@x.io", "id-1")
+    now = users.time.monotonic()
+    monkeypatch.setattr(users.time, "monotonic", lambda: now + users.settings.USER_CACHE_TTL_SECONDS + 1)
+    assert users.cached_user_id("a@x.io") is None
@@ -0,0 +1,87 @@
+"""
+Unit tests for the concurrent, quota-aware YouTube sweep (src/extractors/youtube_data_extractor.py)
+"""
+
+import pytest
+
+from src.extractors import youtube_data_extractor as youtube
+from src.extractors.youtube_data_extractor import QuotaExceeded, QuotaTracker
+from src.utils.rate_limiter import AdaptiveRateLimiter
+
+class FakeRequest:
+    def __init__(self, payload):
+        self.payload = payload
+        self.postproc = lambda resp, content: content
+
+    def execute(self):
+        return self.postproc({"content-type": "application/json"}, self.payload)
+
+class FakeYouTube:
+    """search().list() returns two pages per term; videos().list() echoes the requested IDs"""
+
+    def __init__(self, results):
+        self.results = results
+        self.videos_calls = []
+
+    def search(self):
+        return self
+
+    def videos(self):
+        client = self
+
+        class Videos:
+            def list(self, part, id):
+                ids = id.split(",")
+                client.videos_calls.append(ids)
+                return FakeRequest({"items": [video_item(video_id) for video_id in ids]})
+        return Videos()
+
+    def list(self, q, pageToken=None, **params):
+        ids = self.results[q]
+        page = ids[:2] if pageToken is None else ids[2:]
+        next_token = "page-2" if pageToken is None and len(ids) > 2 else None
+        return FakeRequest({"items": [{"id": {"videoId": video_id}} for video_id in page], "nextPageToken": next_token})
+
+def video_item(video_id):
+    return {
+        "id": video_id,
+        "snippet": {"title": video_id, "description": "", "publishedAt": "2026-10-01T00:00:00Z",
+                    "channelTitle": "c", "channelId": "c1"},
+        "statistics": {"viewCount": "10"},
+    }
+
+@pytest.fixture(autouse=True)
+def fast_limiter(monkeypatch):
+    monkeypatch.setattr(youtube, "limiter", AdaptiveRateLimiter("youtube", rate=1000, burst=1000))
+
+def test_quota_reservations_respect_the_budget_and_held_back_units():
+    quota = QuotaTracker(budget=250)
+    quota.reserve("search.list")
+    with pytest.raises(QuotaExceeded):
+        quota.reserve("search.list", keep=60)  # Would eat into the units kept for videos.list
+    quota.reserve("search.list", keep=50)
+    assert quota.used == 200 and quota.calls == {"search.list": 2, "videos.list": 0}
+
+def test_estimate_covers_search_pages_and_video_batches():
+    # 3 terms x 2 pages of search, plus ceil(3 * 100 / 50) videos.list calls
+    assert QuotaTracker().estimate(num_terms=3, max_results=100) == 3 * 2 * 100 + 6
+
+def test_sweep_deduplicates_videos_across_terms(monkeypatch):
+    client = FakeYouTube({"a": ["v1", "v2", "v3"], "b": ["v2", "v4"]})
+    monkeypatch.setattr(youtube, "get_client", lambda: client)
+
+    df = youtube.get_product_marketing_videos(["a", "b"], max_results=10, max_workers=2, quota_budget=1_000)
+
+    assert df["video_id"].tolist() == ["v1", "v2", "v3", "v4"]
+    # A video found by several terms is credited to the first term
+    assert df["search_term_matched"].tolist() == ["a", "a", "a", "b"]
+    assert sorted(sum(client.videos_calls, [])) == ["v1", "v2", "v3", "v4"]
+
+def test_sweep_stops_at_the_quota_budget(monkeypatch):
+    client = FakeYouTube({"a": ["v1", "v2", "v3"], "b": ["v4"]})
+    monkeypatch.setattr(youtube, "get_client", lambda: client)
+
+    # One search page plus the held-back videos.list units
+    df = youtube.get_product_marketing_videos(["a", "b"], max_results=3, max_workers=1, quota_budget=102)
+
+    assert df["video_id"].tolist() == ["v1", "v2"]